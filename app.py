@@ -1,8 +1,17 @@
 from flask import Flask, request, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import text
-from models import db, Event, MarketBuyEvent, MarketSellEvent, MissionCompletedEvent, MissionCompletedInfluence, Activity, System, Faction, Objective, ObjectiveTarget, ObjectiveTargetSettlement
-from models import SyntheticCZ, SyntheticGroundCZ
+from models import db, Event, Activity, System, Faction, Objective, ObjectiveTarget, ObjectiveTargetSettlement
+from event_ingest import ingest_events
+from migrations import run_migrations
+from watched_factions import sync_watched_factions
+from sqlite_tuning import sqlite_engine_options, install_sqlite_pragmas
+from periods import resolve_period, resolve_tickid, PeriodError
+from metrics import SUMMARY_KEYS, compile_view, summary_batch
+from request_stream import iter_json_array, check_json_array, iter_chunks, request_body_stream, load_json_body
+from request_stream import BodyTooLargeError, UnsupportedEncodingError, SUPPORTED_CONTENT_ENCODINGS
+from ingest_queue import INGEST_ASYNC, enqueue_events, start_ingest_workers, register_ingest_queue_routes
+from response_cache import cached_response, etag_response, bump_data_generation, register_response_cache_routes
 import logging
 from functools import wraps
 import bcrypt
@@ -10,8 +19,8 @@ from sqlalchemy import text
 import requests as http_requests
 from eic_tick_monitor import on_tick_change
 from cmdr_sync_inara import sync_cmdrs_with_inara
-from datetime import datetime, timedelta
-from dateutil.relativedelta import relativedelta
+from datetime import datetime
+from types import SimpleNamespace
 import os
 from dotenv import load_dotenv
 
@@ -27,6 +36,9 @@ DISCORD_SHOUTOUT_WEBHOOK = os.getenv("DISCORD_SHOUTOUT_WEBHOOK_PROD")
 API_KEY = os.getenv("API_KEY_PROD")
 API_VERSION = os.getenv("API_VERSION_PROD")
 
+# Number of events inserted per statement group while streaming a /events body
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "100"))
+
 # Logging setup
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -37,13 +49,10 @@ last_known_tickid = {"value": None}
 app = Flask(__name__)
 app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///bgs_data.db"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = sqlite_engine_options()
 db.init_app(app)
-
-
-@app.before_request
-def initialize_database():
-    with app.app_context():
-        db.create_all()
+with app.app_context():
+    install_sqlite_pragmas(db.engine)
 
 
 def require_api_key(f):
@@ -74,159 +83,62 @@ def require_api_key(f):
 
 def get_latest_tickid():
     logging.info("[TickTriggerEIC] Get latest tickid...")
-    sql = text("SELECT tickid FROM event WHERE tickid IS NOT NULL ORDER BY timestamp DESC LIMIT 1")
-    latest = db.session.execute(sql).fetchone()
-    last_known_tickid["value"] = latest[0] if latest else None
+    last_known_tickid["value"] = resolve_tickid(db.session, "current")
     logging.info(f"[TickTriggerEIC] Initial tickid set to: {last_known_tickid['value']}")
 
 
-@app.route("/events", methods=["POST"])
-@require_api_key
-def post_events():
+def process_events(events_data):
+    """
+    Stores one batch of events and triggers the tick change hook.
+    Used by POST /events directly and by the ingest workers in async mode.
+    events_data may be any iterable, it is inserted in chunks of INGEST_CHUNK_SIZE events
+    within one transaction, so a streamed body never has to be held in memory as a whole.
+    Returns the number of accepted and of duplicate events.
+    """
+    accepted = duplicates = 0
+    incoming_tickids = set()
     try:
-        events_data = request.get_json()
-        for event_dict in events_data:
-            event = Event.from_dict(event_dict)
-            db.session.add(event)
-            db.session.flush()
-
-            if event.event == "MarketBuy":
-                db.session.add(MarketBuyEvent(
-                    event_id=event.id,
-                    stock=event_dict.get("Stock"),
-                    stock_bracket=event_dict.get("StockBracket"),
-                    value=event_dict.get("TotalCost"),
-                    count=event_dict.get("Count")
-                ))
-            elif event.event == "MarketSell":
-                db.session.add(MarketSellEvent(
-                    event_id=event.id,
-                    demand=event_dict.get("Demand"),
-                    demand_bracket=event_dict.get("DemandBracket"),
-                    profit=event_dict.get("Profit"),
-                    value=event_dict.get("TotalSale"),
-                    count=event_dict.get("Count")
-                ))
-            elif event.event == "MissionCompleted":
-                db.session.add(MissionCompletedEvent(
-                    event_id=event.id,
-                    awarding_faction=event_dict.get("AwardingFaction"),
-                    mission_name=event_dict.get("Name"),
-                    reward=event_dict.get("Reward")
-                ))
-                faction_effects = event_dict.get("FactionEffects", [])
-                for effect in faction_effects:
-                    faction_name = effect.get("Faction")
-                    reputation = effect.get("Reputation")
-                    reputation_trend = effect.get("ReputationTrend")
-                    effect_entries = effect.get("Effects", [])
-                    influence_entries = effect.get("Influence", [])
-                    for infl in influence_entries:
-                        db.session.add(MissionCompletedInfluence(
-                            mission_id=event.id,
-                            system=infl.get("SystemAddress"),
-                            influence=infl.get("Influence"),
-                            trend=infl.get("Trend"),
-                            faction_name=faction_name,
-                            reputation=reputation,
-                            reputation_trend=reputation_trend,
-                            effect=effect_entries[0].get("Effect") if effect_entries else None,
-                            effect_trend=effect_entries[0].get("Trend") if effect_entries else None
-                        ))
-            elif event.event == "FactionKillBond":
-                from models import FactionKillBondEvent
-                db.session.add(FactionKillBondEvent(
-                    event_id=event.id,
-                    killer_ship=event_dict.get("KillerShip"),
-                    awarding_faction=event_dict.get("AwardingFaction"),
-                    victim_faction=event_dict.get("VictimFaction"),
-                    reward = event_dict.get("Reward")
-                ))
-            elif event.event == "MissionFailed":
-                from models import MissionFailedEvent
-                db.session.add(MissionFailedEvent(
-                    event_id=event.id,
-                    mission_name=event_dict.get("Name"),
-                    awarding_faction=event_dict.get("AwardingFaction"),
-                    fine=event_dict.get("Fine")
-                ))
-            elif event.event == "MultiSellExplorationData":
-                from models import MultiSellExplorationDataEvent
-                db.session.add(MultiSellExplorationDataEvent(
-                    event_id=event.id,
-                    total_earnings=event_dict.get("TotalEarnings")
-                ))
-            elif event.event == "RedeemVoucher":
-                from models import RedeemVoucherEvent
-                db.session.add(RedeemVoucherEvent(
-                    event_id=event.id,
-                    amount=event_dict.get("Amount"),
-                    faction=event_dict.get("Faction"),
-                    type=event_dict.get("Type")
-                ))
-            elif event.event == "SellExplorationData":
-                from models import SellExplorationDataEvent
-                db.session.add(SellExplorationDataEvent(
-                    event_id=event.id,
-                    earnings=event_dict.get("TotalEarnings")
-                ))
-            elif event.event == "CommitCrime":
-                from models import CommitCrimeEvent
-                db.session.add(CommitCrimeEvent(
-                    event_id=event.id,
-                    crime_type=event_dict.get("CrimeType"),
-                    faction=event_dict.get("Faction"),
-                    victim=event_dict.get("Victim"),
-                    bounty=event_dict.get("Bounty")
-                ))
-            elif event.event == "SyntheticCZ":
-                def extract_cz_type(data):
-                    for cz in ["low", "medium", "high"]:
-                        if data.get(cz) == 1:
-                            return cz
-                    return None
-                cz_type = extract_cz_type(event_dict)
-                # Faction robust extrahieren
-                faction = event_dict.get("faction") or event_dict.get("Faction")
-                db.session.add(SyntheticCZ(
-                    event_id=event.id,
-                    cz_type=cz_type,
-                    faction=faction,
-                    cmdr=event_dict.get("cmdr"),
-                    station_faction_name=event_dict.get("station_faction_name")
-                ))
-            elif event.event == "SyntheticGroundCZ":
-                def extract_cz_type(data):
-                    for cz in ["low", "medium", "high"]:
-                        if data.get(cz) == 1:
-                            return cz
-                    return None
-                cz_type = extract_cz_type(event_dict)
-                # Faction robust extrahieren
-                faction = event_dict.get("faction") or event_dict.get("Faction")
-                db.session.add(SyntheticGroundCZ(
-                    event_id=event.id,
-                    cz_type=cz_type,
-                    settlement=event_dict.get("settlement"),
-                    faction=faction,
-                    cmdr=event_dict.get("cmdr"),
-                    station_faction_name=event_dict.get("station_faction_name")
-                ))
-
+        for chunk in iter_chunks(events_data, INGEST_CHUNK_SIZE):
+            chunk_accepted, chunk_duplicates = ingest_events(db.session, chunk)
+            accepted += len(chunk_accepted)
+            duplicates += chunk_duplicates
+            incoming_tickids.update(event.get("tickid") for event in chunk if event.get("tickid"))
+        if accepted:
+            bump_data_generation(db.session)
         db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    # Detect tickid change
+    current_tickid = next(iter(incoming_tickids), None)
 
-        # Detect tickid change
-        incoming_tickids = {event.get("tickid") for event in events_data if event.get("tickid")}
-        current_tickid = next(iter(incoming_tickids), None)
+    if current_tickid and last_known_tickid["value"] != current_tickid:
+        logger.info(f"Tick changed: {last_known_tickid['value']} → {current_tickid}")
+        last_known_tickid["value"] = current_tickid
+        on_tick_change()
+
+    return accepted, duplicates
 
-        if current_tickid and last_known_tickid["value"] != current_tickid:
-            logger.info(f"Tick changed: {last_known_tickid['value']} → {current_tickid}")
-            last_known_tickid["value"] = current_tickid
-            on_tick_change()
 
-        return jsonify({"status": "success"}), 200
+@app.route("/events", methods=["POST"])
+@require_api_key
+def post_events():
+    try:
+        body = request_body_stream(request)
+        if INGEST_ASYNC:
+            # Only spooled after a cheap check; a malformed array fails later in the worker
+            entry_id = enqueue_events(check_json_array(body.read()))
+            return jsonify({"status": "accepted", "queue_id": entry_id}), 202
+
+        # Parse the body element by element instead of request.get_json()
+        accepted, duplicates = process_events(iter_json_array(body))
+        return jsonify({"status": "success", "accepted": accepted, "duplicates": duplicates}), 200
+    except BodyTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+    except UnsupportedEncodingError as e:
+        return jsonify({"error": str(e)}), 415
     except Exception as e:
-        db.session.rollback()
         logger.error(f"Event processing error: {str(e)}")
         return jsonify({"error": str(e)}), 400
 
@@ -234,7 +146,7 @@ def post_events():
 @require_api_key
 def put_activities():
     try:
-        activity_data = request.get_json()
+        activity_data = load_json_body(request)
         validated = activity_data
 
         activity = Activity(
@@ -266,331 +178,95 @@ def put_activities():
             activity.systems.append(system)
 
         db.session.add(activity)
+        bump_data_generation(db.session)
         db.session.commit()
 
         return jsonify({"status": "activity saved"}), 200
+    except BodyTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+    except UnsupportedEncodingError as e:
+        return jsonify({"error": str(e)}), 415
     except Exception as e:
         db.session.rollback()
         logger.error(f"Activity processing error: {str(e)}")
         return jsonify({"error": str(e)}), 400
 
 
-@app.route("/api/summary/<key>", methods=["GET"])
+@app.route("/api/summary/batch", methods=["GET"])
 @require_api_key
-def summary_api(key):
-
-    queries = {
-        "market-events": """
-            SELECT e.cmdr,
-                SUM(COALESCE(mb.value, 0)) AS total_buy,
-                SUM(COALESCE(ms.value, 0)) AS total_sell,
-                SUM(COALESCE(mb.value, 0)) + SUM(COALESCE(ms.value, 0)) AS total_transaction_volume,
-                SUM(COALESCE(mb.count, 0)) + SUM(COALESCE(ms.count, 0)) AS total_trade_quantity
-            FROM event e
-            LEFT JOIN market_buy_event mb ON mb.event_id = e.id
-            LEFT JOIN market_sell_event ms ON ms.event_id = e.id
-            WHERE e.cmdr IS NOT NULL AND {date_filter}
-            GROUP BY e.cmdr
-            HAVING total_transaction_volume > 0
-            ORDER BY total_trade_quantity DESC
-            """,
-        "missions-completed": """
-            SELECT e.cmdr, COUNT(*) AS missions_completed
-            FROM mission_completed_event mc
-            JOIN event e ON e.id = mc.event_id
-            WHERE e.cmdr IS NOT NULL AND {date_filter}
-            GROUP BY e.cmdr
-            ORDER BY missions_completed DESC
-            """,
-        "missions-failed": """
-            SELECT e.cmdr, COUNT(*) AS missions_failed
-            FROM mission_failed_event mf
-            JOIN event e ON e.id = mf.event_id
-            WHERE e.cmdr IS NOT NULL AND {date_filter}
-            GROUP BY e.cmdr
-            ORDER BY missions_failed DESC
-            """,
-        "bounty-vouchers": """
-            SELECT e.cmdr, SUM(rv.amount) AS bounty_vouchers
-            FROM redeem_voucher_event rv
-            JOIN event e ON e.id = rv.event_id
-            WHERE e.cmdr IS NOT NULL AND rv.type = 'bounty' AND {date_filter}
-            GROUP BY e.cmdr
-            ORDER BY bounty_vouchers DESC
-            """,
-        "combat-bonds": """
-            SELECT e.cmdr, SUM(rv.amount) AS combat_bonds
-            FROM redeem_voucher_event rv
-            JOIN event e ON e.id = rv.event_id
-            WHERE e.cmdr IS NOT NULL AND rv.type = 'CombatBond' AND {date_filter}
-            GROUP BY e.cmdr
-            ORDER BY combat_bonds DESC
-            """,
-        "influence-by-faction": """
-            SELECT e.cmdr, mci.faction_name, SUM(LENGTH(mci.influence)) AS influence
-            FROM mission_completed_influence mci
-            JOIN mission_completed_event mce ON mce.event_id = mci.mission_id
-            JOIN event e ON e.id = mce.event_id
-            WHERE e.cmdr IS NOT NULL AND {date_filter}
-            GROUP BY e.cmdr, mci.faction_name
-            ORDER BY influence DESC, e.cmdr
-            """,
-        "influence-eic": """
-            SELECT e.cmdr, mci.faction_name, SUM(LENGTH(mci.influence)) AS influence
-            FROM mission_completed_influence mci
-            JOIN mission_completed_event mce ON mce.event_id = mci.mission_id
-            JOIN event e ON e.id = mce.event_id
-            WHERE e.cmdr IS NOT NULL
-            AND mci.faction_name LIKE '%East India Company%'
-            AND {date_filter}
-            GROUP BY e.cmdr, mci.faction_name
-            ORDER BY influence DESC, e.cmdr
-            """,
-        "exploration-sales": """
-            SELECT cmdr, SUM(total_sales) AS total_exploration_sales
-            FROM (SELECT e.cmdr, se.earnings AS total_sales
-            FROM sell_exploration_data_event se
-            JOIN event e ON e.id = se.event_id
-            WHERE e.cmdr IS NOT NULL AND {date_filter}
-            UNION ALL
-            SELECT e.cmdr, ms.total_earnings AS total_sales
-            FROM multi_sell_exploration_data_event ms
-            JOIN event e
-            ON e.id = ms.event_id
-            WHERE e.cmdr IS NOT NULL AND {date_filter})
-            GROUP BY cmdr
-            ORDER BY total_exploration_sales DESC
-            """,
-        "bounty-fines": """
-            SELECT e.cmdr, SUM(cc.bounty) AS bounty_fines
-            FROM commit_crime_event cc
-            JOIN event e ON e.id = cc.event_id
-            WHERE e.cmdr IS NOT NULL AND {date_filter}
-            GROUP BY e.cmdr
-            ORDER BY bounty_fines DESC
-            """
-    }
-
-    sql_template = queries.get(key)
-    if not sql_template:
-        return jsonify({"error": "Unknown summary key"}), 404
-
-    # Zeitraum filtern (wie bei leaderboard)
-    period = request.args.get("period", "all")
-    today = datetime.utcnow()
-    start = end = None
-
-    if period == "cw":
-        start = today - timedelta(days=today.weekday())
-        end = start + timedelta(days=6)
-    elif period == "lw":
-        end = today - timedelta(days=today.weekday() + 1)
-        start = end - timedelta(days=6)
-    elif period == "cm":
-        start = today.replace(day=1)
-        end = (start + relativedelta(months=1)) - timedelta(days=1)
-    elif period == "lm":
-        this_month_start = today.replace(day=1)
-        start = this_month_start - relativedelta(months=1)
-        end = this_month_start - timedelta(days=1)
-    elif period == "2m":
-        this_month_start = today.replace(day=1)
-        start = this_month_start - relativedelta(months=2)
-        end = this_month_start - timedelta(days=1)
-    elif period == "y":
-        start = today.replace(month=1, day=1)
-        end = today.replace(month=12, day=31)
-    elif period == "cd":
-        start = end = today
-    elif period == "ld":
-        start = end = today - timedelta(days=1)
-
-    if start and end:
-        date_filter = f"e.timestamp BETWEEN '{start.strftime('%Y-%m-%dT00:00:00Z')}' AND '{end.strftime('%Y-%m-%dT23:59:59Z')}'"
-    else:
-        date_filter = "1=1"
-
-    sql = sql_template.replace("{date_filter}", date_filter)
+@etag_response()
+@cached_response
+def summary_batch_api():
+    """
+    Several summary keys in one request: ?keys=market-events,combat-bonds&period=cw&limit=5
+    (or ?start=&end=, ?tick=, ?tick_from=&tick_to=). Returns {key: rows}, each list shaped like /api/summary/<key>.
+    """
+    # A key given twice is answered once, in the position it was first given
+    keys = list(dict.fromkeys(k.strip() for k in request.args.get("keys", "").split(",") if k.strip()))
+    if not keys:
+        return jsonify({"error": "Missing keys"}), 400
+    unknown = [k for k in keys if k not in SUMMARY_KEYS]
+    if unknown:
+        return jsonify({"error": f"Unknown summary key: {', '.join(unknown)}"}), 404
+    try:
+        limit = int(request.args["limit"]) if request.args.get("limit") else None
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if limit is not None and limit < 1:
+        return jsonify({"error": "limit must be at least 1"}), 400
 
     try:
-        result = db.session.execute(text(sql)).fetchall()
-        data = [dict(row._mapping) for row in result]
-        return jsonify(data)
+        period = resolve_period(db.session, request.args)
+        if period is None:
+            return jsonify({key: [] for key in keys})
+        return jsonify(summary_batch(db.session, keys, period, limit=limit))
+    except PeriodError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/summary/top5/<key>", methods=["GET"])
+@app.route("/api/summary/<key>", methods=["GET"])
 @require_api_key
-def summary_top5_api(key):
-
-    def get_date_filter(period: str):
-        today = datetime.utcnow()
-        start = end = None
-
-        if period == "cw":
-            start = today - timedelta(days=today.weekday())
-            end = start + timedelta(days=6)
-        elif period == "lw":
-            end = today - timedelta(days=today.weekday() + 1)
-            start = end - timedelta(days=6)
-        elif period == "cm":
-            start = today.replace(day=1)
-            end = (start + relativedelta(months=1)) - timedelta(days=1)
-        elif period == "lm":
-            this_month_start = today.replace(day=1)
-            start = this_month_start - relativedelta(months=1)
-            end = this_month_start - timedelta(days=1)
-        elif period == "2m":
-            this_month_start = today.replace(day=1)
-            start = this_month_start - relativedelta(months=2)
-            end = this_month_start - timedelta(days=1)
-        elif period == "y":
-            start = today.replace(month=1, day=1)
-            end = today.replace(month=12, day=31)
-        elif period == "cd":
-            start = end = today
-        elif period == "ld":
-            start = end = today - timedelta(days=1)
-
-        if start and end:
-            return f"e.timestamp BETWEEN '{start.strftime('%Y-%m-%dT00:00:00Z')}' AND '{end.strftime('%Y-%m-%dT23:59:59Z')}'"
-        return "1=1"
-
-    base_queries = {
-        "market-events": """
-            SELECT e.cmdr,
-                   SUM(COALESCE(mb.value, 0)) AS total_buy,
-                   SUM(COALESCE(ms.value, 0)) AS total_sell,
-                   SUM(COALESCE(mb.value, 0)) + SUM(COALESCE(ms.value, 0)) AS total_transaction_volume,
-                   SUM(COALESCE(mb.count, 0)) + SUM(COALESCE(ms.count, 0)) AS total_trade_quantity
-            FROM event e
-            LEFT JOIN market_buy_event mb ON mb.event_id = e.id
-            LEFT JOIN market_sell_event ms ON ms.event_id = e.id
-            WHERE e.cmdr IS NOT NULL AND {date_filter}
-            GROUP BY e.cmdr
-            HAVING total_transaction_volume > 0
-            ORDER BY total_trade_quantity DESC
-            LIMIT 5
-        """,
-        "missions-completed": """
-            SELECT e.cmdr, COUNT(*) AS missions_completed
-            FROM mission_completed_event mc
-            JOIN event e ON e.id = mc.event_id
-            WHERE e.cmdr IS NOT NULL AND {date_filter}
-            GROUP BY e.cmdr
-            ORDER BY missions_completed DESC
-            LIMIT 5
-        """,
-        "missions-failed": """
-            SELECT e.cmdr, COUNT(*) AS missions_failed
-            FROM mission_failed_event mf
-            JOIN event e ON e.id = mf.event_id
-            WHERE e.cmdr IS NOT NULL AND {date_filter}
-            GROUP BY e.cmdr
-            ORDER BY missions_failed DESC
-            LIMIT 5
-        """,
-        "bounty-vouchers": """
-            SELECT e.cmdr, SUM(rv.amount) AS bounty_vouchers
-            FROM redeem_voucher_event rv
-            JOIN event e ON e.id = rv.event_id
-            WHERE e.cmdr IS NOT NULL AND rv.type = 'bounty' AND {date_filter}
-            GROUP BY e.cmdr
-            ORDER BY bounty_vouchers DESC
-            LIMIT 5
-        """,
-        "combat-bonds": """
-            SELECT e.cmdr, SUM(rv.amount) AS combat_bonds
-            FROM redeem_voucher_event rv
-            JOIN event e ON e.id = rv.event_id
-            WHERE e.cmdr IS NOT NULL AND rv.type = 'CombatBond' AND {date_filter}
-            GROUP BY e.cmdr
-            ORDER BY combat_bonds DESC
-            LIMIT 5
-        """,
-        "influence-by-faction": """
-            SELECT e.cmdr, mci.faction_name, SUM(LENGTH(mci.influence)) AS influence
-            FROM mission_completed_influence mci
-            JOIN mission_completed_event mce ON mce.event_id = mci.mission_id
-            JOIN event e ON e.id = mce.event_id
-            WHERE e.cmdr IS NOT NULL AND {date_filter}
-            GROUP BY e.cmdr, mci.faction_name
-            ORDER BY influence DESC, e.cmdr
-            LIMIT 5
-        """,
-        "influence-eic": """
-            SELECT e.cmdr, mci.faction_name, SUM(LENGTH(mci.influence)) AS influence
-            FROM mission_completed_influence mci
-            JOIN mission_completed_event mce ON mce.event_id = mci.mission_id
-            JOIN event e ON e.id = mce.event_id
-            WHERE e.cmdr IS NOT NULL AND mci.faction_name LIKE '%East India Company%' AND {date_filter}
-            GROUP BY e.cmdr, mci.faction_name
-            ORDER BY influence DESC, e.cmdr
-            LIMIT 5
-        """,
-        "exploration-sales": """
-            SELECT cmdr,
-                   SUM(total_sales) AS total_exploration_sales
-            FROM (
-                SELECT e.cmdr, se.earnings AS total_sales
-                FROM sell_exploration_data_event se
-                JOIN event e ON e.id = se.event_id
-                WHERE e.cmdr IS NOT NULL AND {date_filter}
-                UNION ALL
-                SELECT e.cmdr, ms.total_earnings AS total_sales
-                FROM multi_sell_exploration_data_event ms
-                JOIN event e ON e.id = ms.event_id
-                WHERE e.cmdr IS NOT NULL AND {date_filter}
-            )
-            GROUP BY cmdr
-            ORDER BY total_exploration_sales DESC
-            LIMIT 5
-        """,
-        "bounty-fines": """
-            SELECT e.cmdr, SUM(cc.bounty) AS bounty_fines
-            FROM commit_crime_event cc
-            JOIN event e ON e.id = cc.event_id
-            WHERE e.cmdr IS NOT NULL AND {date_filter}
-            GROUP BY e.cmdr
-            ORDER BY bounty_fines DESC
-            LIMIT 5
-        """
-    }
-
-    sql_template = base_queries.get(key)
-    if not sql_template:
+@etag_response()
+@cached_response
+def summary_api(key):
+    if key not in SUMMARY_KEYS:
         return jsonify({"error": "Unknown summary key"}), 404
 
-    period = request.args.get("period", "all")
-    date_filter = get_date_filter(period)
-    sql = sql_template.replace("{date_filter}", date_filter)
-
     try:
-        result = db.session.execute(text(sql)).fetchall()
+        # ?tick= takes precedence over ?start=/?end=, which take precedence over ?period=
+        period = resolve_period(db.session, request.args)
+        if period is None:
+            return jsonify([])
+        sql, params = compile_view(key, period)
+        result = db.session.execute(text(sql), params).fetchall()
         data = [dict(row._mapping) for row in result]
         return jsonify(data)
+    except PeriodError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/table/<tablename>", methods=["GET"])
+@app.route("/api/summary/top5/<key>", methods=["GET"])
 @require_api_key
-def query_table(tablename):
-    try:
-        # Security check: Ensure the table name is valid and exists
-        result = db.session.execute(text(
-            "SELECT name FROM sqlite_master WHERE type='table' AND name=:name"
-        ), {"name": tablename}).fetchone()
-
-        if not result:
-            return jsonify({"error": f"Table '{tablename}' not found."}), 404
+@etag_response()
+@cached_response
+def summary_top5_api(key):
+    if key not in SUMMARY_KEYS:
+        return jsonify({"error": "Unknown summary key"}), 404
 
-        # Daten abfragen
-        rows = db.session.execute(text(f"SELECT * FROM {tablename}")).fetchall()
-        data = [dict(row._mapping) for row in rows]
+    try:
+        period = resolve_period(db.session, request.args)
+        if period is None:
+            return jsonify([])
+        sql, params = compile_view(key, period, limit=5)
+        result = db.session.execute(text(sql), params).fetchall()
+        data = [dict(row._mapping) for row in result]
         return jsonify(data)
-
+    except PeriodError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -600,36 +276,14 @@ def query_table(tablename):
 def send_all_top5_to_discord():
     base_queries = {
         "Market Events": {
-            "sql": '''
-                SELECT e.cmdr,
-                       SUM(COALESCE(mb.value, 0)) AS total_buy,
-                       SUM(COALESCE(ms.value, 0)) AS total_sell,
-                       SUM(COALESCE(mb.value, 0)) + SUM(COALESCE(ms.value, 0)) AS total_volume,
-                       SUM(COALESCE(mb.count, 0)) + SUM(COALESCE(ms.count, 0)) AS quantity
-                FROM event e
-                LEFT JOIN market_buy_event mb ON mb.event_id = e.id
-                LEFT JOIN market_sell_event ms ON ms.event_id = e.id
-                WHERE e.cmdr IS NOT NULL
-                GROUP BY e.cmdr
-                HAVING total_volume > 0
-                ORDER BY quantity DESC
-                LIMIT 5
-            ''',
+            "key": "market-events",
             "format": lambda rows: "\n".join(
-                f"{i+1}. {(r.cmdr or ''):<15} | Vol: {r.total_volume or 0:>15,} Cr. - {r.quantity or 0:>9,} t"
+                f"{i+1}. {(r.cmdr or ''):<15} | Vol: {r.total_transaction_volume or 0:>15,} Cr. - {r.total_trade_quantity or 0:>9,} t"
                 for i, r in enumerate(rows)
             )
         },
         "Missions Completed": {
-            "sql": '''
-                SELECT e.cmdr, COUNT(*) AS missions_completed
-                FROM mission_completed_event mc
-                JOIN event e ON e.id = mc.event_id
-                WHERE e.cmdr IS NOT NULL
-                GROUP BY e.cmdr
-                ORDER BY missions_completed DESC
-                LIMIT 5
-            ''',
+            "key": "missions-completed",
             "format": lambda rows: "\n".join(
                 f"{i+1}. {(r.cmdr or 0):<15} | {r.missions_completed:>4}"
                 for i, r in enumerate(rows)
@@ -651,100 +305,42 @@ def send_all_top5_to_discord():
         #     )
         # },
         "Influence by Faction": {
-            "sql": '''
-                SELECT e.cmdr, mci.faction_name, SUM(LENGTH(mci.influence)) AS influence
-                FROM mission_completed_influence mci
-                JOIN mission_completed_event mce ON mce.event_id = mci.mission_id
-                JOIN event e ON e.id = mce.event_id
-                WHERE e.cmdr IS NOT NULL
-                GROUP BY e.cmdr, mci.faction_name
-                ORDER BY influence DESC, e.cmdr
-                LIMIT 5
-            ''',
+            "key": "influence-by-faction",
             "format": lambda rows: "\n".join(
                 f"{i+1}. {(r.cmdr or 0):<15} | {(r.faction_name or 0):<30} | +{r.influence:>4}"
                 for i, r in enumerate(rows)
             )
         },
         "Influence EIC": {
-            "sql": '''
-                SELECT e.cmdr, mci.faction_name, SUM(LENGTH(mci.influence)) AS influence
-                FROM mission_completed_influence mci
-                JOIN mission_completed_event mce ON mce.event_id = mci.mission_id
-                JOIN event e ON e.id = mce.event_id
-                WHERE e.cmdr IS NOT NULL AND mci.faction_name LIKE '%East India Company%' AND {date_filter}
-                GROUP BY e.cmdr, mci.faction_name
-                ORDER BY influence DESC, e.cmdr
-                LIMIT 5
-            ''',
+            "key": "influence-eic",
             "format": lambda rows: "\n".join(
                 f"{i+1}. {(r.cmdr or 0):<15} | +{r.influence}"
                 for i, r in enumerate(rows)
             )
         },
         "Bounty Vouchers": {
-            "sql": '''
-                SELECT e.cmdr, SUM(rv.amount) AS bounty_vouchers
-                FROM redeem_voucher_event rv
-                JOIN event e ON e.id = rv.event_id
-                WHERE e.cmdr IS NOT NULL AND rv.type = 'bounty'
-                GROUP BY e.cmdr
-                ORDER BY bounty_vouchers DESC
-                LIMIT 5
-            ''',
+            "key": "bounty-vouchers",
             "format": lambda rows: "\n".join(
                 f"{i+1}. {(r.cmdr or 0):<15} | {r.bounty_vouchers or 0:>15,} Cr."
                 for i, r in enumerate(rows)
             )
         },
         "Combat Bonds": {
-            "sql": '''
-                SELECT e.cmdr, SUM(rv.amount) AS combat_bonds
-                FROM redeem_voucher_event rv
-                JOIN event e ON e.id = rv.event_id
-                WHERE e.cmdr IS NOT NULL AND rv.type = 'CombatBond'
-                GROUP BY e.cmdr
-                ORDER BY combat_bonds DESC
-                LIMIT 5
-            ''',
+            "key": "combat-bonds",
             "format": lambda rows: "\n".join(
                 f"{i+1}. {(r.cmdr or 0):<15} | {r.combat_bonds or 0:>15,} Cr."
                 for i, r in enumerate(rows)
             )
         },
         "Exploration Sales": {
-            "sql": '''
-                SELECT cmdr,
-                   SUM(total_sales) AS total_exploration_sales
-                FROM (
-                    SELECT e.cmdr, se.earnings AS total_sales
-                    FROM sell_exploration_data_event se
-                    JOIN event e ON e.id = se.event_id
-                    WHERE e.cmdr IS NOT NULL
-                    UNION ALL
-                    SELECT e.cmdr, ms.total_earnings AS total_sales
-                    FROM multi_sell_exploration_data_event ms
-                    JOIN event e ON e.id = ms.event_id
-                    WHERE e.cmdr IS NOT NULL
-                )
-                GROUP BY cmdr
-                ORDER BY total_exploration_sales DESC
-                LIMIT 5
-            ''',
+            "key": "exploration-sales",
             "format": lambda rows: "\n".join(
                 f"{i+1}. {(r.cmdr or 0):<15} | {r.total_exploration_sales or 0:>15,} Cr."
                 for i, r in enumerate(rows)
             )
         },
         "Bounty Fines": {
-            "sql": '''
-                   SELECT e.cmdr, SUM(cc.bounty) AS bounty_fines
-                   FROM commit_crime_event cc
-                   JOIN event e ON e.id = cc.event_id
-                   WHERE e.cmdr IS NOT NULL
-                   GROUP BY e.cmdr
-                   ORDER BY bounty_fines DESC LIMIT 5
-                   ''',
+            "key": "bounty-fines",
             "format": lambda rows: "\n".join(
                 f"{i + 1}. {(r.cmdr or 0):<15} | {r.bounty_fines or 0:>15,} Cr."
                 for i, r in enumerate(rows)
@@ -753,9 +349,11 @@ def send_all_top5_to_discord():
     }
 
     try:
+        # All sections in one fused statement
+        batch = summary_batch(db.session, [q["key"] for q in base_queries.values()], limit=5)
         sections = []
         for title, q in base_queries.items():
-            rows = db.session.execute(text(q["sql"])).fetchall()
+            rows = [SimpleNamespace(**row) for row in batch[q["key"]]]
             if not rows:
                 continue
             section = f"**📊 {title}**\n```text\n{q['format'](rows)}\n```"
@@ -821,6 +419,24 @@ def send_syntheticgroundcz_summary_to_discord_api():
 from eic_in_conflict import register_eic_conflict_routes
 register_eic_conflict_routes(app, db, require_api_key)
 
+# Register conflict history route
+from conflicts import register_conflict_routes
+register_conflict_routes(app, db, require_api_key)
+
+# Register system state route
+from systems import register_system_routes
+register_system_routes(app, db, require_api_key)
+
+# Register ingest queue status route
+register_ingest_queue_routes(app, require_api_key)
+
+# Register response cache statistics route
+register_response_cache_routes(app, require_api_key)
+
+# Register table export route
+from table_api import register_table_routes
+register_table_routes(app, db, require_api_key)
+
 
 @app.route("/api/debug/tick-change", methods=["POST"])
 @require_api_key
@@ -874,199 +490,33 @@ def login_api():
 
 @app.route("/api/summary/leaderboard", methods=["GET"])
 @require_api_key
+@etag_response()
+@cached_response
 def leaderboard_summary():
     try:
-        period = request.args.get("period", "all")
-        today = datetime.utcnow()
-        start = end = None
-
-        if period == "cw":  # current week
-            start = today - timedelta(days=today.weekday())
-            end = start + timedelta(days=6)
-        elif period == "lw":  # last week
-            end = today - timedelta(days=today.weekday() + 1)
-            start = end - timedelta(days=6)
-        elif period == "cm":  # current month
-            start = today.replace(day=1)
-            end = (start + relativedelta(months=1)) - timedelta(days=1)
-        elif period == "lm":  # last month
-            this_month_start = today.replace(day=1)
-            start = this_month_start - relativedelta(months=1)
-            end = this_month_start - timedelta(days=1)
-        elif period == "2m":  # last two full months
-            this_month_start = today.replace(day=1)
-            start = this_month_start - relativedelta(months=2)
-            end = this_month_start - timedelta(days=1)
-        elif period == "y":  # year-to-date
-            start = today.replace(month=1, day=1)
-            end = today.replace(month=12, day=31)
-        elif period == "cd":  # current day (today)
-            start = end = today
-        elif period == "ld":  # last day (yesterday)
-            start = end = today - timedelta(days=1)
-
-        if start and end:
-            date_filter = f"e.timestamp BETWEEN '{start.strftime('%Y-%m-%dT00:00:00Z')}' AND '{end.strftime('%Y-%m-%dT23:59:59Z')}'"
-            date_filter_sub = f"ex.timestamp BETWEEN '{start.strftime('%Y-%m-%dT00:00:00Z')}' AND '{end.strftime('%Y-%m-%dT23:59:59Z')}'"
-        else:
-            date_filter = "1=1"
-            date_filter_sub = "1=1"
-
-        sql = f"""
-            SELECT e.cmdr,
-               c.squadron_rank AS rank,
-               SUM(CASE WHEN mb.event_id IS NOT NULL THEN mb.value ELSE 0 END) AS total_buy,
-               SUM(CASE WHEN ms.event_id IS NOT NULL THEN ms.value ELSE 0 END) AS total_sell,
-               CASE
-                   WHEN SUM(CASE WHEN ms.event_id IS NOT NULL THEN ms.value ELSE 0 END) > 0
-                   THEN SUM(CASE WHEN ms.event_id IS NOT NULL THEN ms.value ELSE 0 END)
-                        - SUM(CASE WHEN mb.event_id IS NOT NULL THEN mb.value ELSE 0 END)
-                   ELSE 0
-               END AS profit,
-               ROUND(
-                 CASE
-                   WHEN SUM(CASE WHEN ms.event_id IS NOT NULL THEN ms.value ELSE 0 END) > 0 AND
-                        SUM(CASE WHEN mb.event_id IS NOT NULL THEN mb.value ELSE 0 END) > 0
-                   THEN (SUM(CASE WHEN ms.event_id IS NOT NULL THEN ms.value ELSE 0 END)
-                         - SUM(CASE WHEN mb.event_id IS NOT NULL THEN mb.value ELSE 0 END)) * 100.0
-                        / SUM(CASE WHEN mb.event_id IS NOT NULL THEN mb.value ELSE 0 END)
-                   ELSE 0
-                 END, 2
-               ) AS profitability,
-
-               SUM(CASE WHEN mb.event_id IS NOT NULL THEN mb.count ELSE 0 END) +
-               SUM(CASE WHEN ms.event_id IS NOT NULL THEN ms.count ELSE 0 END) AS total_quantity,
-
-               SUM(CASE WHEN mb.event_id IS NOT NULL THEN mb.value ELSE 0 END) +
-               SUM(CASE WHEN ms.event_id IS NOT NULL THEN ms.value ELSE 0 END) AS total_volume,
-
-               (
-                 SELECT COUNT(*)
-                 FROM mission_completed_event mc
-                 JOIN event ex ON ex.id = mc.event_id
-                 WHERE ex.cmdr = e.cmdr AND {date_filter_sub}
-               ) AS missions_completed,
-
-               (
-                 SELECT COUNT(*)
-                 FROM mission_failed_event mf
-                 JOIN event ex ON ex.id = mf.event_id
-                 WHERE ex.cmdr = e.cmdr AND {date_filter_sub}
-               ) AS missions_failed,
-
-               (
-                 SELECT SUM(rv.amount)
-                 FROM redeem_voucher_event rv
-                 JOIN event ex ON ex.id = rv.event_id
-                 WHERE ex.cmdr = e.cmdr AND rv.type = 'bounty' AND {date_filter_sub}
-               ) AS bounty_vouchers,
-
-               (
-                 SELECT SUM(rv.amount)
-                 FROM redeem_voucher_event rv
-                 JOIN event ex ON ex.id = rv.event_id
-                 WHERE ex.cmdr = e.cmdr AND rv.type = 'CombatBond' AND {date_filter_sub}
-               ) AS combat_bonds,
-
-               (
-                 SELECT SUM(t.total_sales)
-                 FROM (
-                   SELECT se.earnings AS total_sales
-                   FROM sell_exploration_data_event se
-                   JOIN event ex ON ex.id = se.event_id
-                   WHERE ex.cmdr = e.cmdr AND {date_filter_sub}
-                   UNION ALL
-                   SELECT me.total_earnings AS total_sales
-                   FROM multi_sell_exploration_data_event me
-                   JOIN event ex ON ex.id = me.event_id
-                   WHERE ex.cmdr = e.cmdr AND {date_filter_sub}
-                 ) t
-               ) AS exploration_sales,
-
-               (
-                 SELECT SUM(LENGTH(mci.influence))
-                 FROM mission_completed_influence mci
-                 JOIN mission_completed_event mce ON mce.event_id = mci.mission_id
-                 JOIN event ex ON ex.id = mce.event_id
-                 WHERE ex.cmdr = e.cmdr AND mci.faction_name LIKE '%East India Company%' AND {date_filter_sub}
-               ) AS influence_eic,
-
-               (
-                 SELECT SUM(cc.bounty)
-                 FROM commit_crime_event cc
-                 JOIN event ex ON ex.id = cc.event_id
-                 WHERE ex.cmdr = e.cmdr AND {date_filter_sub}
-               ) AS bounty_fines
-
-            FROM event e
-            LEFT JOIN cmdr c ON c.name = e.cmdr
-            LEFT JOIN market_buy_event mb ON mb.event_id = e.id
-            LEFT JOIN market_sell_event ms ON ms.event_id = e.id
-            WHERE e.cmdr IS NOT NULL AND {date_filter}
-            GROUP BY e.cmdr
-            ORDER BY e.cmdr
-        """
-
-        result = db.session.execute(text(sql)).fetchall()
+        period = resolve_period(db.session, request.args)
+        if period is None:
+            return jsonify([])
+        # One pass over cmdr_daily_rollup instead of per-cmdr subqueries on the raw tables
+        sql, params = compile_view("leaderboard", period)
+        result = db.session.execute(text(sql), params).fetchall()
         data = [dict(row._mapping) for row in result]
         return jsonify(data)
-
+    except PeriodError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/api/summary/recruits", methods=["GET"])
 @require_api_key
+@etag_response()
+@cached_response
 def summary_recruits():
     try:
-        sql = """
-              SELECT e.cmdr                                                      AS commander, \
-                     CASE WHEN COUNT(e.id) > 0 THEN 'Yes' ELSE 'No' END          AS has_data, \
-                     MAX(e.timestamp)                                            AS last_active, \
-                     CAST(julianday('now') - julianday(MIN(e.timestamp)) AS INT) AS days_since_join, \
-                     (SELECT COALESCE(SUM(mb.count), 0) + COALESCE((SELECT SUM(ms.count)
-                                                                    FROM market_sell_event ms
-                                                                             JOIN event e2 ON e2.id = ms.event_id
-                                                                    WHERE e2.cmdr = e.cmdr), 0)
-                      FROM market_buy_event mb
-                               JOIN event e1 ON e1.id = mb.event_id
-                      WHERE e1.cmdr = e.cmdr)                                    AS tonnage, \
-                     (SELECT COUNT(*)
-                      FROM mission_completed_event mc
-                               JOIN event ev ON ev.id = mc.event_id
-                      WHERE ev.cmdr = e.cmdr)                                    AS mission_count, \
-                     (SELECT SUM(rv.amount)
-                      FROM redeem_voucher_event rv
-                               JOIN event ev ON ev.id = rv.event_id
-                      WHERE ev.cmdr = e.cmdr \
-                        AND rv.type = 'bounty')                                  AS bounty_claims, \
-                     (SELECT SUM(total)
-                      FROM (SELECT se.earnings AS total \
-                            FROM sell_exploration_data_event se \
-                                     JOIN event ev ON ev.id = se.event_id \
-                            WHERE ev.cmdr = e.cmdr \
-                            UNION ALL \
-                            SELECT me.total_earnings AS total \
-                            FROM multi_sell_exploration_data_event me \
-                                     JOIN event ev ON ev.id = me.event_id \
-                            WHERE ev.cmdr = e.cmdr))                             AS exp_value, \
-                     (SELECT SUM(rv.amount)
-                      FROM redeem_voucher_event rv
-                               JOIN event ev ON ev.id = rv.event_id
-                      WHERE ev.cmdr = e.cmdr \
-                        AND rv.type = 'CombatBond')                              AS combat_bonds, \
-                     (SELECT SUM(cc.bounty)
-                      FROM commit_crime_event cc
-                               JOIN event ev ON ev.id = cc.event_id
-                      WHERE ev.cmdr = e.cmdr)                                    AS bounty_fines
-              FROM event e
-                       JOIN cmdr c ON c.name = e.cmdr
-              WHERE e.cmdr IS NOT NULL \
-                AND c.squadron_rank = 'Recruit'
-              GROUP BY e.cmdr
-              ORDER BY days_since_join ASC \
-              """
-        result = db.session.execute(text(sql)).fetchall()
+        # Per-recruit lookups in cmdr_activity and cmdr_daily_rollup, independent of the number of events
+        sql, params = compile_view("recruits")
+        result = db.session.execute(text(sql), params).fetchall()
         data = [dict(row._mapping) for row in result]
         return jsonify(data)
     except Exception as e:
@@ -1107,6 +557,11 @@ def discovery():
                     "required": True,
                     "description": "The version of the API in x.y.z notation",
                     "current": API_VERSION
+                },
+                "Content-Encoding": {
+                    "required": False,
+                    "description": "Request bodies of /events, /activities and /objectives may be compressed",
+                    "supported": list(SUPPORTED_CONTENT_ENCODINGS)
                 }
             }
         }
@@ -1141,7 +596,7 @@ def root():
 @require_api_key
 def create_objective():
     try:
-        data = request.get_json()
+        data = load_json_body(request)
 
         # Validierung der Pflichtfelder
         if not data.get("title"):
@@ -1181,6 +636,7 @@ def create_objective():
             objective.targets.append(target)
 
         db.session.add(objective)
+        bump_data_generation(db.session)
         db.session.commit()
 
         return jsonify({
@@ -1188,6 +644,10 @@ def create_objective():
             "id": objective.id
         }), 201
 
+    except BodyTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+    except UnsupportedEncodingError as e:
+        return jsonify({"error": str(e)}), 415
     except ValueError as e:
         db.session.rollback()
         return jsonify({"error": f"Invalid date format: {str(e)}"}), 400
@@ -1197,8 +657,14 @@ def create_objective():
         return jsonify({"error": str(e)}), 400
 
 
+def active_only_requested(args):
+    # ?active=true compares against the current time, so its result changes without a write
+    return args.get("active", "false").lower() == "true"
+
+
 @app.route("/objectives", methods=["GET"])
 @require_api_key
+@etag_response(bypass=active_only_requested)
 def get_objectives():
     try:
         system_filter = request.args.get("system")
@@ -1260,6 +726,7 @@ def get_objectives():
 
 @app.route("/api/objectives", methods=["GET"])
 @require_api_key
+@etag_response(bypass=active_only_requested)
 def get_objectives_streamlit():
     """
     Streamlit-optimierte Version des Objectives-Endpunkts
@@ -1349,6 +816,7 @@ def delete_objective(objective_id):
 
         # Lösche das Objective selbst
         db.session.delete(objective)
+        bump_data_generation(db.session)
         db.session.commit()
 
         logger.info(f"Objective {objective_id} and related data deleted successfully")
@@ -1366,10 +834,12 @@ def delete_objective(objective_id):
 
 @app.route("/api/bounty-vouchers", methods=["GET"])
 @require_api_key
+@etag_response()
+@cached_response
 def get_bounty_vouchers():
     """
     Gibt alle Bounty Vouchers mit den Spalten Cmdr, Squadron Rank, System, timestamp, tick-id, amount, type, faction zurück.
-    Unterstützt Filter über Query-Parameter: cmdr, system, tickid, type, faction, squadron_rank, period.
+    Unterstützt Filter über Query-Parameter: cmdr, system, tickid, type, faction, squadron_rank, period, start/end, tick.
     """
     try:
         # Filter-Parameter auslesen
@@ -1379,37 +849,9 @@ def get_bounty_vouchers():
         voucher_type = request.args.get("type", "bounty")
         faction = request.args.get("faction")
         squadron_rank = request.args.get("squadron_rank")
-        period = request.args.get("period", "all")
-
-        # Zeitraum-Filter
-        from datetime import datetime, timedelta
-        from dateutil.relativedelta import relativedelta
-        today = datetime.utcnow()
-        start = end = None
-        if period == "cw":
-            start = today - timedelta(days=today.weekday())
-            end = start + timedelta(days=6)
-        elif period == "lw":
-            end = today - timedelta(days=today.weekday() + 1)
-            start = end - timedelta(days=6)
-        elif period == "cm":
-            start = today.replace(day=1)
-            end = (start + relativedelta(months=1)) - timedelta(days=1)
-        elif period == "lm":
-            this_month_start = today.replace(day=1)
-            start = this_month_start - relativedelta(months=1)
-            end = this_month_start - timedelta(days=1)
-        elif period == "2m":
-            this_month_start = today.replace(day=1)
-            start = this_month_start - relativedelta(months=2)
-            end = this_month_start - timedelta(days=1)
-        elif period == "y":
-            start = today.replace(month=1, day=1)
-            end = today.replace(month=12, day=31)
-        elif period == "cd":
-            start = end = today
-        elif period == "ld":
-            start = end = today - timedelta(days=1)
+        period = resolve_period(db.session, request.args)
+        if period is None:
+            return jsonify([])
 
         where_clauses = ["rv.type = :voucher_type"]
         params = {"voucher_type": voucher_type}
@@ -1421,18 +863,17 @@ def get_bounty_vouchers():
             where_clauses.append("e.starsystem = :system")
             params["system"] = system
         if tickid:
-            where_clauses.append("e.tickid = :tickid")
-            params["tickid"] = tickid
+            where_clauses.append("e.tickid = :voucher_tickid")
+            params["voucher_tickid"] = tickid
         if faction:
             where_clauses.append("rv.faction = :faction")
             params["faction"] = faction
         if squadron_rank:
             where_clauses.append("c.squadron_rank = :squadron_rank")
             params["squadron_rank"] = squadron_rank
-        if start and end:
-            where_clauses.append("e.timestamp BETWEEN :start AND :end")
-            params["start"] = start.strftime('%Y-%m-%dT00:00:00Z')
-            params["end"] = end.strftime('%Y-%m-%dT23:59:59Z')
+        if not period.all_time:
+            where_clauses.append(period.sql())
+            params.update(period.params())
 
         where_sql = " AND ".join(where_clauses)
 
@@ -1456,51 +897,27 @@ def get_bounty_vouchers():
         result = db.session.execute(text(sql), params).fetchall()
         data = [dict(row._mapping) for row in result]
         return jsonify(data)
+    except PeriodError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/api/syntheticcz-summary", methods=["GET"])
 @require_api_key
+@etag_response()
+@cached_response
 def syntheticcz_summary():
     """
     Gibt SyntheticCZ-Events gruppiert nach StarSystem, Faction, CZ-Type und Cmdr zurück, mit Zeitfilter.
+    ?watched=true beschränkt auf die WATCHED_FACTIONS.
     """
     try:
-        period = request.args.get("period", "all")
-        today = datetime.utcnow()
-        start = end = None
-
-        if period == "cw":
-            start = today - timedelta(days=today.weekday())
-            end = start + timedelta(days=6)
-        elif period == "lw":
-            end = today - timedelta(days=today.weekday() + 1)
-            start = end - timedelta(days=6)
-        elif period == "cm":
-            start = today.replace(day=1)
-            end = (start + relativedelta(months=1)) - timedelta(days=1)
-        elif period == "lm":
-            this_month_start = today.replace(day=1)
-            start = this_month_start - relativedelta(months=1)
-            end = this_month_start - timedelta(days=1)
-        elif period == "2m":
-            this_month_start = today.replace(day=1)
-            start = this_month_start - relativedelta(months=2)
-            end = this_month_start - timedelta(days=1)
-        elif period == "y":
-            start = today.replace(month=1, day=1)
-            end = today.replace(month=12, day=31)
-        elif period == "cd":
-            start = end = today
-        elif period == "ld":
-            start = end = today - timedelta(days=1)
-
-        if start and end:
-            date_filter = f"e.timestamp BETWEEN '{start.strftime('%Y-%m-%dT00:00:00Z')}' AND '{end.strftime('%Y-%m-%dT23:59:59Z')}'"
-        else:
-            date_filter = "1=1"
+        period = resolve_period(db.session, request.args)
+        if period is None:
+            return jsonify([])
 
+        watched = " AND scz.watched_faction IS NOT NULL" if request.args.get("watched") == "true" else ""
         sql = f"""
             SELECT
                 e.starsystem AS starsystem,
@@ -1510,59 +927,35 @@ def syntheticcz_summary():
                 COUNT(*) AS cz_count
             FROM synthetic_cz scz
             JOIN event e ON e.id = scz.event_id
-            WHERE {date_filter}
+            WHERE {period.sql()}{watched}
             GROUP BY e.starsystem, scz.faction, scz.cz_type, e.cmdr
             ORDER BY cz_count DESC
         """
 
-        result = db.session.execute(text(sql)).fetchall()
+        result = db.session.execute(text(sql), period.params()).fetchall()
         data = [dict(row._mapping) for row in result]
         return jsonify(data)
+    except PeriodError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/api/syntheticgroundcz-summary", methods=["GET"])
 @require_api_key
+@etag_response()
+@cached_response
 def syntheticgroundcz_summary():
     """
     Gibt SyntheticGroundCZ-Events gruppiert nach StarSystem, Faction, Settlement, CZ-Type und Cmdr zurück, mit Zeitfilter.
+    ?watched=true beschränkt auf die WATCHED_FACTIONS.
     """
     try:
-        period = request.args.get("period", "all")
-        today = datetime.utcnow()
-        start = end = None
-
-        if period == "cw":
-            start = today - timedelta(days=today.weekday())
-            end = start + timedelta(days=6)
-        elif period == "lw":
-            end = today - timedelta(days=today.weekday() + 1)
-            start = end - timedelta(days=6)
-        elif period == "cm":
-            start = today.replace(day=1)
-            end = (start + relativedelta(months=1)) - timedelta(days=1)
-        elif period == "lm":
-            this_month_start = today.replace(day=1)
-            start = this_month_start - relativedelta(months=1)
-            end = this_month_start - timedelta(days=1)
-        elif period == "2m":
-            this_month_start = today.replace(day=1)
-            start = this_month_start - relativedelta(months=2)
-            end = this_month_start - timedelta(days=1)
-        elif period == "y":
-            start = today.replace(month=1, day=1)
-            end = today.replace(month=12, day=31)
-        elif period == "cd":
-            start = end = today
-        elif period == "ld":
-            start = end = today - timedelta(days=1)
-
-        if start and end:
-            date_filter = f"e.timestamp BETWEEN '{start.strftime('%Y-%m-%dT00:00:00Z')}' AND '{end.strftime('%Y-%m-%dT23:59:59Z')}'"
-        else:
-            date_filter = "1=1"
+        period = resolve_period(db.session, request.args)
+        if period is None:
+            return jsonify([])
 
+        watched = " AND sgcz.watched_faction IS NOT NULL" if request.args.get("watched") == "true" else ""
         sql = f"""
             SELECT
                 e.starsystem AS starsystem,
@@ -1573,14 +966,16 @@ def syntheticgroundcz_summary():
                 COUNT(*) AS cz_count
             FROM synthetic_ground_cz sgcz
             JOIN event e ON e.id = sgcz.event_id
-            WHERE {date_filter}
+            WHERE {period.sql()}{watched}
             GROUP BY e.starsystem, sgcz.faction, sgcz.settlement, sgcz.cz_type, e.cmdr
             ORDER BY cz_count DESC
         """
 
-        result = db.session.execute(text(sql)).fetchall()
+        result = db.session.execute(text(sql), period.params()).fetchall()
         data = [dict(row._mapping) for row in result]
         return jsonify(data)
+    except PeriodError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -1588,9 +983,13 @@ def syntheticgroundcz_summary():
 if __name__ == "__main__":
     print("Starting BGS Data API...")
     with app.app_context():
-        db.create_all()
+        run_migrations(db.engine)
+        sync_watched_factions(db.engine)
         get_latest_tickid()
 
+    if INGEST_ASYNC:
+        start_ingest_workers(app, process_events)
+
     from eic_shoutout_scheduler import start_scheduler
     start_scheduler(app, db)
     from fdev_tick_monitor import start_tick_watch_scheduler, first_tick_check
@@ -0,0 +1,776 @@
+"""
+Local performance benchmarks against a throw-away SQLite file.
+
+Usage:
+    python benchmark.py ingest [--events 5000] [--batch 100]
+    python benchmark.py statements [--batch 100]
+    python benchmark.py dispatch [--events 100000]
+    python benchmark.py rawjson [--events 20000]
+    python benchmark.py memory [--sizes 100,1000,10000]
+    python benchmark.py concurrency [--seconds 10] [--writers 4] [--readers 8]
+    python benchmark.py leaderboard [--events 1000000]
+    python benchmark.py recruits [--events 1000000]
+    python benchmark.py conflicts [--events 200000] [--ticks 20]
+    python benchmark.py ticks [--events 200000]
+"""
+import argparse
+import io
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from flask import Flask
+from collections import Counter
+from sqlalchemy import create_engine, event as sa_event, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from models import db, Event
+from migrations import run_migrations
+from sqlite_tuning import sqlite_engine_options, install_sqlite_pragmas
+from event_ingest import ingest_events, build_child_rows, EVENT_HANDLERS
+import raw_payload
+from raw_payload import encode_raw_json, decode_raw_json
+from request_stream import iter_json_array, iter_chunks
+
+CMDRS = [f"Cmdr {i:02d}" for i in range(25)]
+SYSTEMS = ["Sol", "Shinrarta Dezhra", "Colonia", "Achenar", "Alioth", "Diaso"]
+FACTIONS = ["East India Company", "Federal Navy", "Alliance Rapid-reaction Corps", "Pilots Federation"]
+# Systems with a war, reported in the Conflicts array of every FSDJump there
+CONFLICTS = {"Diaso": ("East India Company", "Federal Navy"), "Alioth": ("Alliance Rapid-reaction Corps", "Pilots Federation")}
+
+
+def create_bench_app(db_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def generate_events(count, seed=42, minutes_per_event=1, offset=0):
+    """Builds a realistic mix of BGS-Tally events; offset continues the timeline of an earlier call."""
+    rnd = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    events = []
+    for i in range(offset, offset + count):
+        ts = start + timedelta(minutes=i * minutes_per_event)
+        base = {
+            "timestamp": ts.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "tickid": f"tick{ts:%Y%m%d}",
+            "ticktime": ts.strftime("%Y-%m-%dT00:00:00.000Z"),
+            "cmdr": rnd.choice(CMDRS),
+            "StarSystem": rnd.choice(SYSTEMS),
+            "SystemAddress": rnd.randint(1, 10_000_000),
+        }
+        kind = rnd.randrange(11)
+        if kind == 0:
+            base.update(event="MarketBuy", Stock=1000, StockBracket=2, TotalCost=rnd.randint(1000, 900000), Count=rnd.randint(1, 700))
+        elif kind == 1:
+            base.update(event="MarketSell", Demand=1000, DemandBracket=2, Profit=1000, TotalSale=rnd.randint(1000, 900000), Count=rnd.randint(1, 700))
+        elif kind == 2:
+            base.update(event="MissionCompleted", AwardingFaction=rnd.choice(FACTIONS), Name="Mission_Delivery", Reward=100000,
+                        FactionEffects=[{
+                            "Faction": rnd.choice(FACTIONS), "Reputation": "++", "ReputationTrend": "UpGood",
+                            "Effects": [{"Effect": "$MISSIONUTIL_Interaction_Summary_EP_up;", "Trend": "UpGood"}],
+                            "Influence": [{"SystemAddress": base["SystemAddress"], "Trend": "UpGood", "Influence": "+++"}]
+                        }])
+        elif kind == 3:
+            base.update(event="RedeemVoucher", Type=rnd.choice(["bounty", "CombatBond"]), Amount=rnd.randint(10000, 5000000), Faction=rnd.choice(FACTIONS))
+        elif kind == 4:
+            base.update(event="MultiSellExplorationData", TotalEarnings=rnd.randint(10000, 9000000))
+        elif kind == 5:
+            base.update(event="SyntheticCZ", medium=1, faction=rnd.choice(FACTIONS))
+        elif kind == 6:
+            base.update(event="FSDJump", Population=1000000, Factions=[{"Name": f, "Influence": 0.25} for f in FACTIONS])
+            if base["StarSystem"] in CONFLICTS:
+                day = (ts - start).days
+                faction1, faction2 = CONFLICTS[base["StarSystem"]]
+                base["Conflicts"] = [{
+                    "WarType": "war", "Status": "active",
+                    "Faction1": {"Name": faction1, "Stake": "Bagnall Station", "WonDays": day % 4},
+                    "Faction2": {"Name": faction2, "Stake": "", "WonDays": day // 2 % 4},
+                }]
+        elif kind == 7:
+            base.update(event="SyntheticGroundCZ", low=1, settlement="Bagnall Station", faction=rnd.choice(FACTIONS))
+        elif kind == 8:
+            base.update(event="CommitCrime", CrimeType="assault", Faction=rnd.choice(FACTIONS), Victim="Someone",
+                        Fine=rnd.choice([None, 400]), Bounty=rnd.choice([None, 2000, 15000]))
+        elif kind == 9:
+            base.update(event="SellExplorationData", Systems=[base["StarSystem"]], TotalEarnings=rnd.randint(1000, 500000))
+        else:
+            base.update(event="MissionFailed", Name="Mission_Massacre", AwardingFaction=rnd.choice(FACTIONS), Fine=50000)
+        events.append(base)
+    return events
+
+
+def legacy_ingest(session, events_data):
+    """The former per-event path: one INSERT plus flush per event, ORM objects for every child."""
+    for event_dict in events_data:
+        event = Event.from_dict(event_dict)
+        session.add(event)
+        session.flush()
+        for model, row in build_child_rows(event.id, event_dict):
+            session.add(model(**row))
+
+
+def run_ingest_benchmark(total, batch_size):
+    events = generate_events(total)
+    batches = [events[i:i + batch_size] for i in range(0, total, batch_size)]
+    results = {}
+    for label, ingest in (("per-event flush", legacy_ingest), ("bulk insert", ingest_events)):
+        with tempfile.TemporaryDirectory() as tmp:
+            app = create_bench_app(os.path.join(tmp, "bench.db"))
+            with app.app_context():
+                t0 = time.perf_counter()
+                for batch in batches:
+                    ingest(db.session, batch)
+                    db.session.commit()
+                elapsed = time.perf_counter() - t0
+                db.session.remove()
+                db.engine.dispose()
+        results[label] = total / elapsed
+        print(f"{label:<16} {total:>7} events in {elapsed:7.3f}s  -> {results[label]:>10,.0f} events/s")
+    print(f"speedup: {results['bulk insert'] / results['per-event flush']:.1f}x")
+
+
+# Compression threshold of run_statements_check, below the padded and above the plain payloads
+MIXED_SIZE_THRESHOLD = 1024
+
+
+def count_inserts(engine, events):
+    """Ingests one batch into engine and returns a Counter of INSERT statements per table."""
+    counts = Counter()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        match = re.match(r"\s*INSERT INTO (\w+)", statement, re.IGNORECASE)
+        if match:
+            counts[match.group(1)] += 1
+
+    sa_event.listen(engine, "before_cursor_execute", record)
+    try:
+        with Session(engine) as session:
+            ingest_events(session, events)
+            session.commit()
+    finally:
+        sa_event.remove(engine, "before_cursor_execute", record)
+    return counts
+
+
+def statement_cases(batch_size):
+    """Batches for run_statements_check, each mixing present and missing optional fields."""
+    gaps = generate_events(batch_size, seed=7, offset=batch_size)
+    for event_dict in gaps[::2]:
+        event_dict.pop("StarSystem")
+    # Alternate small and padded payloads, so with compression on half the rows set raw_json
+    # and the other half raw_json_compressed
+    mixed = generate_events(batch_size, seed=11, offset=2 * batch_size)
+    for event_dict in mixed[::2]:
+        event_dict["Padding"] = "x" * MIXED_SIZE_THRESHOLD
+    return {"generated": generate_events(batch_size), "missing StarSystem": gaps, "mixed raw_json size": mixed}
+
+
+def run_statements_check(batch_size):
+    """Checks that ingesting one batch costs at most one INSERT statement per table."""
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        run_migrations(engine)
+        # Compress the padded payloads of the mixed case; the other cases stay below the threshold
+        threshold = raw_payload.RAW_JSON_COMPRESS_THRESHOLD
+        raw_payload.RAW_JSON_COMPRESS_THRESHOLD = MIXED_SIZE_THRESHOLD
+        try:
+            results = [(label, events, count_inserts(engine, events))
+                       for label, events in statement_cases(batch_size).items()]
+        finally:
+            raw_payload.RAW_JSON_COMPRESS_THRESHOLD = threshold
+        for label, events, counts in results:
+            split = {table: n for table, n in counts.items() if n > 1}
+            failed |= bool(split)
+            detail = ", ".join(f"{table} {n}" for table, n in sorted(split.items())) or "one per table"
+            print(f"{label:<20} {len(events):>5} events: {sum(counts.values()):>3} INSERTs for {len(counts)} tables  "
+                  f"{'❌ ' if split else '✅ '}{detail}")
+        engine.dispose()
+    if failed:
+        raise SystemExit("❌ A batch was split into several INSERT statements for one table")
+
+
+def run_dispatch_benchmark(total):
+    events = generate_events(total)
+    handled = sum(1 for e in events if e["event"] in EVENT_HANDLERS)
+    t0 = time.perf_counter()
+    for event_id, event_dict in enumerate(events):
+        build_child_rows(event_id, event_dict)
+    elapsed = time.perf_counter() - t0
+    print(f"{total} events ({handled} with child table, {total - handled} skipped)")
+    print(f"per-event dispatch + row extraction: {elapsed / total * 1e9:,.0f} ns")
+
+    unknown = [{"event": "Docked"}] * total
+    t0 = time.perf_counter()
+    for event_id, event_dict in enumerate(unknown):
+        build_child_rows(event_id, event_dict)
+    elapsed = time.perf_counter() - t0
+    print(f"per-event cost of an unregistered type: {elapsed / total * 1e9:,.0f} ns")
+
+
+def run_rawjson_benchmark(total):
+    events = generate_events(total)
+    variants = {
+        "python repr": [(str(e), None) for e in events],
+        "json": [encode_raw_json(e, threshold=0) for e in events],
+        "json + zlib": [encode_raw_json(e, threshold=1) for e in events],
+    }
+    for label, stored in variants.items():
+        size = sum(len(raw or compressed) for raw, compressed in stored)
+        t0 = time.perf_counter()
+        for raw, compressed in stored:
+            decode_raw_json(raw, compressed)
+        elapsed = time.perf_counter() - t0
+        print(f"{label:<12} {size / 1024:>9,.0f} KiB  parse {elapsed / total * 1e6:7.2f} us/event")
+
+
+def run_memory_benchmark(sizes, chunk_size=100):
+    """Peak Python heap while parsing and inserting one /events body of each size."""
+
+    def whole_body(body):
+        ingest_events(db.session, json.loads(body))
+
+    def streamed(body):
+        for chunk in iter_chunks(iter_json_array(io.BytesIO(body)), chunk_size):
+            ingest_events(db.session, chunk)
+
+    print(f"{'events':>7} {'body':>10} {'get_json':>12} {'streaming':>12}")
+    for size in sizes:
+        # Distinct timestamps per size, so no run is swallowed by the duplicate check
+        body = json.dumps(generate_events(size, seed=size)).encode("utf-8")
+        peaks = []
+        for ingest in (whole_body, streamed):
+            with tempfile.TemporaryDirectory() as tmp:
+                app = create_bench_app(os.path.join(tmp, "bench.db"))
+                with app.app_context():
+                    tracemalloc.start()
+                    ingest(body)
+                    db.session.commit()
+                    peaks.append(tracemalloc.get_traced_memory()[1])
+                    tracemalloc.stop()
+                    db.session.remove()
+                    db.engine.dispose()
+        print(f"{size:>7} {len(body) / 1024:>8,.0f} KiB {peaks[0] / 1024:>8,.0f} KiB {peaks[1] / 1024:>8,.0f} KiB")
+
+
+# Read side of the concurrency benchmark: one summary-shaped aggregate
+CONCURRENCY_READ_SQL = """
+    SELECT e.cmdr, SUM(rv.amount) AS bounty_vouchers
+    FROM redeem_voucher_event rv
+    JOIN event e ON e.id = rv.event_id
+    WHERE e.cmdr IS NOT NULL AND rv.type = 'bounty' AND e.timestamp BETWEEN :start AND :end
+    GROUP BY e.cmdr
+"""
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_concurrency_benchmark(seconds, writers, readers, batch_size, preload):
+    """Mixed /events writes and summary reads against the default and the production SQLite profile."""
+    print(f"{writers} writers x {batch_size} events, {readers} readers, {seconds}s per profile, {preload} preloaded events")
+    print(f"{'profile':<11} {'role':<6} {'ops/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for profile in ("default", "production"):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", **sqlite_engine_options(profile))
+            install_sqlite_pragmas(engine, profile)
+            run_migrations(engine)
+            with Session(engine) as session:
+                for chunk in iter_chunks(generate_events(preload), 1000):
+                    ingest_events(session, chunk)
+                session.commit()
+
+            latencies = {"write": [], "read": []}
+            errors = {"write": 0, "read": 0}
+            stop = threading.Event()
+
+            def writer(worker):
+                sequence = 0
+                while not stop.is_set():
+                    batch = generate_events(batch_size, seed=worker * 1_000_003 + sequence)
+                    for event in batch:
+                        # Unique per batch, so the duplicate check never skips an insert
+                        event["BenchSequence"] = f"{worker}-{sequence}"
+                    sequence += 1
+                    t0 = time.perf_counter()
+                    with Session(engine) as session:
+                        try:
+                            ingest_events(session, batch)
+                            session.commit()
+                            latencies["write"].append(time.perf_counter() - t0)
+                        except OperationalError:
+                            session.rollback()
+                            errors["write"] += 1
+
+            def reader():
+                params = {"start": "2025-01-01T00:00:00Z", "end": "2025-01-07T23:59:59Z"}
+                while not stop.is_set():
+                    t0 = time.perf_counter()
+                    try:
+                        with engine.connect() as connection:
+                            connection.execute(text(CONCURRENCY_READ_SQL), params).fetchall()
+                        latencies["read"].append(time.perf_counter() - t0)
+                    except OperationalError:
+                        errors["read"] += 1
+
+            threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+            threads += [threading.Thread(target=reader) for _ in range(readers)]
+            for thread in threads:
+                thread.start()
+            time.sleep(seconds)
+            stop.set()
+            for thread in threads:
+                thread.join()
+            engine.dispose()
+
+        for role in ("write", "read"):
+            values = latencies[role]
+            print(f"{profile:<11} {role:<6} {len(values) / seconds:>9,.1f} {percentile(values, 0.5) * 1000:>9.1f} "
+                  f"{percentile(values, 0.99) * 1000:>9.1f} {errors[role]:>7}")
+
+
+# /api/summary/leaderboard before it moved to cmdr_daily_rollup, kept to check the results
+LEGACY_LEADERBOARD_SQL = """
+    SELECT e.cmdr,
+       c.squadron_rank AS rank,
+       SUM(CASE WHEN mb.event_id IS NOT NULL THEN mb.value ELSE 0 END) AS total_buy,
+       SUM(CASE WHEN ms.event_id IS NOT NULL THEN ms.value ELSE 0 END) AS total_sell,
+       CASE
+           WHEN SUM(CASE WHEN ms.event_id IS NOT NULL THEN ms.value ELSE 0 END) > 0
+           THEN SUM(CASE WHEN ms.event_id IS NOT NULL THEN ms.value ELSE 0 END)
+                - SUM(CASE WHEN mb.event_id IS NOT NULL THEN mb.value ELSE 0 END)
+           ELSE 0
+       END AS profit,
+       ROUND(
+         CASE
+           WHEN SUM(CASE WHEN ms.event_id IS NOT NULL THEN ms.value ELSE 0 END) > 0 AND
+                SUM(CASE WHEN mb.event_id IS NOT NULL THEN mb.value ELSE 0 END) > 0
+           THEN (SUM(CASE WHEN ms.event_id IS NOT NULL THEN ms.value ELSE 0 END)
+                 - SUM(CASE WHEN mb.event_id IS NOT NULL THEN mb.value ELSE 0 END)) * 100.0
+                / SUM(CASE WHEN mb.event_id IS NOT NULL THEN mb.value ELSE 0 END)
+           ELSE 0
+         END, 2
+       ) AS profitability,
+
+       SUM(CASE WHEN mb.event_id IS NOT NULL THEN mb.count ELSE 0 END) +
+       SUM(CASE WHEN ms.event_id IS NOT NULL THEN ms.count ELSE 0 END) AS total_quantity,
+
+       SUM(CASE WHEN mb.event_id IS NOT NULL THEN mb.value ELSE 0 END) +
+       SUM(CASE WHEN ms.event_id IS NOT NULL THEN ms.value ELSE 0 END) AS total_volume,
+
+       (
+         SELECT COUNT(*)
+         FROM mission_completed_event mc
+         JOIN event ex ON ex.id = mc.event_id
+         WHERE ex.cmdr = e.cmdr AND {date_filter_sub}
+       ) AS missions_completed,
+
+       (
+         SELECT COUNT(*)
+         FROM mission_failed_event mf
+         JOIN event ex ON ex.id = mf.event_id
+         WHERE ex.cmdr = e.cmdr AND {date_filter_sub}
+       ) AS missions_failed,
+
+       (
+         SELECT SUM(rv.amount)
+         FROM redeem_voucher_event rv
+         JOIN event ex ON ex.id = rv.event_id
+         WHERE ex.cmdr = e.cmdr AND rv.type = 'bounty' AND {date_filter_sub}
+       ) AS bounty_vouchers,
+
+       (
+         SELECT SUM(rv.amount)
+         FROM redeem_voucher_event rv
+         JOIN event ex ON ex.id = rv.event_id
+         WHERE ex.cmdr = e.cmdr AND rv.type = 'CombatBond' AND {date_filter_sub}
+       ) AS combat_bonds,
+
+       (
+         SELECT SUM(t.total_sales)
+         FROM (
+           SELECT se.earnings AS total_sales
+           FROM sell_exploration_data_event se
+           JOIN event ex ON ex.id = se.event_id
+           WHERE ex.cmdr = e.cmdr AND {date_filter_sub}
+           UNION ALL
+           SELECT me.total_earnings AS total_sales
+           FROM multi_sell_exploration_data_event me
+           JOIN event ex ON ex.id = me.event_id
+           WHERE ex.cmdr = e.cmdr AND {date_filter_sub}
+         ) t
+       ) AS exploration_sales,
+
+       (
+         SELECT SUM(LENGTH(mci.influence))
+         FROM mission_completed_influence mci
+         JOIN mission_completed_event mce ON mce.event_id = mci.mission_id
+         JOIN event ex ON ex.id = mce.event_id
+         WHERE ex.cmdr = e.cmdr AND mci.faction_name LIKE '%East India Company%' AND {date_filter_sub}
+       ) AS influence_eic,
+
+       (
+         SELECT SUM(cc.bounty)
+         FROM commit_crime_event cc
+         JOIN event ex ON ex.id = cc.event_id
+         WHERE ex.cmdr = e.cmdr AND {date_filter_sub}
+       ) AS bounty_fines
+
+    FROM event e
+    LEFT JOIN cmdr c ON c.name = e.cmdr
+    LEFT JOIN market_buy_event mb ON mb.event_id = e.id
+    LEFT JOIN market_sell_event ms ON ms.event_id = e.id
+    WHERE e.cmdr IS NOT NULL AND {date_filter}
+    GROUP BY e.cmdr
+    ORDER BY e.cmdr
+"""
+
+# /api/summary/recruits before it moved to cmdr_activity and cmdr_daily_rollup
+LEGACY_RECRUITS_SQL = """
+    SELECT e.cmdr                                                      AS commander,
+           CASE WHEN COUNT(e.id) > 0 THEN 'Yes' ELSE 'No' END          AS has_data,
+           MAX(e.timestamp)                                            AS last_active,
+           CAST(julianday('now') - julianday(MIN(e.timestamp)) AS INT) AS days_since_join,
+           (SELECT COALESCE(SUM(mb.count), 0) + COALESCE((SELECT SUM(ms.count)
+                                                          FROM market_sell_event ms
+                                                                   JOIN event e2 ON e2.id = ms.event_id
+                                                          WHERE e2.cmdr = e.cmdr), 0)
+            FROM market_buy_event mb
+                     JOIN event e1 ON e1.id = mb.event_id
+            WHERE e1.cmdr = e.cmdr)                                    AS tonnage,
+           (SELECT COUNT(*)
+            FROM mission_completed_event mc
+                     JOIN event ev ON ev.id = mc.event_id
+            WHERE ev.cmdr = e.cmdr)                                    AS mission_count,
+           (SELECT SUM(rv.amount)
+            FROM redeem_voucher_event rv
+                     JOIN event ev ON ev.id = rv.event_id
+            WHERE ev.cmdr = e.cmdr
+              AND rv.type = 'bounty')                                  AS bounty_claims,
+           (SELECT SUM(total)
+            FROM (SELECT se.earnings AS total
+                  FROM sell_exploration_data_event se
+                           JOIN event ev ON ev.id = se.event_id
+                  WHERE ev.cmdr = e.cmdr
+                  UNION ALL
+                  SELECT me.total_earnings AS total
+                  FROM multi_sell_exploration_data_event me
+                           JOIN event ev ON ev.id = me.event_id
+                  WHERE ev.cmdr = e.cmdr))                             AS exp_value,
+           (SELECT SUM(rv.amount)
+            FROM redeem_voucher_event rv
+                     JOIN event ev ON ev.id = rv.event_id
+            WHERE ev.cmdr = e.cmdr
+              AND rv.type = 'CombatBond')                              AS combat_bonds,
+           (SELECT SUM(cc.bounty)
+            FROM commit_crime_event cc
+                     JOIN event ev ON ev.id = cc.event_id
+            WHERE ev.cmdr = e.cmdr)                                    AS bounty_fines
+    FROM event e
+             JOIN cmdr c ON c.name = e.cmdr
+    WHERE e.cmdr IS NOT NULL
+      AND c.squadron_rank = 'Recruit'
+    GROUP BY e.cmdr
+    ORDER BY days_since_join ASC
+"""
+
+
+def preload_events(engine, total, chunk_size=5000):
+    """Ingests total generated events in chunks, one transaction per chunk."""
+    with Session(engine) as session:
+        for offset in range(0, total, chunk_size):
+            count = min(chunk_size, total - offset)
+            ingest_events(session, generate_events(count, seed=offset, offset=offset))
+            session.commit()
+
+
+def create_summary_bench_engine(db_path, total):
+    """Migrated database with total generated events and some ranked cmdrs."""
+    engine = create_engine(f"sqlite:///{db_path}")
+    run_migrations(engine)
+    t0 = time.perf_counter()
+    preload_events(engine, total)
+    with engine.begin() as connection:
+        # Some cmdrs with a squadron rank, the others only known from their events
+        for i, name in enumerate(CMDRS[::2]):
+            connection.execute(text("INSERT INTO cmdr (name, squadron_rank) VALUES (:name, :rank)"),
+                               {"name": name, "rank": ["Recruit", "Member", None][i % 3]})
+        connection.execute(text("ANALYZE"))
+    print(f"{total} events loaded in {time.perf_counter() - t0:.1f}s")
+    return engine
+
+
+def timed_query(engine, sql, params, repeat):
+    """Runs a query repeat times; returns (rows of the last run, best time in seconds)."""
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        with engine.connect() as connection:
+            rows = [dict(row._mapping) for row in connection.execute(text(sql), params)]
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return rows, best
+
+
+def run_leaderboard_benchmark(total, repeat):
+    """Checks that the rollup leaderboard returns the legacy results and compares their latency."""
+    from metrics import compile_view
+    from periods import Period
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_summary_bench_engine(os.path.join(tmp, "bench.db"), total)
+        # Windows inside the generated data: the month of the first event and the day in the middle
+        with engine.connect() as connection:
+            first, last = connection.execute(text("SELECT MIN(timestamp), MAX(timestamp) FROM event")).one()
+        first, last = (datetime.strptime(value[:10], "%Y-%m-%d") for value in (first, last))
+        middle = first + (last - first) / 2
+        month_end = (first.replace(day=1) + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        periods = {
+            "all": (None, None),
+            "month": (first.replace(day=1), month_end),
+            "day": (middle, middle),
+        }
+        print(f"{'period':<7} {'rows':>5} {'legacy ms':>11} {'rollup ms':>11} {'speedup':>8}  result")
+        mismatches = empty = 0
+        for label, (start, end) in periods.items():
+            if start:
+                date_filter = f"e.timestamp BETWEEN '{start:%Y-%m-%dT00:00:00Z}' AND '{end:%Y-%m-%dT23:59:59Z}'"
+            else:
+                date_filter = "1=1"
+            legacy_sql = LEGACY_LEADERBOARD_SQL.format(date_filter=date_filter,
+                                                       date_filter_sub=date_filter.replace("e.timestamp", "ex.timestamp"))
+            legacy_rows, legacy_time = timed_query(engine, legacy_sql, {}, repeat)
+            rollup_rows, rollup_time = timed_query(engine, *compile_view("leaderboard", Period(start, end)), repeat)
+            same = legacy_rows == rollup_rows
+            mismatches += not same
+            # An empty window would pass the comparison without comparing anything
+            empty += not rollup_rows
+            print(f"{label:<7} {len(rollup_rows):>5} {legacy_time * 1000:>11.1f} {rollup_time * 1000:>11.1f} "
+                  f"{legacy_time / rollup_time:>7.0f}x  {'identical' if same else 'DIFFERENT'}{'' if rollup_rows else ', EMPTY'}")
+        engine.dispose()
+    if empty:
+        raise SystemExit(f"❌ {empty} period(s) returned no rows, nothing was compared")
+    if mismatches:
+        raise SystemExit(f"❌ {mismatches} period(s) differ from the legacy leaderboard")
+    print("✅ Leaderboard identical to the legacy query for every period")
+
+
+def run_recruits_benchmark(total, repeat):
+    """Checks that the recruit overview returns the legacy results and compares their latency."""
+    from metrics import compile_view
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_summary_bench_engine(os.path.join(tmp, "bench.db"), total)
+        legacy_rows, legacy_time = timed_query(engine, LEGACY_RECRUITS_SQL, {}, repeat)
+        rollup_rows, rollup_time = timed_query(engine, *compile_view("recruits"), repeat)
+        engine.dispose()
+    print(f"{'rows':>5} {'legacy ms':>11} {'rollup ms':>11} {'speedup':>8}")
+    print(f"{len(rollup_rows):>5} {legacy_time * 1000:>11.1f} {rollup_time * 1000:>11.1f} {legacy_time / rollup_time:>7.0f}x")
+    # The legacy query leaves the order of recruits with the same days_since_join open
+    by_name = lambda rows: sorted(rows, key=lambda row: row["commander"])
+    ordered = [row["days_since_join"] for row in rollup_rows] == sorted(row["days_since_join"] for row in rollup_rows)
+    if by_name(legacy_rows) != by_name(rollup_rows) or not ordered:
+        raise SystemExit("❌ Recruit overview differs from the legacy query")
+    print("✅ Recruit overview identical to the legacy query")
+
+
+def legacy_eic_conflicts(connection, tickid):
+    """The former conflict extraction: every payload of the tick parsed on every request."""
+    systems = {}
+    rows = connection.execute(text("SELECT raw_json, raw_json_compressed FROM event WHERE tickid = :tick"), {"tick": tickid})
+    for row in rows:
+        data = decode_raw_json(row.raw_json, row.raw_json_compressed)
+        conflict = next((
+            c for c in data.get("Conflicts", [])
+            if "East India Company" in (c.get("Faction1", {}).get("Name", "") + c.get("Faction2", {}).get("Name", ""))
+        ), None)
+        system = data.get("StarSystem")
+        if not conflict or not system:
+            continue
+        if system not in systems or data["timestamp"] > systems[system]["last_seen"]:
+            f1, f2 = conflict.get("Faction1", {}), conflict.get("Faction2", {})
+            systems[system] = {
+                "last_seen": data["timestamp"], "event_type": data.get("event"), "ticktime": data.get("ticktime"),
+                "war_type": conflict.get("WarType"),
+                "faction1": (f1.get("Name"), f1.get("Stake"), f1.get("WonDays")),
+                "faction2": (f2.get("Name"), f2.get("Stake"), f2.get("WonDays")),
+                "cmdrs": set(),
+            }
+        if data.get("cmdr"):
+            systems[system]["cmdrs"].add(data["cmdr"])
+    return systems
+
+
+def run_conflicts_benchmark(total, ticks):
+    """Checks that conflict_state matches the payload scan for the latest ticks and compares their latency."""
+    from conflicts import tick_conflicts
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_summary_bench_engine(os.path.join(tmp, "bench.db"), total)
+        with engine.connect() as connection:
+            tickids = [row[0] for row in connection.execute(text(
+                "SELECT tickid FROM event GROUP BY tickid ORDER BY MAX(timestamp) DESC LIMIT :n"
+            ), {"n": ticks})]
+            legacy_time = table_time = 0.0
+            mismatches = 0
+            for tickid in tickids:
+                t0 = time.perf_counter()
+                legacy = legacy_eic_conflicts(connection, tickid)
+                t1 = time.perf_counter()
+                stored = tick_conflicts(connection, tickid)
+                t2 = time.perf_counter()
+                legacy_time += t1 - t0
+                table_time += t2 - t1
+                current = {c["system"]: {
+                    "last_seen": c["last_seen"], "event_type": c["event_type"], "ticktime": c["ticktime"],
+                    "war_type": c["war_type"],
+                    "faction1": (c["faction1"], c["faction1_stake"], c["faction1_won_days"]),
+                    "faction2": (c["faction2"], c["faction2_stake"], c["faction2_won_days"]),
+                    "cmdrs": set(c["cmdrs"]),
+                } for c in stored.values()}
+                # The payload scan restarts the cmdr set whenever a newer jump replaces the
+                # conflict, so it only has to be contained in the stored cmdrs
+                mismatches += (
+                    {k: dict(v, cmdrs=None) for k, v in legacy.items()} != {k: dict(v, cmdrs=None) for k, v in current.items()}
+                    or any(not v["cmdrs"] <= current[k]["cmdrs"] for k, v in legacy.items())
+                )
+        engine.dispose()
+    print(f"{len(tickids)} ticks: payload scan {legacy_time / len(tickids) * 1000:.1f} ms/tick, "
+          f"conflict_state {table_time / len(tickids) * 1000:.2f} ms/tick")
+    if mismatches:
+        raise SystemExit(f"❌ {mismatches} tick(s) differ from the payload scan")
+    print("✅ conflict_state matches the payload scan for every tick")
+
+
+def legacy_latest_ticks(connection):
+    """The former current/previous tick lookup on the event table."""
+    current = connection.execute(text(
+        "SELECT tickid FROM event INDEXED BY ix_event_timestamp_cmdr "
+        "WHERE tickid IS NOT NULL ORDER BY timestamp DESC LIMIT 1"
+    )).scalar()
+    previous = connection.execute(text("""
+        SELECT tickid FROM event INDEXED BY ix_event_timestamp_cmdr
+        WHERE tickid IS NOT NULL AND tickid != :current
+        AND timestamp < (SELECT MIN(timestamp) FROM event WHERE tickid = :current)
+        ORDER BY timestamp DESC LIMIT 1
+    """), {"current": current}).scalar()
+    return [current, previous]
+
+
+def run_ticks_benchmark(total, repeat):
+    """Checks that the tick registry and a rebuild of it agree with the event table and compares lookup latency."""
+    from ticks import latest_ticks, rebuild_ticks
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_summary_bench_engine(os.path.join(tmp, "bench.db"), total)
+        registry_sql = "SELECT * FROM tick ORDER BY tickid"
+        with engine.begin() as connection:
+            timings = {}
+            for name, lookup in (("event scan", legacy_latest_ticks), ("tick registry", latest_ticks)):
+                best = None
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    result = lookup(connection)
+                    elapsed = time.perf_counter() - t0
+                    best = elapsed if best is None else min(best, elapsed)
+                timings[name] = (result, best)
+            ingested = connection.execute(text(registry_sql)).fetchall()
+            expected = connection.execute(text("""
+                SELECT tickid, MIN(ticktime), MIN(timestamp), MAX(timestamp), COUNT(*) FROM event GROUP BY tickid ORDER BY tickid
+            """)).fetchall()
+            rebuild_ticks(connection)
+            rebuilt = connection.execute(text(registry_sql)).fetchall()
+        engine.dispose()
+    for name, (result, best) in timings.items():
+        print(f"{name:<14} {best * 1000:8.3f} ms  current/previous: {result}")
+    if timings["event scan"][0] != timings["tick registry"][0]:
+        raise SystemExit("❌ current/previous tick differ")
+    if [tuple(row[:5]) for row in ingested] != [tuple(row) for row in expected] or rebuilt != ingested:
+        raise SystemExit("❌ tick registry differs from the event table")
+    print(f"✅ {len(ingested)} ticks match the event table")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_ingest = sub.add_parser("ingest", help="POST /events ingestion throughput")
+    p_ingest.add_argument("--events", type=int, default=5000)
+    p_ingest.add_argument("--batch", type=int, default=100)
+
+    p_statements = sub.add_parser("statements", help="INSERT statements per table for one /events batch")
+    p_statements.add_argument("--batch", type=int, default=100)
+
+    p_dispatch = sub.add_parser("dispatch", help="per-event handler dispatch cost")
+    p_dispatch.add_argument("--events", type=int, default=100000)
+
+    p_rawjson = sub.add_parser("rawjson", help="raw_json storage size and parse cost")
+    p_rawjson.add_argument("--events", type=int, default=20000)
+
+    p_memory = sub.add_parser("memory", help="peak memory of whole-body vs. streamed /events parsing")
+    p_memory.add_argument("--sizes", default="100,1000,10000")
+
+    p_concurrency = sub.add_parser("concurrency", help="mixed read/write throughput per SQLite profile")
+    p_concurrency.add_argument("--seconds", type=float, default=10)
+    p_concurrency.add_argument("--writers", type=int, default=4)
+    p_concurrency.add_argument("--readers", type=int, default=8)
+    p_concurrency.add_argument("--batch", type=int, default=100)
+    p_concurrency.add_argument("--preload", type=int, default=20000)
+
+    p_leaderboard = sub.add_parser("leaderboard", help="legacy vs. rollup leaderboard: equivalence and latency")
+    p_leaderboard.add_argument("--events", type=int, default=1000000)
+    p_leaderboard.add_argument("--repeat", type=int, default=3)
+
+    p_recruits = sub.add_parser("recruits", help="legacy vs. rollup recruit overview: equivalence and latency")
+    p_recruits.add_argument("--events", type=int, default=1000000)
+    p_recruits.add_argument("--repeat", type=int, default=3)
+
+    p_conflicts = sub.add_parser("conflicts", help="payload scan vs. conflict_state: equivalence and latency")
+    p_conflicts.add_argument("--events", type=int, default=200000)
+    p_conflicts.add_argument("--ticks", type=int, default=20)
+
+    p_ticks = sub.add_parser("ticks", help="current/previous tick: event scan vs. tick registry")
+    p_ticks.add_argument("--events", type=int, default=200000)
+    p_ticks.add_argument("--repeat", type=int, default=5)
+
+    args = parser.parse_args()
+    if args.command == "ingest":
+        run_ingest_benchmark(args.events, args.batch)
+    elif args.command == "statements":
+        run_statements_check(args.batch)
+    elif args.command == "dispatch":
+        run_dispatch_benchmark(args.events)
+    elif args.command == "rawjson":
+        run_rawjson_benchmark(args.events)
+    elif args.command == "memory":
+        run_memory_benchmark([int(size) for size in args.sizes.split(",")])
+    elif args.command == "concurrency":
+        run_concurrency_benchmark(args.seconds, args.writers, args.readers, args.batch, args.preload)
+    elif args.command == "leaderboard":
+        run_leaderboard_benchmark(args.events, args.repeat)
+    elif args.command == "recruits":
+        run_recruits_benchmark(args.events, args.repeat)
+    elif args.command == "conflicts":
+        run_conflicts_benchmark(args.events, args.ticks)
+    elif args.command == "ticks":
+        run_ticks_benchmark(args.events, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Query plan check for the summary endpoints.
+
+Builds a throw-away database through the migrations, fills it with generated
+events, calls every summary endpoint for each period and tick filter and records the SQL they
+run. Every recorded statement is then passed through EXPLAIN QUERY PLAN.
+
+The check fails if
+  - a dated or tick statement scans any table instead of using an index,
+  - an all-time statement scans the event table, or
+  - SQLite has to build an automatic index because a real one is missing.
+All-time aggregates read every row of their child table by definition, so a
+scan of that child table is the expected plan there.
+
+Usage:
+    python check_query_plans.py [--events 5000] [--verbose]
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+from sqlalchemy import event as sa_event, text
+
+# Plan lines like "SCAN e" or "SCAN event"; index scans carry "USING ... INDEX"
+_FULL_SCAN = re.compile(r"^SCAN (\w+)(?! USING)(?:$| )")
+_TABLE_ALIAS = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+
+# Query strings every endpoint is called with; all but "period=all" are filtered
+FILTERS = ["period=all", "period=cw", "period=lm", "start=2025-03-01&end=2025-03-15", "tick=current", "tick_from=previous&tick_to=current"]
+SUMMARY_KEYS = [
+    "market-events", "missions-completed", "missions-failed", "bounty-vouchers", "combat-bonds",
+    "influence-by-faction", "influence-eic", "exploration-sales", "bounty-fines"
+]
+ENDPOINTS = (
+    [f"/api/summary/{key}" for key in SUMMARY_KEYS]
+    + [f"/api/summary/top5/{key}" for key in SUMMARY_KEYS]
+    + ["/api/summary/leaderboard", "/api/summary/recruits", "/api/bounty-vouchers",
+       "/api/syntheticcz-summary", "/api/syntheticgroundcz-summary", "/api/eic-in-conflict-current-tick",
+       "/api/syntheticcz-summary?watched=true", "/api/syntheticgroundcz-summary?watched=true",
+       "/api/conflicts/history?system=Diaso&ticks=30", "/api/conflicts/history?faction=Federal%20Navy",
+       f"/api/summary/batch?keys={','.join(SUMMARY_KEYS)}"]
+)
+
+
+def table_aliases(sql, tables):
+    """Maps the names used in a statement's plan to the real tables they refer to."""
+    aliases = {}
+    for table, alias in _TABLE_ALIAS.findall(sql):
+        if table in tables:
+            aliases[table] = table
+            if alias and alias.upper() not in ("ON", "WHERE", "JOIN", "LEFT", "INNER", "GROUP", "ORDER"):
+                aliases[alias] = table
+    return aliases
+
+
+def bad_plan_lines(connection, sql, params, tables, dated):
+    """
+    Returns (plan lines, offending lines) of a statement according to the rules above.
+    Scans of subqueries (e.g. a UNION ALL in FROM) are not table scans and are ignored.
+    """
+    aliases = table_aliases(sql, tables)
+    plan = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params)]
+    bad = []
+    for detail in plan:
+        if "AUTOMATIC" in detail:
+            bad.append(detail)
+            continue
+        match = _FULL_SCAN.match(detail)
+        if match and match.group(1) in aliases:
+            table = aliases[match.group(1)]
+            if dated or table == "event":
+                bad.append(f"{detail} ({table})")
+    return plan, bad
+
+
+def collect_statements(app, db, api_key, api_version):
+    """Calls all summary endpoints and returns the distinct (sql, params, filter) they executed."""
+    statements = {}
+    query = None  # set by the loop below, read by record() while a request runs
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            key = (statement, repr(parameters))
+            statements.setdefault(key, (statement, parameters, query))
+
+    headers = {"apiversion": api_version or "0.0.0"}
+    if api_key:
+        headers["apikey"] = api_key
+    with app.app_context():
+        sa_event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            client = app.test_client()
+            for endpoint in ENDPOINTS:
+                for query in FILTERS:
+                    separator = "&" if "?" in endpoint else "?"
+                    response = client.get(f"{endpoint}{separator}{query}", headers=headers)
+                    if response.status_code != 200:
+                        raise RuntimeError(f"{endpoint}?{query} returned {response.status_code}: {response.get_data(as_text=True)}")
+        finally:
+            sa_event.remove(db.engine, "before_cursor_execute", record)
+    return list(statements.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    import app as server
+    from benchmark import generate_events
+    from event_ingest import ingest_events
+    from migrations import run_migrations
+    from models import db
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server.app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tmp, 'plans.db')}"
+        # Rebind the extension so nothing touches the real database
+        server.app.extensions.pop("sqlalchemy", None)
+        db.init_app(server.app)
+        with server.app.app_context():
+            run_migrations(db.engine)
+            # Spread over about a year, so tickid and timestamp statistics look like production
+            ingest_events(db.session, generate_events(args.events, minutes_per_event=max(1, 525600 // args.events)))
+            db.session.commit()
+            with db.engine.begin() as connection:
+                connection.execute(text("ANALYZE"))
+
+        statements = collect_statements(server.app, db, server.API_KEY, server.API_VERSION)
+        failures = 0
+        tables = set(db.metadata.tables)
+        with server.app.app_context(), db.engine.connect() as connection:
+            for sql, params, query in statements:
+                plan, bad = bad_plan_lines(connection, sql, params, tables, dated=query != "period=all")
+                if bad or args.verbose:
+                    print("-" * 72)
+                    print(" ".join(sql.split())[:400])
+                if args.verbose:
+                    for line in plan:
+                        print(f"  {line}")
+                for line in bad:
+                    print(f"  ❌ {line}")
+                failures += bool(bad)
+            connection.close()
+            db.engine.dispose()
+
+    print(f"{len(statements)} statements checked, {failures} with bad plans")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
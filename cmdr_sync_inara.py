@@ -1,4 +1,5 @@
 from models import Cmdr, Event
+from response_cache import bump_data_generation
 from datetime import datetime
 import requests
 import time
@@ -107,6 +108,8 @@ def sync_cmdrs_with_inara(db=None):
                 setattr(existing, k, v)
 
         try:
+            # Squadron ranks appear in the leaderboard, recruits and voucher lists
+            bump_data_generation(db.session)
             db.session.commit()
         except Exception as e:
             logger.error(f"[Sync] Commit failed for Cmdr '{cmdr_name}': {e}")
@@ -0,0 +1,247 @@
+"""
+Conflict state per tick, extracted from the Conflicts array of FSDJump,
+Location and CarrierJump events.
+
+conflict_state holds one row per tick, system and pair of factions with the
+stakes and won days of the latest observation, conflict_cmdr the cmdrs who
+reported each conflict. ingest_events() updates both in the same transaction
+as the event insert, so the conflict endpoints read a handful of rows instead
+of re-parsing every payload of a tick. Kept for every tick, conflict_state
+is also the history of each war: GET /api/conflicts/history lists the won
+days of a conflict over the latest ticks. The rebuild recomputes both tables
+from the stored payloads.
+
+Usage:
+    python conflicts.py --rebuild [--db instance/bgs_data.db]
+"""
+import argparse
+import os
+import time
+from flask import request, jsonify
+from sqlalchemy import bindparam, create_engine, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models import ConflictState, ConflictCmdr
+from raw_payload import decode_raw_json
+from response_cache import bump_data_generation, cached_response, etag_response
+from ticks import latest_ticks
+from watched_factions import first_watched_id
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DB_PATH = "instance/bgs_data.db"
+
+# Journal events that carry a Conflicts array
+CONFLICT_EVENTS = ("FSDJump", "Location", "CarrierJump")
+KEY_COLUMNS = ("tickid", "system", "faction1", "faction2")
+# Largest ?ticks= accepted by /api/conflicts/history
+CONFLICT_HISTORY_MAX_TICKS = int(os.getenv("CONFLICT_HISTORY_MAX_TICKS", "90"))
+
+
+def conflict_rows(event_dict):
+    """conflict_state rows of one event, or [] if it reports no conflicts."""
+    conflicts = event_dict.get("Conflicts")
+    system = event_dict.get("StarSystem")
+    if not conflicts or not system or not event_dict.get("tickid"):
+        return []
+    rows = []
+    for conflict in conflicts:
+        f1 = conflict.get("Faction1") or {}
+        f2 = conflict.get("Faction2") or {}
+        rows.append({
+            "tickid": event_dict["tickid"],
+            "system": system,
+            "faction1": f1.get("Name") or "",
+            "faction2": f2.get("Name") or "",
+            "system_address": event_dict.get("SystemAddress"),
+            "war_type": conflict.get("WarType"),
+            "status": conflict.get("Status"),
+            "faction1_stake": f1.get("Stake"),
+            "faction1_won_days": f1.get("WonDays"),
+            "faction2_stake": f2.get("Stake"),
+            "faction2_won_days": f2.get("WonDays"),
+            "last_seen": event_dict["timestamp"],
+            "event_type": event_dict.get("event"),
+            "ticktime": event_dict.get("ticktime"),
+            "watched_faction": first_watched_id(f1.get("Name"), f2.get("Name")),
+        })
+    return rows
+
+
+def update_conflict_state(session, events):
+    """
+    Upserts the conflicts reported by the given event dicts. A stored conflict is only
+    replaced by a strictly newer observation; the cmdrs of all observations are kept.
+    Runs in the caller's transaction (session or connection).
+    """
+    latest, cmdrs = {}, set()
+    for event_dict in events:
+        for row in conflict_rows(event_dict):
+            key = tuple(row[c] for c in KEY_COLUMNS)
+            # Journal timestamps sort as text; on a tie the first observation wins
+            if key not in latest or row["last_seen"] > latest[key]["last_seen"]:
+                latest[key] = row
+            if event_dict.get("cmdr"):
+                cmdrs.add(key + (event_dict["cmdr"],))
+    if not latest:
+        return
+
+    # Core inserts against the tables, so a batch stays one statement even with NULL values
+    table = ConflictState.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(KEY_COLUMNS),
+        set_={c.name: stmt.excluded[c.name] for c in table.columns if c.name not in KEY_COLUMNS},
+        where=stmt.excluded.last_seen > table.c.last_seen,
+    )
+    session.execute(stmt, list(latest.values()))
+    if cmdrs:
+        session.execute(
+            sqlite_insert(ConflictCmdr.__table__).on_conflict_do_nothing(),
+            [dict(zip(KEY_COLUMNS + ("cmdr",), row)) for row in sorted(cmdrs)]
+        )
+
+
+def rebuild_conflict_state(connection, chunk_size=5000):
+    """Recomputes conflict_state and conflict_cmdr from the stored payloads, in id order."""
+    connection.execute(text("DELETE FROM conflict_state"))
+    connection.execute(text("DELETE FROM conflict_cmdr"))
+    events = ", ".join(f"'{name}'" for name in CONFLICT_EVENTS)
+    last_id = 0
+    while True:
+        rows = connection.execute(text(f"""
+            SELECT id, tickid, raw_json, raw_json_compressed FROM event
+            WHERE id > :last_id AND event IN ({events})
+            ORDER BY id LIMIT :limit
+        """), {"last_id": last_id, "limit": chunk_size}).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        batch = []
+        for row in rows:
+            try:
+                data = decode_raw_json(row.raw_json, row.raw_json_compressed)
+            except Exception:
+                continue
+            if data:
+                data.setdefault("tickid", row.tickid)
+                batch.append(data)
+        update_conflict_state(connection, batch)
+
+
+def tick_conflicts(session, tickid):
+    """
+    Conflicts of a tick with a watched faction on either side, with their cmdrs,
+    as {(system, faction1, faction2): row mapping plus "cmdrs" list}.
+    """
+    conflicts = {}
+    rows = session.execute(text("""
+        SELECT * FROM conflict_state WHERE tickid = :tickid AND watched_faction IS NOT NULL
+    """), {"tickid": tickid}).mappings()
+    for row in rows:
+        conflicts[(row["system"], row["faction1"], row["faction2"])] = dict(row, cmdrs=[])
+    if conflicts:
+        for row in session.execute(text("""
+            SELECT system, faction1, faction2, cmdr FROM conflict_cmdr
+            WHERE tickid = :tickid ORDER BY cmdr
+        """), {"tickid": tickid}):
+            conflict = conflicts.get((row.system, row.faction1, row.faction2))
+            if conflict is not None:
+                conflict["cmdrs"].append(row.cmdr)
+    return conflicts
+
+
+def _delta(current, previous):
+    return current - previous if current is not None and previous is not None else None
+
+
+def conflict_history(session, tickids, system=None, faction=None):
+    """
+    Won days of every conflict over the given ticks (oldest first), optionally limited to a
+    system and/or a faction taking part. Returns one entry per conflict with its "history",
+    each tick with the change in won days since the previous tick the conflict was seen.
+    """
+    where = ["tickid IN :tickids"]
+    params = {"tickids": list(tickids)}
+    if system:
+        where.append("system = :system")
+        params["system"] = system
+    if faction:
+        where.append("(faction1 = :faction OR faction2 = :faction)")
+        params["faction"] = faction
+    stmt = text(f"""
+        SELECT tickid, ticktime, system, system_address, faction1, faction2, war_type, status,
+               faction1_stake, faction1_won_days, faction2_stake, faction2_won_days, last_seen
+        FROM conflict_state WHERE {" AND ".join(where)}
+    """).bindparams(bindparam("tickids", expanding=True))
+
+    position = {tickid: i for i, tickid in enumerate(tickids)}
+    conflicts = {}
+    for row in sorted(session.execute(stmt, params), key=lambda r: position[r.tickid]):
+        conflict = conflicts.setdefault((row.system, row.faction1, row.faction2), {
+            "system": row.system, "system_address": row.system_address,
+            "faction1": row.faction1 or None, "faction2": row.faction2 or None,
+            "war_type": row.war_type, "history": [],
+        })
+        previous = conflict["history"][-1] if conflict["history"] else {}
+        conflict["history"].append({
+            "tickid": row.tickid,
+            "ticktime": row.ticktime,
+            "last_seen": row.last_seen,
+            "status": row.status,
+            "faction1_stake": row.faction1_stake,
+            "faction1_won_days": row.faction1_won_days,
+            "faction1_delta": _delta(row.faction1_won_days, previous.get("faction1_won_days")),
+            "faction2_stake": row.faction2_stake,
+            "faction2_won_days": row.faction2_won_days,
+            "faction2_delta": _delta(row.faction2_won_days, previous.get("faction2_won_days")),
+        })
+        # The latest observation describes the war
+        conflict["war_type"] = row.war_type
+    return sorted(conflicts.values(), key=lambda c: (c["system"], c["faction1"] or "", c["faction2"] or ""))
+
+
+def register_conflict_routes(app, db, require_api_key):
+
+    @app.route("/api/conflicts/history", methods=["GET"])
+    @require_api_key
+    @etag_response()
+    @cached_response
+    def get_conflict_history():
+        """
+        Won-days progression of the conflicts over the latest ?ticks= ticks (default 7),
+        optionally filtered by ?system= and ?faction= (exact names).
+        """
+        try:
+            ticks = int(request.args.get("ticks", 7))
+        except ValueError:
+            return jsonify({"error": "ticks must be an integer"}), 400
+        if not 1 <= ticks <= CONFLICT_HISTORY_MAX_TICKS:
+            return jsonify({"error": f"ticks must be between 1 and {CONFLICT_HISTORY_MAX_TICKS}"}), 400
+
+        try:
+            tickids = latest_ticks(db.session, ticks)[::-1]
+            if not tickids:
+                return jsonify([])
+            return jsonify(conflict_history(
+                db.session, tickids, request.args.get("system"), request.args.get("faction")
+            ))
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--rebuild", action="store_true", required=True)
+    args = parser.parse_args()
+
+    from migrations import run_migrations
+    engine = create_engine(f"sqlite:///{args.db}")
+    run_migrations(engine)
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        rebuild_conflict_state(connection)
+        bump_data_generation(connection)
+        count = connection.execute(text("SELECT COUNT(*) FROM conflict_state")).scalar()
+    print(f"✅ Conflict state rebuilt ({count} conflicts) in {time.perf_counter() - started:.1f}s")
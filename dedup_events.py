@@ -0,0 +1,115 @@
+"""
+One-off deduplication of events stored before content hashing existed.
+
+Walks all events without content_hash in id order, computes the hash from the
+stored payload and keeps the oldest copy (lowest id) of every event, also when a
+newer copy was already stored with its hash. All other copies are deleted
+together with their child rows. The script can be interrupted and
+re-run at any time.
+
+Usage:
+    python dedup_events.py [--db instance/bgs_data.db] [--chunk 5000] [--dry-run]
+"""
+import argparse
+import os
+import sqlite3
+import time
+from sqlalchemy import create_engine
+from models import db
+from migrations import run_migrations
+from raw_payload import content_hash, decode_raw_json
+from response_cache import bump_data_generation
+from rollups import rebuild_rollups
+from conflicts import rebuild_conflict_state
+from ticks import rebuild_ticks
+from systems import rebuild_system_state
+
+DB_PATH = "instance/bgs_data.db"
+
+
+def child_tables():
+    """(table, foreign key column) of everything hanging off an event row."""
+    tables = [(t.name, "event_id") for t in db.metadata.sorted_tables if "event_id" in t.c]
+    # mission_completed_influence.mission_id holds the event id as well
+    tables.append(("mission_completed_influence", "mission_id"))
+    return tables
+
+
+def dedup(db_path, chunk_size, dry_run):
+    if not os.path.exists(db_path):
+        print(f"❌ Database not found: {db_path}")
+        return
+
+    run_migrations(create_engine(f"sqlite:///{db_path}"))
+    conn = sqlite3.connect(db_path)
+    tables = child_tables()
+
+    hashed = duplicates = 0
+    last_id = 0
+    seen = set()  # digests kept in a --dry-run, where no hash gets written
+    started = time.perf_counter()
+    while True:
+        rows = conn.execute(
+            "SELECT id, raw_json, raw_json_compressed FROM event WHERE id > ? AND content_hash IS NULL ORDER BY id LIMIT ?",
+            (last_id, chunk_size)
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        duplicate_ids = []
+        hashes = {}  # digest -> id of the copy kept, hashed once the duplicates are gone
+        for row_id, raw_json, raw_json_compressed in rows:
+            try:
+                data = decode_raw_json(raw_json, raw_json_compressed)
+            except Exception:
+                continue
+            if not data:
+                continue
+            digest = content_hash(data)
+            hashed += 1
+            if digest in hashes or digest in seen:
+                duplicate_ids.append((row_id,))
+                continue
+            existing = conn.execute("SELECT id FROM event WHERE content_hash = ?", (digest,)).fetchone()
+            if existing and existing[0] < row_id:
+                duplicate_ids.append((row_id,))
+                continue
+            if existing:
+                # A copy stored after content hashing existed is newer; keep this one instead
+                duplicate_ids.append(existing)
+            if dry_run:
+                seen.add(digest)
+            else:
+                hashes[digest] = row_id
+
+        if duplicate_ids and not dry_run:
+            for table, column in tables:
+                conn.executemany(f"DELETE FROM {table} WHERE {column} = ?", duplicate_ids)
+            conn.executemany("DELETE FROM event WHERE id = ?", duplicate_ids)
+        conn.executemany("UPDATE event SET content_hash = ? WHERE id = ?",
+                         [(digest, row_id) for digest, row_id in hashes.items()])
+        conn.commit()
+        duplicates += len(duplicate_ids)
+        print(f"  … {hashed} events checked, {duplicates} duplicates")
+
+    conn.close()
+    if duplicates and not dry_run:
+        # Removed events were counted in the rollups and the derived state tables
+        with create_engine(f"sqlite:///{db_path}").begin() as connection:
+            rebuild_rollups(connection)
+            rebuild_ticks(connection)
+            rebuild_conflict_state(connection)
+            rebuild_system_state(connection)
+            bump_data_generation(connection)
+    action = "found" if dry_run else "removed"
+    print(f"✅ {hashed} events hashed, {duplicates} duplicates {action} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--chunk", type=int, default=5000)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    dedup(args.db, args.chunk, args.dry_run)
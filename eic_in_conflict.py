@@ -1,8 +1,9 @@
 from flask import request, jsonify
-from sqlalchemy import text
-import json, ast, requests
+import requests
 from datetime import datetime
 from fdev_tick_monitor import last_tick
+from conflicts import tick_conflicts
+from periods import resolve_tickid
 import os
 from dotenv import load_dotenv
 
@@ -17,85 +18,43 @@ DISCORD_CONFLICT_WEBHOOK = os.getenv("DISCORD_BGS_WEBHOOK_PROD")
 def register_eic_conflict_routes(app, db, require_api_key):
 
     def extract_eic_conflicts(tickid, db):
-        results = db.session.execute(text(
-            "SELECT raw_json FROM event WHERE tickid = :tick"
-        ), {"tick": tickid}).fetchall()
-
+        """Conflicts of the watched factions in a tick, from conflict_state (filled at ingest)."""
         systems = {}
-
-        for row in results:
-            try:
-                data = json.loads(row.raw_json)
-            except Exception:
-                try:
-                    data = ast.literal_eval(row.raw_json)
-                except Exception:
-                    continue
-
-            conflicts = data.get("Conflicts", [])
-            if not conflicts:
-                continue
-
-            eic_conflict = next((
-                c for c in conflicts
-                if "East India Company" in (c.get("Faction1", {}).get("Name", "") + c.get("Faction2", {}).get("Name", ""))
-            ), None)
-            if not eic_conflict:
-                continue
-
-            system = data.get("StarSystem")
-            if not system:
-                continue
-
-            ts = data.get("timestamp")
-            dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-            cmdr = data.get("cmdr")
-            etype = data.get("event")
-            ticktime = data.get("ticktime")
-
-            if system not in systems or dt > systems[system]["last_jump"]:
-                f1 = eic_conflict.get("Faction1", {})
-                f2 = eic_conflict.get("Faction2", {})
-                systems[system] = {
-                    "system": system,
-                    "last_jump": dt,
-                    "event_type": etype,
-                    "tickid": tickid,
-                    "ticktime": ticktime,
-                    "galaxy_tick": last_tick,
-                    "war_type": eic_conflict.get("WarType"),
-                    "faction1": {
-                        "name": f1.get("Name"),
-                        "stake": f1.get("Stake"),
-                        "won_days": f1.get("WonDays")
-                    },
-                    "faction2": {
-                        "name": f2.get("Name"),
-                        "stake": f2.get("Stake"),
-                        "won_days": f2.get("WonDays")
-                    },
-                    "cmdrs": set()
-                }
-
-            if cmdr:
-                systems[system]["cmdrs"].add(cmdr)
-
+        for key, c in tick_conflicts(db.session, tickid).items():
+            dt = datetime.fromisoformat(c["last_seen"].replace("Z", "+00:00"))
+            # Keyed by conflict, several watched factions may fight in one system
+            systems[key] = {
+                "system": c["system"],
+                "last_jump": dt,
+                "event_type": c["event_type"],
+                "tickid": tickid,
+                "ticktime": c["ticktime"],
+                "galaxy_tick": last_tick,
+                "war_type": c["war_type"],
+                "faction1": {
+                    "name": c["faction1"] or None,
+                    "stake": c["faction1_stake"],
+                    "won_days": c["faction1_won_days"]
+                },
+                "faction2": {
+                    "name": c["faction2"] or None,
+                    "stake": c["faction2_stake"],
+                    "won_days": c["faction2_won_days"]
+                },
+                "cmdrs": set(c["cmdrs"])
+            }
         return systems
 
 
     @app.route("/api/eic-in-conflict-current-tick", methods=["GET"])
     @require_api_key
     def get_eic_conflicts():
-        tickids = db.session.execute(text(
-            "SELECT DISTINCT tickid FROM event ORDER BY timestamp DESC LIMIT 2"
-        )).fetchall()
+        tick_current = resolve_tickid(db.session, "current")
+        tick_previous = resolve_tickid(db.session, "previous")
 
-        if not tickids or len(tickids) < 2:
+        if not tick_current or not tick_previous:
             return jsonify({"error": "Not enough tick data found"}), 404
 
-        tick_current = tickids[0][0]
-        tick_previous = tickids[1][0]
-
         data = {
             "current_tick": [],
             "previous_tick": []
@@ -116,16 +75,12 @@ def register_eic_conflict_routes(app, db, require_api_key):
     @app.route("/api/discord/eic-in-conflict-current-tick", methods=["POST"])
     @require_api_key
     def send_eic_conflicts_to_discord():
-        tickids = db.session.execute(text(
-            "SELECT DISTINCT tickid FROM event ORDER BY timestamp DESC LIMIT 2"
-        )).fetchall()
+        tick_current = resolve_tickid(db.session, "current")
+        tick_previous = resolve_tickid(db.session, "previous")
 
-        if not tickids or len(tickids) < 2:
+        if not tick_current or not tick_previous:
             return jsonify({"error": "Not enough tick data found"}), 404
 
-        tick_current = tickids[0][0]
-        tick_previous = tickids[1][0]
-
         # Extract EIC conflicts for current and previous ticks
         #sections = [
         #    ("Current Tick", extract_eic_conflicts(tick_current, db)),
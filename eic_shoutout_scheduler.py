@@ -4,7 +4,9 @@ from apscheduler.triggers.cron import CronTrigger
 import atexit
 import requests
 from sqlalchemy import text
-from datetime import datetime, timedelta
+from types import SimpleNamespace
+from metrics import summary_batch
+from periods import Period
 import logging
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
@@ -46,60 +48,25 @@ def format_discord_summary(app=None, db=None):
 
     with app.app_context():
         logging.info("Running Discord summary.")
-        today = datetime.utcnow().date()
-        start = datetime.combine(today - timedelta(days=1), datetime.min.time())
-        end = datetime.combine(today - timedelta(days=1), datetime.max.time())
-        start_str = start.isoformat()
-        end_str = end.isoformat()
+        yesterday = Period.named("ld")
 
         base_queries = {
             "Market Events": {
-                "sql": '''
-                       SELECT e.cmdr,
-                              SUM(COALESCE(mb.value, 0))                              AS total_buy,
-                              SUM(COALESCE(ms.value, 0))                              AS total_sell,
-                              SUM(COALESCE(mb.value, 0)) + SUM(COALESCE(ms.value, 0)) AS total_volume,
-                              SUM(COALESCE(mb.count, 0)) + SUM(COALESCE(ms.count, 0)) AS quantity
-                       FROM event e
-                                LEFT JOIN market_buy_event mb ON mb.event_id = e.id
-                                LEFT JOIN market_sell_event ms ON ms.event_id = e.id
-                       WHERE e.cmdr IS NOT NULL
-                           AND e.timestamp BETWEEN :start AND :end
-                       GROUP BY e.cmdr
-                       HAVING total_volume > 0
-                       ORDER BY quantity DESC LIMIT 5
-                       ''',
+                "key": "market-events",
                 "format": lambda rows: "\n".join(
-                    f"{i + 1}. {((r.cmdr[:17] + '...') if r.cmdr and len(r.cmdr) > 20 else (r.cmdr or '')):<20} | Vol: {r.total_volume or 0:>15,} Cr. - {r.quantity or 0:>9,} t"
+                    f"{i + 1}. {((r.cmdr[:17] + '...') if r.cmdr and len(r.cmdr) > 20 else (r.cmdr or '')):<20} | Vol: {r.total_transaction_volume or 0:>15,} Cr. - {r.total_trade_quantity or 0:>9,} t"
                     for i, r in enumerate(rows)
                 )
             },
             "Missions Completed": {
-                "sql": '''
-                       SELECT e.cmdr, COUNT(*) AS missions_completed
-                       FROM mission_completed_event mc
-                                JOIN event e ON e.id = mc.event_id
-                       WHERE e.cmdr IS NOT NULL
-                           AND e.timestamp BETWEEN :start AND :end
-                       GROUP BY e.cmdr
-                       ORDER BY missions_completed DESC LIMIT 5
-                       ''',
+                "key": "missions-completed",
                 "format": lambda rows: "\n".join(
                     f"{i + 1}. {((r.cmdr[:17] + '...') if r.cmdr and len(r.cmdr) > 20 else (r.cmdr or '')):<20} | {r.missions_completed:>4}"
                     for i, r in enumerate(rows)
                 )
             },
             "Influence by Faction": {
-                "sql": '''
-                       SELECT e.cmdr, mci.faction_name, SUM(LENGTH(mci.influence)) AS influence
-                       FROM mission_completed_influence mci
-                                JOIN mission_completed_event mce ON mce.event_id = mci.mission_id
-                                JOIN event e ON e.id = mce.event_id
-                       WHERE e.cmdr IS NOT NULL
-                           AND e.timestamp BETWEEN :start AND :end
-                       GROUP BY e.cmdr, mci.faction_name
-                       ORDER BY influence DESC, e.cmdr LIMIT 5
-                       ''',
+                "key": "influence-by-faction",
                 "format": lambda rows: "\n".join(
                     f"{i + 1}. "
                     f"{((r.cmdr[:17] + '...') if r.cmdr and len(r.cmdr) > 20 else (r.cmdr or '')):<20} | "
@@ -109,86 +76,35 @@ def format_discord_summary(app=None, db=None):
                 )
             },
             "Influence EIC": {
-                "sql": '''
-                       SELECT e.cmdr, mci.faction_name, SUM(LENGTH(mci.influence)) AS influence
-                       FROM mission_completed_influence mci
-                                JOIN mission_completed_event mce ON mce.event_id = mci.mission_id
-                                JOIN event e ON e.id = mce.event_id
-                       WHERE e.cmdr IS NOT NULL
-                           AND e.timestamp BETWEEN :start AND :end
-                           AND mci.faction_name LIKE '%East India Company%'
-                       GROUP BY e.cmdr, mci.faction_name
-                       ORDER BY influence DESC, e.cmdr LIMIT 5
-                       ''',
+                "key": "influence-eic",
                 "format": lambda rows: "\n".join(
                     f"{i + 1}. {((r.cmdr[:17] + '...') if r.cmdr and len(r.cmdr) > 20 else (r.cmdr or '')):<20} | +{r.influence}"
                     for i, r in enumerate(rows)
                 )
             },
             "Bounty Vouchers": {
-                "sql": '''
-                       SELECT e.cmdr, SUM(rv.amount) AS bounty_vouchers
-                       FROM redeem_voucher_event rv
-                                JOIN event e ON e.id = rv.event_id
-                       WHERE e.cmdr IS NOT NULL
-                           AND e.timestamp BETWEEN :start AND :end
-                           AND rv.type = 'bounty'
-                       GROUP BY e.cmdr
-                       ORDER BY bounty_vouchers DESC LIMIT 5
-                       ''',
+                "key": "bounty-vouchers",
                 "format": lambda rows: "\n".join(
                     f"{i + 1}. {((r.cmdr[:17] + '...') if r.cmdr and len(r.cmdr) > 20 else (r.cmdr or '')):<20} | {r.bounty_vouchers or 0:>15,} Cr."
                     for i, r in enumerate(rows)
                 )
             },
             "Combat Bonds": {
-                "sql": '''
-                       SELECT e.cmdr, SUM(rv.amount) AS combat_bonds
-                       FROM redeem_voucher_event rv
-                                JOIN event e ON e.id = rv.event_id
-                       WHERE e.cmdr IS NOT NULL
-                           AND e.timestamp BETWEEN :start AND :end
-                           AND rv.type = 'CombatBond'
-                       GROUP BY e.cmdr
-                       ORDER BY combat_bonds DESC LIMIT 5
-                       ''',
+                "key": "combat-bonds",
                 "format": lambda rows: "\n".join(
                     f"{i + 1}. {((r.cmdr[:17] + '...') if r.cmdr and len(r.cmdr) > 20 else (r.cmdr or '')):<20} | {r.combat_bonds or 0:>15,} Cr."
                     for i, r in enumerate(rows)
                 )
             },
             "Exploration Sales": {
-                "sql": '''
-                       SELECT cmdr, SUM(total_sales) AS total_exploration_sales
-                       FROM (SELECT e.cmdr, se.earnings AS total_sales
-                             FROM sell_exploration_data_event se
-                                      JOIN event e ON e.id = se.event_id
-                             WHERE e.cmdr IS NOT NULL
-                               AND e.timestamp BETWEEN :start AND :end
-                             UNION ALL
-                             SELECT e.cmdr, ms.total_earnings AS total_sales
-                             FROM multi_sell_exploration_data_event ms
-                                      JOIN event e ON e.id = ms.event_id
-                             WHERE e.cmdr IS NOT NULL
-                               AND e.timestamp BETWEEN :start AND :end)
-                       GROUP BY cmdr
-                       ORDER BY total_exploration_sales DESC LIMIT 5
-                       ''',
+                "key": "exploration-sales",
                 "format": lambda rows: "\n".join(
                     f"{i + 1}. {((r.cmdr[:17] + '...') if r.cmdr and len(r.cmdr) > 20 else (r.cmdr or '')):<20} | {r.total_exploration_sales or 0:>15,} Cr."
                     for i, r in enumerate(rows)
                 )
             },
             "Bounty Fines": {
-                "sql": '''
-                       SELECT e.cmdr, SUM(cc.bounty) AS bounty_fines
-                       FROM commit_crime_event cc
-                                JOIN event e ON e.id = cc.event_id
-                       WHERE e.cmdr IS NOT NULL
-                           AND e.timestamp BETWEEN :start AND :end
-                       GROUP BY e.cmdr
-                       ORDER BY bounty_fines DESC LIMIT 5
-                       ''',
+                "key": "bounty-fines",
                 "format": lambda rows: "\n".join(
                     f"{i + 1}. {((r.cmdr[:17] + '...') if r.cmdr and len(r.cmdr) > 20 else (r.cmdr or '')):<20} | {r.bounty_fines or 0:>15,} Cr."
                     for i, r in enumerate(rows)
@@ -196,9 +112,11 @@ def format_discord_summary(app=None, db=None):
             }
         }
 
+        # All sections in one fused statement
+        batch = summary_batch(db.session, [q["key"] for q in base_queries.values()], yesterday, limit=5)
         sections = []
         for title, q in base_queries.items():
-            rows = db.session.execute(text(q["sql"]), {"start": start_str, "end": end_str}).fetchall()
+            rows = [SimpleNamespace(**row) for row in batch[q["key"]]]
             if not rows:
                 continue
             section = f"**📊 {title}**\n```text\n{q['format'](rows)}\n```"
@@ -208,7 +126,7 @@ def format_discord_summary(app=None, db=None):
             logging.info("No data found for Discord summary.")
             return
 
-        full_message = f"📅 Daily Summary for {start.date()} (UTC)\n\n" + "\n\n".join(sections)
+        full_message = f"📅 Daily Summary for {yesterday.start.date()} (UTC)\n\n" + "\n\n".join(sections)
         response = requests.post(DISCORD_SHOUTOUT_WEBHOOK, json={"content": full_message})
         if response.status_code == 204:
             logging.info("Discord summary sent successfully.")
@@ -225,44 +143,8 @@ def send_syntheticcz_summary_to_discord(app, db, period="all"):
     from sqlalchemy import text
     import requests
 
-    # Calculate period filter
-    from datetime import datetime, timedelta
-    from dateutil.relativedelta import relativedelta
-
-    today = datetime.utcnow()
-    start = end = None
-
-    if period == "cw":
-        start = today - timedelta(days=today.weekday())
-        end = start + timedelta(days=6)
-    elif period == "lw":
-        end = today - timedelta(days=today.weekday() + 1)
-        start = end - timedelta(days=6)
-    elif period == "cm":
-        start = today.replace(day=1)
-        end = (start + relativedelta(months=1)) - timedelta(days=1)
-    elif period == "lm":
-        this_month_start = today.replace(day=1)
-        start = this_month_start - relativedelta(months=1)
-        end = this_month_start - timedelta(days=1)
-    elif period == "2m":
-        this_month_start = today.replace(day=1)
-        start = this_month_start - relativedelta(months=2)
-        end = this_month_start - timedelta(days=1)
-    elif period == "y":
-        start = today.replace(month=1, day=1)
-        end = today.replace(month=12, day=31)
-    elif period == "cd":
-        start = end = today
-    elif period == "ld":
-        start = end = today - timedelta(days=1)
-
-    if start and end:
-        date_filter = f"e.timestamp BETWEEN '{start.strftime('%Y-%m-%dT00:00:00Z')}' AND '{end.strftime('%Y-%m-%dT23:59:59Z')}'"
-        period_label = f"{start.strftime('%Y-%m-%d')} to {end.strftime('%Y-%m-%d')}"
-    else:
-        date_filter = "1=1"
-        period_label = "All Time"
+    period = Period.named(period)
+    period_label = period.label
 
     with app.app_context():
         # Query data
@@ -274,11 +156,11 @@ def send_syntheticcz_summary_to_discord(app, db, period="all"):
                 COUNT(*) AS cz_count
             FROM synthetic_cz scz
             JOIN event e ON e.id = scz.event_id
-            WHERE {date_filter}
+            WHERE {period.sql()}
             GROUP BY e.starsystem, scz.cz_type, e.cmdr
             ORDER BY e.starsystem, scz.cz_type, cz_count DESC
         """
-        rows = db.session.execute(text(sql)).fetchall()
+        rows = db.session.execute(text(sql), period.params()).fetchall()
         # Structure: {system: {cz_type: total, cmdrs: {cmdr: {cz_type: count}}}}
         summary = {}
         for row in rows:
@@ -341,44 +223,8 @@ def send_syntheticgroundcz_summary_to_discord(app, db, period="all"):
     from sqlalchemy import text
     import requests
 
-    # Calculate period filter
-    from datetime import datetime, timedelta
-    from dateutil.relativedelta import relativedelta
-
-    today = datetime.utcnow()
-    start = end = None
-
-    if period == "cw":
-        start = today - timedelta(days=today.weekday())
-        end = start + timedelta(days=6)
-    elif period == "lw":
-        end = today - timedelta(days=today.weekday() + 1)
-        start = end - timedelta(days=6)
-    elif period == "cm":
-        start = today.replace(day=1)
-        end = (start + relativedelta(months=1)) - timedelta(days=1)
-    elif period == "lm":
-        this_month_start = today.replace(day=1)
-        start = this_month_start - relativedelta(months=1)
-        end = this_month_start - timedelta(days=1)
-    elif period == "2m":
-        this_month_start = today.replace(day=1)
-        start = this_month_start - relativedelta(months=2)
-        end = this_month_start - timedelta(days=1)
-    elif period == "y":
-        start = today.replace(month=1, day=1)
-        end = today.replace(month=12, day=31)
-    elif period == "cd":
-        start = end = today
-    elif period == "ld":
-        start = end = today - timedelta(days=1)
-
-    if start and end:
-        date_filter = f"e.timestamp BETWEEN '{start.strftime('%Y-%m-%dT00:00:00Z')}' AND '{end.strftime('%Y-%m-%dT23:59:59Z')}'"
-        period_label = f"{start.strftime('%Y-%m-%d')} to {end.strftime('%Y-%m-%d')}"
-    else:
-        date_filter = "1=1"
-        period_label = "All Time"
+    period = Period.named(period)
+    period_label = period.label
 
     with app.app_context():
         # Query alle relevanten Daten
@@ -391,11 +237,11 @@ def send_syntheticgroundcz_summary_to_discord(app, db, period="all"):
                 COUNT(*) AS cz_count
             FROM synthetic_ground_cz sgcz
             JOIN event e ON e.id = sgcz.event_id
-            WHERE {date_filter}
+            WHERE {period.sql()}
             GROUP BY e.starsystem, sgcz.settlement, sgcz.cz_type, e.cmdr
             ORDER BY e.starsystem, sgcz.settlement, sgcz.cz_type, cz_count DESC
         """
-        rows = db.session.execute(text(sql)).fetchall()
+        rows = db.session.execute(text(sql), period.params()).fetchall()
 
         # Datenstruktur: {system: {"low": int, "medium": int, "high": int, "settlements": {settlement: int}, "cmdrs": {cmdr: {"low": int, "medium": int, "high": int}}}}
         summary = {}
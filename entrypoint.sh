@@ -20,6 +20,10 @@ else
     echo "📊 Database found. Skipping setup."
 fi
 
+# Apply pending schema migrations (no-op when the schema is up to date)
+echo "🗄️  Applying database migrations..."
+python migrations.py --db /app/instance/bgs_data.db
+
 # Start the Flask application
 echo "🚀 Starting Flask server..."
 exec python app.py
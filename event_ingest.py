@@ -0,0 +1,211 @@
+from collections import defaultdict
+from sqlalchemy import insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from rollups import update_rollups
+from conflicts import update_conflict_state
+from ticks import update_ticks
+from systems import update_system_state
+from watched_factions import watched_faction_id
+from models import (
+    Event, MarketBuyEvent, MarketSellEvent, MissionCompletedEvent, MissionCompletedInfluence,
+    FactionKillBondEvent, MissionFailedEvent, MultiSellExplorationDataEvent, RedeemVoucherEvent,
+    SellExplorationDataEvent, CommitCrimeEvent, SyntheticCZ, SyntheticGroundCZ
+)
+
+
+def extract_cz_type(data):
+    for cz in ["low", "medium", "high"]:
+        if data.get(cz) == 1:
+            return cz
+    return None
+
+
+def _compile_getter(source):
+    """
+    Turns a field source into a function of the event dict:
+    a key name, a tuple of alternative key names (first truthy wins) or a callable.
+    """
+    if callable(source):
+        return source
+    if isinstance(source, tuple):
+        return lambda data: next((data[k] for k in source if data.get(k)), None)
+    return lambda data: data.get(source)
+
+
+class EventHandler:
+    """Precompiled extractor turning one event type into rows of its child table."""
+
+    def __init__(self, model, fields, extra_rows=None):
+        self.model = model
+        self.getters = tuple((column, _compile_getter(source)) for column, source in fields.items())
+        self.extra_rows = extra_rows
+
+    def rows(self, event_id, event_dict):
+        row = {"event_id": event_id}
+        for column, getter in self.getters:
+            row[column] = getter(event_dict)
+        rows = [(self.model, row)]
+        if self.extra_rows:
+            rows.extend(self.extra_rows(event_id, event_dict))
+        return rows
+
+
+def _watched_faction(source):
+    """A field source resolving the faction name of another source to its watched_faction id."""
+    getter = _compile_getter(source)
+    return lambda data: watched_faction_id(getter(data))
+
+
+# Event name -> handler, built once at import. Events without a handler are only stored in the event table.
+EVENT_HANDLERS = {}
+
+
+def register_event(name, model, fields, extra_rows=None):
+    """
+    Registers the child table for an event type.
+    fields maps model columns to the source key(s) in the event, event_id is filled in automatically.
+    """
+    EVENT_HANDLERS[name] = EventHandler(model, fields, extra_rows)
+
+
+def _mission_influence_rows(event_id, event_dict):
+    for effect in event_dict.get("FactionEffects", []):
+        effect_entries = effect.get("Effects", [])
+        for infl in effect.get("Influence", []):
+            # mission_id holds the event id, the summaries join on mce.event_id = mci.mission_id
+            yield MissionCompletedInfluence, {
+                "mission_id": event_id,
+                "system": infl.get("SystemAddress"),
+                "influence": infl.get("Influence"),
+                "trend": infl.get("Trend"),
+                "faction_name": effect.get("Faction"),
+                "reputation": effect.get("Reputation"),
+                "reputation_trend": effect.get("ReputationTrend"),
+                "effect": effect_entries[0].get("Effect") if effect_entries else None,
+                "effect_trend": effect_entries[0].get("Trend") if effect_entries else None,
+                "watched_faction": watched_faction_id(effect.get("Faction"))
+            }
+
+
+register_event("MarketBuy", MarketBuyEvent, {
+    "stock": "Stock",
+    "stock_bracket": "StockBracket",
+    "value": "TotalCost",
+    "count": "Count"
+})
+register_event("MarketSell", MarketSellEvent, {
+    "demand": "Demand",
+    "demand_bracket": "DemandBracket",
+    "profit": "Profit",
+    "value": "TotalSale",
+    "count": "Count"
+})
+register_event("MissionCompleted", MissionCompletedEvent, {
+    "awarding_faction": "AwardingFaction",
+    "mission_name": "Name",
+    "reward": "Reward"
+}, extra_rows=_mission_influence_rows)
+register_event("FactionKillBond", FactionKillBondEvent, {
+    "killer_ship": "KillerShip",
+    "awarding_faction": "AwardingFaction",
+    "victim_faction": "VictimFaction",
+    "reward": "Reward"
+})
+register_event("MissionFailed", MissionFailedEvent, {
+    "mission_name": "Name",
+    "awarding_faction": "AwardingFaction",
+    "fine": "Fine"
+})
+register_event("MultiSellExplorationData", MultiSellExplorationDataEvent, {
+    "total_earnings": "TotalEarnings"
+})
+register_event("RedeemVoucher", RedeemVoucherEvent, {
+    "amount": "Amount",
+    "faction": "Faction",
+    "type": "Type"
+})
+register_event("SellExplorationData", SellExplorationDataEvent, {
+    "earnings": "TotalEarnings"
+})
+register_event("CommitCrime", CommitCrimeEvent, {
+    "crime_type": "CrimeType",
+    "faction": "Faction",
+    "victim": "Victim",
+    "fine": "Fine",
+    "bounty": "Bounty"
+})
+register_event("SyntheticCZ", SyntheticCZ, {
+    "cz_type": extract_cz_type,
+    "faction": ("faction", "Faction"),
+    "cmdr": "cmdr",
+    "station_faction_name": "station_faction_name",
+    "watched_faction": _watched_faction(("faction", "Faction"))
+})
+register_event("SyntheticGroundCZ", SyntheticGroundCZ, {
+    "cz_type": extract_cz_type,
+    "settlement": "settlement",
+    "faction": ("faction", "Faction"),
+    "cmdr": "cmdr",
+    "station_faction_name": "station_faction_name",
+    "watched_faction": _watched_faction(("faction", "Faction"))
+})
+
+
+def build_child_rows(event_id, event_dict):
+    """
+    Returns the typed child rows of one event as a list of (model, row dict) tuples.
+    """
+    handler = EVENT_HANDLERS.get(event_dict.get("event"))
+    if handler is None:
+        return []
+    return handler.rows(event_id, event_dict)
+
+
+def ingest_events(session, events_data):
+    """
+    Inserts a batch of events without committing.
+    All Event rows go out as one multi-row INSERT ... ON CONFLICT DO NOTHING RETURNING, then every
+    child table receives one bulk INSERT for all of its rows in the batch, and the rollups,
+    the conflict and system state and the tick registry are brought up to date in the same
+    transaction.
+    Events whose content hash is already stored (or repeated within the batch) are dropped.
+    Returns the accepted events as a list of (event_id, event_dict) and the number of duplicates.
+    """
+    if not events_data:
+        return [], 0
+
+    events_by_hash = {}
+    event_rows = []
+    for event_dict in events_data:
+        row = Event.row_from_dict(event_dict)
+        if row["content_hash"] in events_by_hash:
+            continue
+        events_by_hash[row["content_hash"]] = event_dict
+        event_rows.append(row)
+
+    # Core inserts against the tables: the ORM bulk path leaves out None values and splits
+    # a batch into one statement per distinct key set
+    events = Event.__table__
+    inserted = session.execute(
+        sqlite_insert(events)
+        .on_conflict_do_nothing(index_elements=[events.c.content_hash])
+        .returning(events.c.id, events.c.content_hash),
+        event_rows
+    ).all()
+    accepted = sorted((event_id, events_by_hash[digest]) for event_id, digest in inserted)
+
+    child_rows = defaultdict(list)
+    for event_id, event_dict in accepted:
+        for model, row in build_child_rows(event_id, event_dict):
+            child_rows[model].append(row)
+
+    for model, rows in child_rows.items():
+        session.execute(insert(model.__table__), rows)
+
+    if accepted:
+        update_rollups(session, accepted[0][0], accepted[-1][0])
+        update_conflict_state(session, (event_dict for _, event_dict in accepted))
+        update_ticks(session, (event_dict for _, event_dict in accepted))
+        update_system_state(session, (event_dict for _, event_dict in accepted))
+
+    return accepted, len(events_data) - len(accepted)
@@ -0,0 +1,174 @@
+import io
+import logging
+import os
+import sqlite3
+import threading
+import time
+from flask import jsonify
+from dotenv import load_dotenv
+from request_stream import iter_json_array
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Options for asynchronous ingestion of POST /events
+INGEST_ASYNC = os.getenv("INGEST_ASYNC", "false").lower() == "true"
+INGEST_SPOOL_PATH = os.getenv("INGEST_SPOOL_PATH", "instance/ingest_spool.db")
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "1"))
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "5"))
+
+
+class IngestSpool:
+    """
+    Durable FIFO of raw /events batches in its own SQLite file.
+    Entries stay on disk until a worker has committed them, so a crash only
+    means the batch is replayed on the next start.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS spool (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                received_at REAL NOT NULL,
+                body BLOB NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_spool_state_id ON spool (state, id)")
+
+    def append(self, body):
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO spool (received_at, body) VALUES (?, ?)", (time.time(), body)
+            )
+            return cur.lastrowid
+
+    def claim(self):
+        """Marks the oldest pending batch as processing and returns (id, received_at, body) or None."""
+        with self._lock:
+            return self._conn.execute("""
+                UPDATE spool SET state = 'processing', attempts = attempts + 1
+                WHERE id = (SELECT id FROM spool WHERE state = 'pending' ORDER BY id LIMIT 1)
+                RETURNING id, received_at, body
+            """).fetchone()
+
+    def complete(self, entry_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM spool WHERE id = ?", (entry_id,))
+
+    def fail(self, entry_id, error):
+        with self._lock:
+            self._conn.execute("""
+                UPDATE spool
+                SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, last_error = ?
+                WHERE id = ?
+            """, (INGEST_MAX_ATTEMPTS, error, entry_id))
+
+    def recover(self):
+        """Puts batches that were in flight during a crash back into the queue."""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE spool SET state = 'pending' WHERE state = 'processing'"
+            ).rowcount
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*), MIN(received_at) FROM spool GROUP BY state"
+            ).fetchall()
+        by_state = {state: (count, oldest) for state, count, oldest in rows}
+        pending, oldest_pending = by_state.get("pending", (0, None))
+        processing, oldest_processing = by_state.get("processing", (0, None))
+        oldest = min((t for t in (oldest_pending, oldest_processing) if t is not None), default=None)
+        return {
+            "depth": pending + processing,
+            "pending": pending,
+            "processing": processing,
+            "failed": by_state.get("failed", (0, None))[0],
+            "oldest_age_seconds": round(time.time() - oldest, 3) if oldest else 0.0
+        }
+
+
+# Module state shared by the /events route and the workers
+ingest_state = {"spool": None, "wakeup": threading.Event(), "processed": 0, "errors": 0, "last_lag": None}
+# Guards the counters above, which several workers update
+_counters_lock = threading.Lock()
+
+
+def get_spool():
+    if ingest_state["spool"] is None:
+        ingest_state["spool"] = IngestSpool(INGEST_SPOOL_PATH)
+    return ingest_state["spool"]
+
+
+def enqueue_events(body):
+    """Appends a raw /events body to the spool and wakes up the workers."""
+    entry_id = get_spool().append(body)
+    ingest_state["wakeup"].set()
+    return entry_id
+
+
+def start_ingest_workers(app, process_events, workers=INGEST_WORKERS):
+    """
+    Replays batches left over from a previous run and starts the background workers.
+    process_events(events_data) has to insert and commit one batch.
+    """
+    spool = get_spool()
+    recovered = spool.recover()
+    if recovered:
+        logger.info(f"[IngestQueue] Replaying {recovered} batch(es) left over from the last run")
+    ingest_state["wakeup"].set()
+
+    def worker():
+        while True:
+            entry = spool.claim()
+            if entry is None:
+                ingest_state["wakeup"].wait(timeout=1.0)
+                ingest_state["wakeup"].clear()
+                continue
+
+            entry_id, received_at, body = entry
+            with app.app_context():
+                try:
+                    process_events(iter_json_array(io.BytesIO(body)))
+                    spool.complete(entry_id)
+                    with _counters_lock:
+                        ingest_state["processed"] += 1
+                        ingest_state["last_lag"] = round(time.time() - received_at, 3)
+                except Exception as e:
+                    with _counters_lock:
+                        ingest_state["errors"] += 1
+                    spool.fail(entry_id, str(e))
+                    logger.error(f"[IngestQueue] Batch {entry_id} failed: {e}")
+
+    for i in range(workers):
+        threading.Thread(target=worker, name=f"ingest-worker-{i}", daemon=True).start()
+    logger.info(f"[IngestQueue] {workers} ingest worker(s) started, spool: {spool.path}")
+
+
+def register_ingest_queue_routes(app, require_api_key):
+
+    @app.route("/api/ingest/status", methods=["GET"])
+    @require_api_key
+    def ingest_status():
+        status = {"async": INGEST_ASYNC, "workers": INGEST_WORKERS if INGEST_ASYNC else 0}
+        if INGEST_ASYNC:
+            status.update(get_spool().stats())
+            with _counters_lock:
+                status.update({
+                    "processed": ingest_state["processed"],
+                    "errors": ingest_state["errors"],
+                    "last_lag_seconds": ingest_state["last_lag"]
+                })
+        return jsonify(status)
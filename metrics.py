@@ -0,0 +1,396 @@
+"""
+Metric registry and query planner for the summary endpoints.
+
+Every metric is declared once, with the raw table it comes from, its value
+expression and the faction it is credited to. The rollup tables are generated
+from these declarations (see rollups.py), and every summary, the leaderboard,
+the recruit overview and the batch endpoint are views over the same metrics.
+The planner compiles a view into one parameterized statement: a totals CTE
+grouped by the view's dimensions, read from the cheapest source that has all of
+its metrics (the tick rollup for ?tick= and tick ranges, otherwise the daily rollup, otherwise
+the raw event tables), and an outer SELECT for the output columns.
+
+Usage:
+    python metrics.py <view> [--dated] [--tick] [--tick-range] [--limit N]   # prints the compiled SQL
+"""
+import argparse
+import re
+from functools import lru_cache
+from sqlalchemy import text
+from periods import Period, tick_sql
+
+# FROM clauses of the raw sources, each joined to event e
+EVENT = "event e"
+MARKET_BUY = "market_buy_event mb JOIN event e ON e.id = mb.event_id"
+MARKET_SELL = "market_sell_event ms JOIN event e ON e.id = ms.event_id"
+MISSION_COMPLETED = "mission_completed_event mc JOIN event e ON e.id = mc.event_id"
+MISSION_FAILED = "mission_failed_event mf JOIN event e ON e.id = mf.event_id"
+REDEEM_VOUCHER = "redeem_voucher_event rv JOIN event e ON e.id = rv.event_id"
+SELL_EXPLORATION = "sell_exploration_data_event se JOIN event e ON e.id = se.event_id"
+MULTI_SELL_EXPLORATION = "multi_sell_exploration_data_event me JOIN event e ON e.id = me.event_id"
+COMMIT_CRIME = "commit_crime_event cc JOIN event e ON e.id = cc.event_id"
+# mission_completed_influence.mission_id holds the event id
+INFLUENCE = (
+    "mission_completed_influence mci JOIN mission_completed_event mce ON mce.event_id = mci.mission_id "
+    "JOIN event e ON e.id = mce.event_id"
+)
+
+
+class Metric:
+    """
+    A summed quantity. sources is a list of (FROM clause, extra condition, value
+    expression, faction expression). A metric with a count column is NULL rather
+    than 0 for groups without a single non-NULL value; count names the rollup
+    column that counts those values.
+    """
+
+    def __init__(self, name, sources, count=None):
+        self.name = name
+        self.sources = sources
+        self.count = count
+
+
+METRICS = {metric.name: metric for metric in [
+    Metric("event_count", [(EVENT, None, "1", None)]),
+    Metric("market_buy_value", [(MARKET_BUY, None, "mb.value", None)]),
+    Metric("market_buy_count", [(MARKET_BUY, None, "mb.count", None)]),
+    Metric("market_sell_value", [(MARKET_SELL, None, "ms.value", None)]),
+    Metric("market_sell_count", [(MARKET_SELL, None, "ms.count", None)]),
+    Metric("missions_completed", [(MISSION_COMPLETED, None, "1", "mc.awarding_faction")]),
+    Metric("missions_failed", [(MISSION_FAILED, None, "1", "mf.awarding_faction")]),
+    Metric("bounty_vouchers", [(REDEEM_VOUCHER, "rv.type = 'bounty'", "rv.amount", "rv.faction")],
+           count="bounty_voucher_count"),
+    Metric("combat_bonds", [(REDEEM_VOUCHER, "rv.type = 'CombatBond'", "rv.amount", "rv.faction")],
+           count="combat_bond_count"),
+    Metric("exploration_sales", [
+        (SELL_EXPLORATION, None, "se.earnings", None),
+        (MULTI_SELL_EXPLORATION, None, "me.total_earnings", None),
+    ], count="exploration_sale_count"),
+    Metric("influence", [(INFLUENCE, None, "LENGTH(mci.influence)", "mci.faction_name")],
+           count="influence_count"),
+    # Influence for the watched factions (see watched_factions.py), resolved at ingest
+    Metric("eic_influence", [(INFLUENCE, "mci.watched_faction IS NOT NULL", "LENGTH(mci.influence)", "mci.faction_name")],
+           count="eic_influence_count"),
+    Metric("bounty_fines", [(COMMIT_CRIME, None, "cc.bounty", "cc.faction")], count="bounty_fine_count"),
+]}
+
+_COMMON_METRICS = [
+    "event_count", "market_buy_value", "market_buy_count", "market_sell_value", "market_sell_count",
+    "missions_completed", "missions_failed", "bounty_vouchers", "combat_bonds", "exploration_sales",
+]
+DAILY_METRICS = _COMMON_METRICS + ["eic_influence", "bounty_fines"]
+TICK_METRICS = _COMMON_METRICS + ["influence", "eic_influence", "bounty_fines"]
+
+
+class RollupSource:
+    """Totals read from a rollup table; period is "day" or "tick", the time filter it supports."""
+
+    def __init__(self, table, metrics, dimensions, period):
+        self.table = table
+        self.metrics = set(metrics)
+        self.dimensions = dimensions
+        self.period = period
+
+    def supports(self, metrics, dimensions, tick):
+        return (bool(tick) == (self.period == "tick")
+                and self.metrics.issuperset(metrics) and set(dimensions) <= set(self.dimensions))
+
+    def totals(self, metrics, dimensions, filters, dated, tick):
+        columns = [f"{self.dimensions[d]} AS {d}" for d in dimensions]
+        for name in metrics:
+            count = METRICS[name].count
+            if count:
+                columns.append(f"CASE WHEN SUM(r.{count}) > 0 THEN SUM(r.{name}) END AS {name}")
+            else:
+                columns.append(f"SUM(r.{name}) AS {name}")
+        where = []
+        if tick:
+            where.append(tick_sql(tick, "r.tickid"))
+        elif dated:
+            where.append("r.day BETWEEN :start_day AND :end_day")
+        where += [f"{self.dimensions[d]} {predicate}" for d, predicate in filters.items()]
+        return _totals_sql(columns, f"{self.table} r", where, [self.dimensions[d] for d in dimensions])
+
+
+class RawSource:
+    """
+    Totals aggregated from the raw event tables, for metrics that share one FROM
+    clause; differing conditions become CASE expressions.
+    """
+
+    dimensions = {"cmdr": "e.cmdr", "system": "e.starsystem", "day": "substr(e.timestamp, 1, 10)", "tickid": "e.tickid"}
+
+    def _sources(self, metrics):
+        sources = [METRICS[name].sources for name in metrics]
+        if any(len(s) != 1 for s in sources) or len({s[0][0] for s in sources}) != 1:
+            return None
+        return [s[0] for s in sources]
+
+    def supports(self, metrics, dimensions, tick):
+        sources = self._sources(metrics)
+        if sources is None:
+            return False
+        if "faction" in dimensions and len({faction for _, _, _, faction in sources} - {None}) != 1:
+            return False
+        return set(dimensions) <= set(self.dimensions) | {"faction"}
+
+    def totals(self, metrics, dimensions, filters, dated, tick):
+        sources = self._sources(metrics)
+        expressions = dict(self.dimensions)
+        expressions["faction"] = next((faction for _, _, _, faction in sources if faction), None)
+        conditions = {condition for _, condition, _, _ in sources}
+        shared = conditions.pop() if len(conditions) == 1 else None
+
+        columns = [f"{expressions[d]} AS {d}" for d in dimensions]
+        for name, (_, condition, value, _) in zip(metrics, sources):
+            if condition and not shared:
+                value = f"CASE WHEN {condition} THEN {value} END"
+            if not METRICS[name].count:
+                value = f"COALESCE({value}, 0)"
+            # SUM() of only NULL values is NULL, which is what counted metrics expect
+            columns.append(f"SUM({value}) AS {name}")
+        where = ["e.cmdr IS NOT NULL"]
+        if tick:
+            where.append(tick_sql(tick, "e.tickid", "e.timestamp"))
+        elif dated:
+            where.append("e.timestamp BETWEEN :start AND :end")
+        if shared:
+            where.append(shared)
+        where += [f"{expressions[d]} {predicate}" for d, predicate in filters.items()]
+        return _totals_sql(columns, sources[0][0], where, [expressions[d] for d in dimensions])
+
+
+def _totals_sql(columns, source, where, group_by):
+    sql = f"SELECT {', '.join(columns)} FROM {source}"
+    if where:
+        sql += f" WHERE {' AND '.join(where)}"
+    return sql + f" GROUP BY {', '.join(group_by)}"
+
+
+DAILY_SOURCE = RollupSource("cmdr_daily_rollup", DAILY_METRICS, {"cmdr": "r.cmdr", "day": "r.day"}, "day")
+TICK_SOURCE = RollupSource(
+    "cmdr_tick_rollup", TICK_METRICS,
+    {"cmdr": "r.cmdr", "faction": "r.faction", "system": "r.system", "tickid": "r.tickid"}, "tick"
+)
+RAW_SOURCE = RawSource()
+# Tried in order; the first source that has every metric and dimension of a view answers it
+SOURCES = [TICK_SOURCE, DAILY_SOURCE, RAW_SOURCE]
+
+
+def route(metrics, dimensions, tick):
+    for source in SOURCES:
+        if source.supports(metrics, dimensions, tick):
+            return source
+    raise ValueError(f"No source for metrics {', '.join(metrics)} by {', '.join(dimensions)}")
+
+
+class View:
+    """
+    A summary over the metric totals. outputs is a list of (column, expression),
+    where and order_by are SQL; all of them refer to the totals as t.<metric> and
+    t.<dimension>, and to the tables in joins. filters maps a dimension to a
+    predicate that is applied before the totals are computed.
+    """
+
+    def __init__(self, outputs, order_by, dimensions=("cmdr",), where=None, filters=None, joins=()):
+        self.outputs = outputs
+        self.order_by = order_by
+        self.dimensions = list(dimensions)
+        self.where = where
+        self.filters = filters or {}
+        self.joins = list(joins)
+        referenced = " ".join([expr for _, expr in outputs] + [order_by, where or ""])
+        self.metrics = [name for name in METRICS if re.search(rf"\bt\.{name}\b", referenced)]
+
+    def select_list(self):
+        return ", ".join(f"{expr} AS {column}" for column, expr in self.outputs)
+
+
+def _cmdr_metric(column, metric):
+    """
+    A single metric per cmdr, without the cmdrs that have none of it. For counted
+    metrics that includes cmdrs whose amounts are all NULL, which the former
+    per-endpoint queries listed with a null value.
+    """
+    condition = f"t.{metric} IS NOT NULL" if METRICS[metric].count else f"t.{metric} > 0"
+    return View([("cmdr", "t.cmdr"), (column, f"t.{metric}")], f"t.{metric} DESC, t.cmdr", where=condition)
+
+
+def _influence(metric):
+    return View(
+        [("cmdr", "t.cmdr"), ("faction_name", "t.faction"), ("influence", f"t.{metric}")],
+        f"t.{metric} DESC, t.cmdr", dimensions=("cmdr", "faction"), where=f"t.{metric} IS NOT NULL",
+    )
+
+
+VIEWS = {
+    "market-events": View([
+        ("cmdr", "t.cmdr"),
+        ("total_buy", "t.market_buy_value"),
+        ("total_sell", "t.market_sell_value"),
+        ("total_transaction_volume", "t.market_buy_value + t.market_sell_value"),
+        ("total_trade_quantity", "t.market_buy_count + t.market_sell_count"),
+    ], "t.market_buy_count + t.market_sell_count DESC, t.cmdr",
+        where="t.market_buy_value + t.market_sell_value > 0"),
+    "missions-completed": _cmdr_metric("missions_completed", "missions_completed"),
+    "missions-failed": _cmdr_metric("missions_failed", "missions_failed"),
+    "bounty-vouchers": _cmdr_metric("bounty_vouchers", "bounty_vouchers"),
+    "combat-bonds": _cmdr_metric("combat_bonds", "combat_bonds"),
+    "influence-by-faction": _influence("influence"),
+    "influence-eic": _influence("eic_influence"),
+    "exploration-sales": _cmdr_metric("total_exploration_sales", "exploration_sales"),
+    "bounty-fines": _cmdr_metric("bounty_fines", "bounty_fines"),
+    # Every metric per cmdr in one pass, joined once to cmdr
+    "leaderboard": View([
+        ("cmdr", "t.cmdr"),
+        ("rank", "c.squadron_rank"),
+        ("total_buy", "t.market_buy_value"),
+        ("total_sell", "t.market_sell_value"),
+        ("profit", "CASE WHEN t.market_sell_value > 0 THEN t.market_sell_value - t.market_buy_value ELSE 0 END"),
+        ("profitability", "ROUND(CASE WHEN t.market_sell_value > 0 AND t.market_buy_value > 0 "
+                          "THEN (t.market_sell_value - t.market_buy_value) * 100.0 / t.market_buy_value ELSE 0 END, 2)"),
+        ("total_quantity", "t.market_buy_count + t.market_sell_count"),
+        ("total_volume", "t.market_buy_value + t.market_sell_value"),
+        ("missions_completed", "t.missions_completed"),
+        ("missions_failed", "t.missions_failed"),
+        ("bounty_vouchers", "t.bounty_vouchers"),
+        ("combat_bonds", "t.combat_bonds"),
+        ("exploration_sales", "t.exploration_sales"),
+        ("influence_eic", "t.eic_influence"),
+        ("bounty_fines", "t.bounty_fines"),
+    ], "t.cmdr", joins=["LEFT JOIN cmdr c ON c.name = t.cmdr"]),
+    # Recruits only, with first/last seen from cmdr_activity
+    "recruits": View([
+        ("commander", "t.cmdr"),
+        ("has_data", "'Yes'"),
+        ("last_active", "a.last_seen"),
+        ("days_since_join", "CAST(julianday('now') - julianday(a.first_seen) AS INT)"),
+        ("tonnage", "t.market_buy_count + t.market_sell_count"),
+        ("mission_count", "t.missions_completed"),
+        ("bounty_claims", "t.bounty_vouchers"),
+        ("exp_value", "t.exploration_sales"),
+        ("combat_bonds", "t.combat_bonds"),
+        ("bounty_fines", "t.bounty_fines"),
+    ], "CAST(julianday('now') - julianday(a.first_seen) AS INT), t.cmdr",
+        filters={"cmdr": "IN (SELECT c.name FROM cmdr c WHERE c.squadron_rank = 'Recruit')"},
+        joins=["JOIN cmdr_activity a ON a.cmdr = t.cmdr"]),
+}
+
+# The keys of /api/summary/<key>, /api/summary/top5/<key> and the batch endpoint
+SUMMARY_KEYS = [
+    "market-events", "missions-completed", "missions-failed", "bounty-vouchers", "combat-bonds",
+    "influence-by-faction", "influence-eic", "exploration-sales", "bounty-fines",
+]
+
+
+def compile_view(name, period=None, limit=None):
+    """
+    Returns (sql, params) of a view for a Period (default all time), optionally
+    limited to the top rows. Raises KeyError for an unknown view.
+    """
+    period = period or Period()
+    params = period.params()
+    if limit:
+        params["limit"] = int(limit)
+    return _view_sql(name, period.dated, period.tick, bool(limit)), params
+
+
+# The SQL only depends on the shape of the request; dates, ticks and limits are bound
+@lru_cache(maxsize=None)
+def _view_sql(name, dated, tick, limited):
+    view = VIEWS[name]
+    source = route(view.metrics, view.dimensions, tick)
+    totals = source.totals(view.metrics, view.dimensions, view.filters, dated, tick)
+    sql = f"WITH totals AS ({totals}) SELECT {view.select_list()} FROM totals t"
+    for join in view.joins:
+        sql += f" {join}"
+    if view.where:
+        sql += f" WHERE {view.where}"
+    sql += f" ORDER BY {view.order_by}"
+    if limited:
+        sql += " LIMIT :limit"
+    return sql
+
+
+def compile_batch(names, period=None, limit=None):
+    """
+    Returns (sql, params) of several views fused into one statement. Views with the
+    same source and dimensions share one totals CTE; each view becomes a UNION ALL
+    branch tagged with its position in names and numbered in its own order, and
+    columns a view does not have are NULL.
+    """
+    period = period or Period()
+    params = period.params()
+    if limit:
+        params["limit"] = int(limit)
+    return _batch_sql(tuple(names), period.dated, period.tick, bool(limit)), params
+
+
+@lru_cache(maxsize=256)
+def _batch_sql(names, dated, tick, limited):
+    groups = {}  # (source, dimensions) -> metrics
+    for name in names:
+        view = VIEWS[name]
+        source = route(view.metrics, view.dimensions, tick)
+        metrics = groups.setdefault((source, tuple(view.dimensions)), [])
+        metrics += [m for m in view.metrics if m not in metrics]
+    # A source that has a combination of metrics also has each of them
+    ctes = {group: f"totals_{i}" for i, group in enumerate(groups)}
+    with_list = ", ".join(
+        f"{ctes[(source, dims)]} AS ({source.totals(metrics, list(dims), {}, dated, tick)})"
+        for (source, dims), metrics in groups.items()
+    )
+
+    columns = []
+    for name in names:
+        columns += [column for column, _ in VIEWS[name].outputs if column not in columns]
+    branches = []
+    for i, name in enumerate(names):
+        view = VIEWS[name]
+        source = route(view.metrics, view.dimensions, tick)
+        expressions = dict(view.outputs)
+        select = ", ".join(f"{expressions.get(column, 'NULL')} AS {column}" for column in columns)
+        where = [view.where] if view.where else []
+        where += [f"t.{d} {predicate}" for d, predicate in view.filters.items()]
+        branch = (f"SELECT {i} AS batch_key, ROW_NUMBER() OVER (ORDER BY {view.order_by}) AS position, {select} "
+                  f"FROM {ctes[(source, tuple(view.dimensions))]} t")
+        for join in view.joins:
+            branch += f" {join}"
+        if where:
+            branch += f" WHERE {' AND '.join(where)}"
+        branches.append(branch)
+
+    sql = f"WITH {with_list} SELECT * FROM ({' UNION ALL '.join(branches)})"
+    if limited:
+        sql += " WHERE position <= :limit"
+    return sql + " ORDER BY batch_key, position"
+
+
+def summary_batch(session, names, period=None, limit=None):
+    """Runs several views in one statement and returns {name: rows}, each shaped like the single view."""
+    names = list(dict.fromkeys(names))
+    sql, params = compile_batch(names, period, limit)
+    result = {name: [] for name in names}
+    for row in session.execute(text(sql), params).mappings():
+        name = names[row["batch_key"]]
+        result[name].append({column: row[column] for column, _ in VIEWS[name].outputs})
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("view", choices=list(VIEWS))
+    parser.add_argument("--dated", action="store_true", help="compile for a day range")
+    parser.add_argument("--tick", action="store_true", help="compile for a single tick")
+    parser.add_argument("--tick-range", action="store_true", help="compile for a range of ticks")
+    parser.add_argument("--limit", type=int)
+    args = parser.parse_args()
+    if args.tick_range:
+        period = Period(tickids=["<from>", "<to>"], tick_start="<first event>", tick_end="<last event>")
+    elif args.tick:
+        period = Period(tickid="<tickid>")
+    else:
+        period = Period.named("cd" if args.dated else "all")
+    sql, params = compile_view(args.view, period, limit=args.limit)
+    print(sql)
+    print(params)
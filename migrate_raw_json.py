@@ -0,0 +1,101 @@
+"""
+One-off conversion of event.raw_json from Python repr to canonical JSON.
+
+Rows are read in id-ordered chunks, parsed in a process pool and written back
+in one transaction per chunk. Payloads above RAW_JSON_COMPRESS_THRESHOLD are
+moved into raw_json_compressed. Already converted rows are left untouched, so
+the script can be interrupted and re-run at any time.
+
+Usage:
+    python migrate_raw_json.py [--db instance/bgs_data.db] [--chunk 5000] [--workers 4]
+"""
+import argparse
+import ast
+import json
+import os
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import create_engine
+from raw_payload import encode_raw_json, RAW_JSON_COMPRESS_THRESHOLD
+from migrations import run_migrations
+
+DB_PATH = "instance/bgs_data.db"
+
+
+def convert_chunk(rows, threshold=RAW_JSON_COMPRESS_THRESHOLD):
+    """Returns (raw_json, raw_json_compressed, id) for every row that needs rewriting."""
+    updates = []
+    for row_id, raw in rows:
+        try:
+            data = json.loads(raw)
+            if not threshold or len(raw) < threshold:
+                continue
+        except ValueError:
+            try:
+                data = ast.literal_eval(raw)
+            except (ValueError, SyntaxError):
+                continue
+        raw_json, raw_json_compressed = encode_raw_json(data, threshold)
+        updates.append((raw_json, raw_json_compressed, row_id))
+    return updates
+
+
+def read_chunks(conn, chunk_size):
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, raw_json FROM event WHERE id > ? AND raw_json IS NOT NULL ORDER BY id LIMIT ?",
+            (last_id, chunk_size)
+        ).fetchall()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield rows
+
+
+def migrate(db_path, chunk_size, workers):
+    if not os.path.exists(db_path):
+        print(f"❌ Database not found: {db_path}")
+        return
+
+    run_migrations(create_engine(f"sqlite:///{db_path}"))
+    conn = sqlite3.connect(db_path)
+
+    converted = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Keep only a few chunks in flight so memory stays bounded on large databases
+        in_flight = deque()
+        chunks = read_chunks(conn, chunk_size)
+        while True:
+            while len(in_flight) < workers * 2:
+                rows = next(chunks, None)
+                if rows is None:
+                    break
+                in_flight.append(pool.submit(convert_chunk, rows))
+            if not in_flight:
+                break
+            updates = in_flight.popleft().result()
+            if updates:
+                conn.executemany(
+                    "UPDATE event SET raw_json = ?, raw_json_compressed = ? WHERE id = ?", updates
+                )
+                conn.commit()
+                converted += len(updates)
+                print(f"  … {converted} rows converted")
+
+    conn.close()
+    print(f"✅ {converted} rows converted in {time.perf_counter() - started:.1f}s")
+    if converted:
+        print("ℹ️  Run 'sqlite3 <db> VACUUM' to give the freed space back to the file system.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--chunk", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    migrate(args.db, args.chunk, args.workers)
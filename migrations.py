@@ -0,0 +1,320 @@
+"""
+Versioned schema migrations for the BGS database.
+
+Every step runs exactly once, in order, inside its own transaction, and is
+recorded in the schema_version table. Step 1 creates the original schema from
+frozen DDL and every later step creates the tables, columns and indexes it
+introduces, so new and upgraded databases take the same path. Steps are written
+to be idempotent so databases that were patched by hand or created by an older
+db.create_all() are brought to the same state.
+
+The server applies pending migrations when started with python app.py. Under a
+WSGI server (gunicorn app:app) that start block does not run; run this script
+before starting it. It also re-resolves the watched factions if
+WATCHED_FACTIONS changed.
+
+Usage:
+    python migrations.py [--db instance/bgs_data.db]
+"""
+import argparse
+import logging
+import random
+from datetime import datetime
+from sqlalchemy import create_engine, text
+from models import (
+    Event, MarketBuyEvent, MarketSellEvent, MissionCompletedEvent, MissionCompletedInfluence,
+    FactionKillBondEvent, MissionFailedEvent, MultiSellExplorationDataEvent, RedeemVoucherEvent,
+    SellExplorationDataEvent, CommitCrimeEvent, SyntheticCZ, SyntheticGroundCZ, CmdrDailyRollup, CmdrTickRollup,
+    CmdrActivity, ConflictState, ConflictCmdr, Tick, WatchedFaction, SystemState, SystemFaction, DataGeneration
+)
+from rollups import rebuild_rollups, ACTIVITY_ROLLUP
+from conflicts import rebuild_conflict_state
+from ticks import rebuild_ticks
+from systems import rebuild_system_state
+from response_cache import bump_data_generation
+from watched_factions import rebuild_watched_factions, sync_watched_factions, WATCHED_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = "instance/bgs_data.db"
+
+# Ordered list of (version, description, function(connection))
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return register
+
+
+def _columns(connection, table):
+    return {row[1] for row in connection.execute(text(f"PRAGMA table_info({table})"))}
+
+
+def _add_column(connection, table, column, ddl_type):
+    if column not in _columns(connection, table):
+        connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+
+# The schema before the first migration, frozen as DDL: later steps add their own
+# tables, columns and indexes, so a fresh database goes through every one of them
+BASE_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS event (
+        id INTEGER NOT NULL, event VARCHAR(64) NOT NULL, timestamp VARCHAR(64) NOT NULL,
+        tickid VARCHAR(24) NOT NULL, ticktime VARCHAR(64) NOT NULL, cmdr VARCHAR(64),
+        starsystem VARCHAR(128), systemaddress BIGINT, raw_json TEXT, PRIMARY KEY (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS activity (
+        id INTEGER NOT NULL, tickid VARCHAR(24) NOT NULL, ticktime VARCHAR(64) NOT NULL,
+        timestamp VARCHAR(64) NOT NULL, cmdr VARCHAR(64), PRIMARY KEY (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS cmdr (
+        id INTEGER NOT NULL, name VARCHAR(64) NOT NULL, rank_combat VARCHAR(64), rank_trade VARCHAR(64),
+        rank_explore VARCHAR(64), rank_cqc VARCHAR(64), rank_empire VARCHAR(64), rank_federation VARCHAR(64),
+        rank_power VARCHAR(64), credits BIGINT, assets BIGINT, inara_url VARCHAR(256),
+        squadron_name VARCHAR(128), squadron_rank VARCHAR(64), PRIMARY KEY (id), UNIQUE (name)
+    )""",
+    """CREATE TABLE IF NOT EXISTS objective (
+        id INTEGER NOT NULL, title VARCHAR, priority INTEGER, type VARCHAR, system VARCHAR, faction VARCHAR,
+        description TEXT, startdate DATETIME, enddate DATETIME, PRIMARY KEY (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS market_buy_event (
+        id INTEGER NOT NULL, event_id INTEGER NOT NULL, stock INTEGER, stock_bracket INTEGER, value INTEGER,
+        count INTEGER, PRIMARY KEY (id), FOREIGN KEY(event_id) REFERENCES event (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS market_sell_event (
+        id INTEGER NOT NULL, event_id INTEGER NOT NULL, demand INTEGER, demand_bracket INTEGER,
+        profit INTEGER, value INTEGER, count INTEGER, PRIMARY KEY (id),
+        FOREIGN KEY(event_id) REFERENCES event (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS mission_completed_event (
+        id INTEGER NOT NULL, event_id INTEGER NOT NULL, awarding_faction VARCHAR(128),
+        mission_name VARCHAR(128), reward INTEGER, PRIMARY KEY (id),
+        FOREIGN KEY(event_id) REFERENCES event (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS system (
+        id INTEGER NOT NULL, name VARCHAR(128) NOT NULL, address BIGINT NOT NULL,
+        activity_id INTEGER NOT NULL, PRIMARY KEY (id), FOREIGN KEY(activity_id) REFERENCES activity (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS faction_kill_bond_event (
+        id INTEGER NOT NULL, event_id INTEGER NOT NULL, killer_ship VARCHAR(64),
+        awarding_faction VARCHAR(128), victim_faction VARCHAR(128), reward INTEGER, PRIMARY KEY (id),
+        FOREIGN KEY(event_id) REFERENCES event (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS mission_failed_event (
+        id INTEGER NOT NULL, event_id INTEGER NOT NULL, mission_name VARCHAR(128),
+        awarding_faction VARCHAR(128), fine INTEGER, PRIMARY KEY (id),
+        FOREIGN KEY(event_id) REFERENCES event (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS multi_sell_exploration_data_event (
+        id INTEGER NOT NULL, event_id INTEGER NOT NULL, total_earnings INTEGER, PRIMARY KEY (id),
+        FOREIGN KEY(event_id) REFERENCES event (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS redeem_voucher_event (
+        id INTEGER NOT NULL, event_id INTEGER NOT NULL, amount INTEGER, faction VARCHAR(128),
+        type VARCHAR(128), PRIMARY KEY (id), FOREIGN KEY(event_id) REFERENCES event (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS sell_exploration_data_event (
+        id INTEGER NOT NULL, event_id INTEGER NOT NULL, earnings INTEGER, PRIMARY KEY (id),
+        FOREIGN KEY(event_id) REFERENCES event (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS commit_crime_event (
+        id INTEGER NOT NULL, event_id INTEGER NOT NULL, crime_type VARCHAR(128), faction VARCHAR(128),
+        victim VARCHAR(128), fine INTEGER, PRIMARY KEY (id), FOREIGN KEY(event_id) REFERENCES event (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS objective_target (
+        id INTEGER NOT NULL, objective_id INTEGER NOT NULL, type VARCHAR, station VARCHAR, system VARCHAR,
+        faction VARCHAR, progress INTEGER, targetindividual INTEGER, targetoverall INTEGER, PRIMARY KEY (id),
+        FOREIGN KEY(objective_id) REFERENCES objective (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS synthetic_ground_cz (
+        id INTEGER NOT NULL, event_id INTEGER NOT NULL, cz_type VARCHAR(64), settlement VARCHAR(128),
+        faction VARCHAR(128), cmdr VARCHAR(64), station_faction_name VARCHAR(128), PRIMARY KEY (id),
+        FOREIGN KEY(event_id) REFERENCES event (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS synthetic_cz (
+        id INTEGER NOT NULL, event_id INTEGER NOT NULL, cz_type VARCHAR(64), faction VARCHAR(128),
+        cmdr VARCHAR(64), station_faction_name VARCHAR(128), PRIMARY KEY (id),
+        FOREIGN KEY(event_id) REFERENCES event (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS mission_completed_influence (
+        id INTEGER NOT NULL, mission_id INTEGER NOT NULL, system VARCHAR(128), influence VARCHAR(8),
+        trend VARCHAR(32), faction_name VARCHAR(128), reputation VARCHAR(8), reputation_trend VARCHAR(32),
+        effect VARCHAR(128), effect_trend VARCHAR(32), PRIMARY KEY (id),
+        FOREIGN KEY(mission_id) REFERENCES mission_completed_event (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS faction (
+        id INTEGER NOT NULL, name VARCHAR(128) NOT NULL, state VARCHAR(64) NOT NULL, bvs INTEGER,
+        cbs INTEGER, exobiology INTEGER, exploration INTEGER, scenarios INTEGER, infprimary INTEGER,
+        infsecondary INTEGER, missionfails INTEGER, murdersground INTEGER, murdersspace INTEGER,
+        tradebm INTEGER, system_id INTEGER NOT NULL, PRIMARY KEY (id),
+        FOREIGN KEY(system_id) REFERENCES system (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS objective_target_settlement (
+        id INTEGER NOT NULL, target_id INTEGER NOT NULL, name VARCHAR, targetindividual INTEGER,
+        targetoverall INTEGER, progress INTEGER, PRIMARY KEY (id),
+        FOREIGN KEY(target_id) REFERENCES objective_target (id)
+    )""",
+]
+
+
+@migration(1, "Base schema")
+def create_base_schema(connection):
+    for ddl in BASE_SCHEMA:
+        connection.execute(text(ddl))
+
+
+@migration(2, "event.raw_json_compressed for zlib-compressed payloads")
+def add_raw_json_compressed(connection):
+    _add_column(connection, "event", "raw_json_compressed", "BLOB")
+
+
+@migration(3, "event.content_hash with unique index for deduplication")
+def add_content_hash(connection):
+    # Existing rows keep NULL until dedup_events.py has hashed them
+    _add_column(connection, "event", "content_hash", "VARCHAR(64)")
+    connection.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_event_content_hash ON event (content_hash)"))
+
+
+@migration(4, "commit_crime_event.bounty")
+def add_commit_crime_bounty(connection):
+    _add_column(connection, "commit_crime_event", "bounty", "INTEGER")
+
+
+def _create_indexes(connection, *models):
+    """
+    Creates the indexes declared on the given models that do not exist yet. Indexes on
+    columns a later step adds are left to that step.
+    """
+    for model in models:
+        columns = _columns(connection, model.__tablename__)
+        for index in model.__table__.indexes:
+            if all(column.name in columns for column in index.columns):
+                index.create(connection, checkfirst=True)
+
+
+def _analyze(connection):
+    # Bounded sampling keeps ANALYZE fast on large databases
+    connection.execute(text("PRAGMA analysis_limit=1000"))
+    connection.execute(text("ANALYZE"))
+
+
+@migration(5, "Indexes for the summary workload")
+def create_summary_indexes(connection):
+    _create_indexes(
+        connection,
+        Event, MarketBuyEvent, MarketSellEvent, MissionCompletedEvent, MissionCompletedInfluence,
+        FactionKillBondEvent, MissionFailedEvent, MultiSellExplorationDataEvent, RedeemVoucherEvent,
+        SellExplorationDataEvent, CommitCrimeEvent, SyntheticCZ, SyntheticGroundCZ
+    )
+    _analyze(connection)
+
+
+# The rollup statements read mission_completed_influence.watched_faction, so both
+# rollups are backfilled by migration 11 once that column exists
+@migration(6, "cmdr_daily_rollup (backfilled by migration 11)")
+def create_cmdr_daily_rollup(connection):
+    CmdrDailyRollup.__table__.create(connection, checkfirst=True)
+    _create_indexes(connection, CmdrDailyRollup)
+
+
+@migration(7, "cmdr_tick_rollup (backfilled by migration 11)")
+def create_cmdr_tick_rollup(connection):
+    CmdrTickRollup.__table__.create(connection, checkfirst=True)
+
+
+@migration(8, "cmdr_activity with first/last seen per cmdr, backfilled from the event table")
+def create_cmdr_activity(connection):
+    CmdrActivity.__table__.create(connection, checkfirst=True)
+    rebuild_rollups(connection, [ACTIVITY_ROLLUP])
+
+
+@migration(9, "conflict_state and conflict_cmdr, backfilled from the stored payloads")
+def create_conflict_state(connection):
+    ConflictState.__table__.create(connection, checkfirst=True)
+    ConflictCmdr.__table__.create(connection, checkfirst=True)
+    rebuild_conflict_state(connection)
+
+
+@migration(10, "tick registry, backfilled from the event table")
+def create_tick(connection):
+    Tick.__table__.create(connection, checkfirst=True)
+    _create_indexes(connection, Tick)
+    rebuild_ticks(connection)
+
+
+@migration(11, "watched_faction ids on influence, synthetic CZ and conflict rows; tick rollup eic_influence")
+def add_watched_faction(connection):
+    for table in WATCHED_COLUMNS:
+        _add_column(connection, table, "watched_faction", "INTEGER")
+    _add_column(connection, "cmdr_tick_rollup", "eic_influence", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(connection, "cmdr_tick_rollup", "eic_influence_count", "INTEGER NOT NULL DEFAULT 0")
+    WatchedFaction.__table__.create(connection, checkfirst=True)
+    _create_indexes(connection, MissionCompletedInfluence, SyntheticCZ, SyntheticGroundCZ)
+    rebuild_watched_factions(connection)
+    _analyze(connection)
+
+
+@migration(12, "system_state and system_faction, backfilled from the stored payloads")
+def create_system_state(connection):
+    SystemState.__table__.create(connection, checkfirst=True)
+    SystemFaction.__table__.create(connection, checkfirst=True)
+    rebuild_system_state(connection)
+
+
+@migration(13, "data_generation row keying the response cache")
+def create_data_generation(connection):
+    DataGeneration.__table__.create(connection, checkfirst=True)
+    # A random start, so ETags of a recreated database do not repeat those of the old one
+    connection.execute(text("INSERT OR IGNORE INTO data_generation (id, generation) VALUES (1, :start)"),
+                       {"start": random.randrange(1 << 30)})
+
+
+def current_version(connection):
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description VARCHAR(256) NOT NULL,
+            applied_at VARCHAR(64) NOT NULL
+        )
+    """))
+    return connection.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+
+def run_migrations(engine):
+    """Applies all pending migrations and returns the resulting schema version."""
+    with engine.begin() as connection:
+        version = current_version(connection)
+
+    applied = False
+    for step_version, description, fn in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if step_version <= version:
+            continue
+        logger.info(f"[Migrations] Applying {step_version}: {description}")
+        with engine.begin() as connection:
+            fn(connection)
+            connection.execute(
+                text("INSERT INTO schema_version (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": step_version, "d": description, "t": datetime.utcnow().isoformat() + "Z"}
+            )
+        version = step_version
+        applied = True
+
+    if applied:
+        # The steps may have rebuilt data that running servers have cached
+        with engine.begin() as connection:
+            bump_data_generation(connection)
+    return version
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args()
+    engine = create_engine(f"sqlite:///{args.db}")
+    version = run_migrations(engine)
+    sync_watched_factions(engine)
+    print(f"✅ Schema version: {version}")
@@ -1,8 +1,16 @@
 from flask_sqlalchemy import SQLAlchemy
+from raw_payload import encode_raw_json, content_hash
 
 db = SQLAlchemy()
 
 class Event(db.Model):
+    __table_args__ = (
+        # Summaries: e.timestamp BETWEEN ... grouped by e.cmdr, and per-cmdr lookups
+        db.Index('ix_event_timestamp_cmdr', 'timestamp', 'cmdr'),
+        db.Index('ix_event_cmdr_timestamp', 'cmdr', 'timestamp'),
+        db.Index('ix_event_tickid', 'tickid'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     event = db.Column(db.String(64), nullable=False)
     timestamp = db.Column(db.String(64), nullable=False)
@@ -12,23 +20,36 @@ class Event(db.Model):
     starsystem = db.Column(db.String(128), nullable=True)
     systemaddress = db.Column(db.BigInteger, nullable=True)
     raw_json = db.Column(db.Text, nullable=True)
+    raw_json_compressed = db.Column(db.LargeBinary, nullable=True)
+    content_hash = db.Column(db.String(64), nullable=True, unique=True, index=True)
 
     @classmethod
     def from_dict(cls, data):
-        return cls(
-            event=data['event'],
-            timestamp=data['timestamp'],
-            tickid=data['tickid'],
-            ticktime=data.get('ticktime', ''),
-            cmdr=data.get('cmdr'),
-            starsystem=data.get('StarSystem'),
-            systemaddress=data.get('SystemAddress'),
-            raw_json=str(data)
-        )
+        return cls(**cls.row_from_dict(data))
+
+    @staticmethod
+    def row_from_dict(data):
+        """
+        Column values for one incoming event, as used by the bulk insert path.
+        Every row has the same keys, raw_json and raw_json_compressed included, so a batch is one INSERT.
+        """
+        raw_json, raw_json_compressed = encode_raw_json(data)
+        return {
+            'event': data['event'],
+            'timestamp': data['timestamp'],
+            'tickid': data['tickid'],
+            'ticktime': data.get('ticktime', ''),
+            'cmdr': data.get('cmdr'),
+            'starsystem': data.get('StarSystem'),
+            'systemaddress': data.get('SystemAddress'),
+            'raw_json': raw_json,
+            'raw_json_compressed': raw_json_compressed,
+            'content_hash': content_hash(data)
+        }
 
 class MarketBuyEvent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False, index=True)
     stock = db.Column(db.Integer)
     stock_bracket = db.Column(db.Integer)
     value = db.Column(db.Integer)
@@ -36,7 +57,7 @@ class MarketBuyEvent(db.Model):
 
 class MarketSellEvent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False, index=True)
     demand = db.Column(db.Integer)
     demand_bracket = db.Column(db.Integer)
     profit = db.Column(db.Integer)
@@ -45,14 +66,19 @@ class MarketSellEvent(db.Model):
 
 class MissionCompletedEvent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False, index=True)
     awarding_faction = db.Column(db.String(128))
     mission_name = db.Column(db.String(128))
     reward = db.Column(db.Integer)
 
 class MissionCompletedInfluence(db.Model):
+    __table_args__ = (
+        # "Our faction" influence: equality on the resolved id instead of a LIKE over faction_name
+        db.Index('ix_mission_completed_influence_watched_mission', 'watched_faction', 'mission_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    mission_id = db.Column(db.Integer, db.ForeignKey('mission_completed_event.id'), nullable=False)
+    mission_id = db.Column(db.Integer, db.ForeignKey('mission_completed_event.id'), nullable=False, index=True)
     system = db.Column(db.String(128))
     influence = db.Column(db.String(8))
     trend = db.Column(db.String(32))
@@ -61,6 +87,7 @@ class MissionCompletedInfluence(db.Model):
     reputation_trend = db.Column(db.String(32))
     effect = db.Column(db.String(128))
     effect_trend = db.Column(db.String(32))
+    watched_faction = db.Column(db.Integer)  # see watched_factions.py, NULL for other factions
 
 class Activity(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -96,7 +123,7 @@ class Faction(db.Model):
 
 class FactionKillBondEvent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False, index=True)
     killer_ship = db.Column(db.String(64))
     awarding_faction = db.Column(db.String(128))
     victim_faction = db.Column(db.String(128))
@@ -104,26 +131,31 @@ class FactionKillBondEvent(db.Model):
 
 class MissionFailedEvent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False, index=True)
     mission_name = db.Column(db.String(128))
     awarding_faction = db.Column(db.String(128))
     fine = db.Column(db.Integer)
 
 class MultiSellExplorationDataEvent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False, index=True)
     total_earnings = db.Column(db.Integer)
 
 class RedeemVoucherEvent(db.Model):
+    __table_args__ = (
+        # Covers the bounty/combat bond sums without touching the table
+        db.Index('ix_redeem_voucher_event_type_event_id_amount', 'type', 'event_id', 'amount'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False, index=True)
     amount = db.Column(db.Integer)
     faction = db.Column(db.String(128))
     type = db.Column(db.String(128))
 
 class SellExplorationDataEvent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False, index=True)
     earnings = db.Column(db.Integer)
 
 class Cmdr(db.Model):
@@ -144,11 +176,12 @@ class Cmdr(db.Model):
 
 class CommitCrimeEvent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    event_id = db.Column(db.Integer, db.ForeignKey("event.id"), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey("event.id"), nullable=False, index=True)
     crime_type = db.Column(db.String(128))
     faction = db.Column(db.String(128))
     victim = db.Column(db.String(128))
     fine = db.Column(db.Integer)
+    bounty = db.Column(db.Integer)
 
 class Objective(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -184,17 +217,159 @@ class ObjectiveTargetSettlement(db.Model):
 
 class SyntheticGroundCZ(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False, index=True)
     cz_type = db.Column(db.String(64))
     settlement = db.Column(db.String(128))
     faction = db.Column(db.String(128))
     cmdr = db.Column(db.String(64))
     station_faction_name = db.Column(db.String(128))
+    watched_faction = db.Column(db.Integer, index=True)
 
 class SyntheticCZ(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False, index=True)
     cz_type = db.Column(db.String(64))
     faction = db.Column(db.String(128))
     cmdr = db.Column(db.String(64))
     station_faction_name = db.Column(db.String(128))
+    watched_faction = db.Column(db.Integer, index=True)
+
+class CmdrDailyRollup(db.Model):
+    """Per-cmdr, per-UTC-day totals of the summary metrics, maintained at ingest by rollups.py."""
+    __table_args__ = (
+        # Period filters on day; the primary key serves per-cmdr lookups
+        db.Index('ix_cmdr_daily_rollup_day_cmdr', 'day', 'cmdr'),
+    )
+
+    cmdr = db.Column(db.String(64), primary_key=True)
+    day = db.Column(db.String(10), primary_key=True)  # YYYY-MM-DD
+    event_count = db.Column(db.Integer, nullable=False, default=0)
+    market_buy_value = db.Column(db.BigInteger, nullable=False, default=0)
+    market_buy_count = db.Column(db.Integer, nullable=False, default=0)
+    market_sell_value = db.Column(db.BigInteger, nullable=False, default=0)
+    market_sell_count = db.Column(db.Integer, nullable=False, default=0)
+    missions_completed = db.Column(db.Integer, nullable=False, default=0)
+    missions_failed = db.Column(db.Integer, nullable=False, default=0)
+    # *_count columns hold the number of source rows with a value, so "no data" stays distinguishable from 0
+    bounty_vouchers = db.Column(db.BigInteger, nullable=False, default=0)
+    bounty_voucher_count = db.Column(db.Integer, nullable=False, default=0)
+    combat_bonds = db.Column(db.BigInteger, nullable=False, default=0)
+    combat_bond_count = db.Column(db.Integer, nullable=False, default=0)
+    exploration_sales = db.Column(db.BigInteger, nullable=False, default=0)
+    exploration_sale_count = db.Column(db.Integer, nullable=False, default=0)
+    eic_influence = db.Column(db.Integer, nullable=False, default=0)
+    eic_influence_count = db.Column(db.Integer, nullable=False, default=0)
+    bounty_fines = db.Column(db.BigInteger, nullable=False, default=0)
+    bounty_fine_count = db.Column(db.Integer, nullable=False, default=0)
+
+class CmdrActivity(db.Model):
+    """First and last event timestamp per cmdr, maintained at ingest by rollups.py."""
+    cmdr = db.Column(db.String(64), primary_key=True)
+    first_seen = db.Column(db.String(64), nullable=False)
+    last_seen = db.Column(db.String(64), nullable=False)
+    event_count = db.Column(db.Integer, nullable=False, default=0)
+
+class CmdrTickRollup(db.Model):
+    """Per-tick totals by cmdr, faction and system, maintained at ingest by rollups.py."""
+    tickid = db.Column(db.String(64), primary_key=True)
+    cmdr = db.Column(db.String(64), primary_key=True)
+    faction = db.Column(db.String(128), primary_key=True)  # '' for metrics without a faction
+    system = db.Column(db.String(128), primary_key=True)  # event.starsystem
+    event_count = db.Column(db.Integer, nullable=False, default=0)
+    market_buy_value = db.Column(db.BigInteger, nullable=False, default=0)
+    market_buy_count = db.Column(db.Integer, nullable=False, default=0)
+    market_sell_value = db.Column(db.BigInteger, nullable=False, default=0)
+    market_sell_count = db.Column(db.Integer, nullable=False, default=0)
+    missions_completed = db.Column(db.Integer, nullable=False, default=0)
+    missions_failed = db.Column(db.Integer, nullable=False, default=0)
+    bounty_vouchers = db.Column(db.BigInteger, nullable=False, default=0)
+    bounty_voucher_count = db.Column(db.Integer, nullable=False, default=0)
+    combat_bonds = db.Column(db.BigInteger, nullable=False, default=0)
+    combat_bond_count = db.Column(db.Integer, nullable=False, default=0)
+    exploration_sales = db.Column(db.BigInteger, nullable=False, default=0)
+    exploration_sale_count = db.Column(db.Integer, nullable=False, default=0)
+    influence = db.Column(db.Integer, nullable=False, default=0)
+    influence_count = db.Column(db.Integer, nullable=False, default=0)
+    eic_influence = db.Column(db.Integer, nullable=False, default=0)
+    eic_influence_count = db.Column(db.Integer, nullable=False, default=0)
+    bounty_fines = db.Column(db.BigInteger, nullable=False, default=0)
+    bounty_fine_count = db.Column(db.Integer, nullable=False, default=0)
+
+class ConflictState(db.Model):
+    """Latest observation of every conflict per tick and system, maintained at ingest by conflicts.py."""
+    tickid = db.Column(db.String(64), primary_key=True)
+    system = db.Column(db.String(128), primary_key=True)
+    faction1 = db.Column(db.String(128), primary_key=True)  # '' if the journal has no name
+    faction2 = db.Column(db.String(128), primary_key=True)
+    system_address = db.Column(db.BigInteger)
+    war_type = db.Column(db.String(32))
+    status = db.Column(db.String(32))
+    faction1_stake = db.Column(db.String(128))
+    faction1_won_days = db.Column(db.Integer)
+    faction2_stake = db.Column(db.String(128))
+    faction2_won_days = db.Column(db.Integer)
+    last_seen = db.Column(db.String(64), nullable=False)  # timestamp of the observation
+    event_type = db.Column(db.String(64))
+    ticktime = db.Column(db.String(64))
+    watched_faction = db.Column(db.Integer)  # of faction1, else faction2; NULL if neither is watched
+
+class ConflictCmdr(db.Model):
+    """Cmdrs who reported a conflict during a tick."""
+    tickid = db.Column(db.String(64), primary_key=True)
+    system = db.Column(db.String(128), primary_key=True)
+    faction1 = db.Column(db.String(128), primary_key=True)
+    faction2 = db.Column(db.String(128), primary_key=True)
+    cmdr = db.Column(db.String(64), primary_key=True)
+
+class Tick(db.Model):
+    """One row per tickid with the range of its events, maintained at ingest by ticks.py."""
+    __table_args__ = (
+        db.Index('ix_tick_first_seen', 'first_seen'),
+        db.Index('ix_tick_last_seen', 'last_seen'),
+    )
+
+    tickid = db.Column(db.String(64), primary_key=True)
+    ticktime = db.Column(db.String(64))
+    first_seen = db.Column(db.String(64), nullable=False)  # earliest event timestamp
+    last_seen = db.Column(db.String(64), nullable=False)  # latest event timestamp
+    event_count = db.Column(db.Integer, nullable=False, default=0)
+    galaxy_tick = db.Column(db.String(64))  # Zoy galaxy tick time when the tick was first seen
+
+class WatchedFaction(db.Model):
+    """The WATCHED_FACTIONS list the stored watched_faction ids were resolved with."""
+    id = db.Column(db.Integer, primary_key=True)  # position in the list, from 1
+    name = db.Column(db.String(128), nullable=False)
+
+class DataGeneration(db.Model):
+    """Single row counting data changes, bumped in the writing transaction; keys the response cache."""
+    id = db.Column(db.Integer, primary_key=True)
+    generation = db.Column(db.Integer, nullable=False, default=0)
+
+class SystemState(db.Model):
+    """Latest observation of every system, maintained at ingest by systems.py."""
+    system_address = db.Column(db.BigInteger, primary_key=True)
+    system = db.Column(db.String(128))
+    population = db.Column(db.BigInteger)
+    controlling_faction = db.Column(db.String(128))
+    controlling_faction_state = db.Column(db.String(64))
+    allegiance = db.Column(db.String(64))
+    government = db.Column(db.String(64))
+    security = db.Column(db.String(64))
+    economy = db.Column(db.String(64))
+    last_seen = db.Column(db.String(64), nullable=False)  # timestamp of the observation
+    tickid = db.Column(db.String(64))
+    ticktime = db.Column(db.String(64))
+    event_type = db.Column(db.String(64))
+
+class SystemFaction(db.Model):
+    """Factions of the latest observation of a system; states are JSON lists of state names."""
+    system_address = db.Column(db.BigInteger, primary_key=True)
+    faction = db.Column(db.String(128), primary_key=True)
+    influence = db.Column(db.Float)
+    state = db.Column(db.String(64))
+    allegiance = db.Column(db.String(64))
+    government = db.Column(db.String(64))
+    happiness = db.Column(db.String(64))
+    active_states = db.Column(db.Text)
+    pending_states = db.Column(db.Text)
+    recovering_states = db.Column(db.Text)
@@ -0,0 +1,195 @@
+"""
+Time filters of the read endpoints.
+
+?period= (cw, lw, cm, lm, 2m, y, cd, ld, all), ?start=&end= (inclusive
+YYYY-MM-DD dates), ?tick= (current, previous or a tickid) and
+?tick_from=&tick_to= (a range of ticks, resolved through the tick registry)
+resolve to one Period. Statements only refer to it through bound parameters,
+so their SQL text stays the same from day to day and SQLite and SQLAlchemy
+compile each of them once.
+"""
+import json
+from datetime import datetime, timedelta
+from dateutil.relativedelta import relativedelta
+from ticks import latest_ticks, tick_range
+
+PERIODS = ["all", "cw", "lw", "cm", "lm", "2m", "y", "cd", "ld"]
+
+
+# Conditions on a tickid column by Period.tick; a range binds its tickids as one JSON array
+TICK_CONDITIONS = {
+    "tickid": "{} = :tickid",
+    "tickids": "{} IN (SELECT value FROM json_each(:tickids))",
+}
+
+
+class PeriodError(ValueError):
+    """Invalid period argument, answered with 400."""
+
+
+def tick_sql(tick, column, timestamp=None):
+    """
+    Condition of a Period.tick kind on the given tickid column. For a range on an event
+    table, the timestamp column is bounded by the range's first and last event as well,
+    so the timestamp index can narrow the rows the tickid list is checked against.
+    """
+    condition = TICK_CONDITIONS[tick].format(column)
+    if tick == "tickids" and timestamp:
+        condition = f"{timestamp} BETWEEN :tick_start AND :tick_end AND {condition}"
+    return condition
+
+
+def period_range(period, today=None):
+    """(start, end) of a named period as datetimes; (None, None) for all time and unknown names."""
+    today = today or datetime.utcnow()
+    start = end = None
+
+    if period == "cw":  # current week
+        start = today - timedelta(days=today.weekday())
+        end = start + timedelta(days=6)
+    elif period == "lw":  # last week
+        end = today - timedelta(days=today.weekday() + 1)
+        start = end - timedelta(days=6)
+    elif period == "cm":  # current month
+        start = today.replace(day=1)
+        end = (start + relativedelta(months=1)) - timedelta(days=1)
+    elif period == "lm":  # last month
+        this_month_start = today.replace(day=1)
+        start = this_month_start - relativedelta(months=1)
+        end = this_month_start - timedelta(days=1)
+    elif period == "2m":  # last two full months
+        this_month_start = today.replace(day=1)
+        start = this_month_start - relativedelta(months=2)
+        end = this_month_start - timedelta(days=1)
+    elif period == "y":  # current year
+        start = today.replace(month=1, day=1)
+        end = today.replace(month=12, day=31)
+    elif period == "cd":  # current day (today)
+        start = end = today
+    elif period == "ld":  # last day (yesterday)
+        start = end = today - timedelta(days=1)
+
+    return start, end
+
+
+class Period:
+    """A day range (start/end, both None for all time), a single tick or a range of ticks."""
+
+    def __init__(self, start=None, end=None, tickid=None, tickids=None, tick_start=None, tick_end=None):
+        self.start = start
+        self.end = end
+        self.tickid = tickid
+        self.tickids = tickids
+        # First and last event timestamp of a tick range, from the tick registry
+        self.tick_start = tick_start
+        self.tick_end = tick_end
+
+    @classmethod
+    def named(cls, period, today=None):
+        return cls(*period_range(period, today))
+
+    @property
+    def tick(self):
+        """"tickid" for a single tick, "tickids" for a range of ticks, otherwise None."""
+        if self.tickid is not None:
+            return "tickid"
+        if self.tickids is not None:
+            return "tickids"
+        return None
+
+    @property
+    def dated(self):
+        return self.tick is None and bool(self.start and self.end)
+
+    @property
+    def all_time(self):
+        return self.tick is None and not self.dated
+
+    @property
+    def label(self):
+        if self.tickid is not None:
+            return f"Tick {self.tickid}"
+        if self.tickids is not None:
+            return f"Ticks {self.tickids[0]} to {self.tickids[-1]}" if self.tickids else "No Ticks"
+        if self.dated:
+            return f"{self.start:%Y-%m-%d} to {self.end:%Y-%m-%d}"
+        return "All Time"
+
+    def params(self):
+        """
+        Bound parameters: tickid, tickids with tick_start/tick_end, or start/end
+        timestamps and start_day/end_day dates.
+        """
+        if self.tickid is not None:
+            return {"tickid": self.tickid}
+        if self.tickids is not None:
+            return {"tickids": json.dumps(self.tickids), "tick_start": self.tick_start, "tick_end": self.tick_end}
+        if self.dated:
+            return {
+                "start": self.start.strftime("%Y-%m-%dT00:00:00Z"), "end": self.end.strftime("%Y-%m-%dT23:59:59Z"),
+                "start_day": self.start.strftime("%Y-%m-%d"), "end_day": self.end.strftime("%Y-%m-%d"),
+            }
+        return {}
+
+    def sql(self, timestamp="e.timestamp", tickid="e.tickid"):
+        """WHERE condition on the given event columns, using the parameters of params()."""
+        if self.tick:
+            return tick_sql(self.tick, tickid, timestamp)
+        if self.dated:
+            return f"{timestamp} BETWEEN :start AND :end"
+        return "1=1"
+
+
+def _parse_day(value, name):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise PeriodError(f"{name} must be a date (YYYY-MM-DD)")
+
+
+def resolve_tickid(session, tick):
+    """
+    Turns a ?tick= value into a tickid: "current" and "previous" are the two most
+    recent ticks in the tick registry, anything else is taken as a tickid. Returns
+    None if the requested tick is not known yet.
+    """
+    if tick not in ("current", "previous"):
+        return tick
+    ticks = latest_ticks(session, 2)
+    index = 0 if tick == "current" else 1
+    return ticks[index] if len(ticks) > index else None
+
+
+def resolve_period(session, args):
+    """
+    Period of a request's query arguments: ?tick= takes precedence over
+    ?tick_from=&tick_to=, then ?start=/?end=, then ?period= (default all). Returns
+    None if a requested tick is not known yet; raises PeriodError for malformed
+    dates and ranges.
+    """
+    tick = args.get("tick")
+    if tick:
+        tickid = resolve_tickid(session, tick)
+        return Period(tickid=tickid) if tickid is not None else None
+
+    if args.get("tick_from") or args.get("tick_to"):
+        if not (args.get("tick_from") and args.get("tick_to")):
+            raise PeriodError("tick_from and tick_to must be given together")
+        first, last = resolve_tickid(session, args["tick_from"]), resolve_tickid(session, args["tick_to"])
+        ticks = tick_range(session, first, last) if first is not None and last is not None else None
+        if ticks is None:
+            return None
+        if not ticks:
+            raise PeriodError("tick_to must not be before tick_from")
+        return Period(tickids=[t.tickid for t in ticks],
+                      tick_start=min(t.first_seen for t in ticks), tick_end=max(t.last_seen for t in ticks))
+
+    if args.get("start") or args.get("end"):
+        if not (args.get("start") and args.get("end")):
+            raise PeriodError("start and end must be given together")
+        start, end = _parse_day(args["start"], "start"), _parse_day(args["end"], "end")
+        if end < start:
+            raise PeriodError("end must not be before start")
+        return Period(start, end)
+
+    return Period.named(args.get("period", "all"))
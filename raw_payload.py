@@ -0,0 +1,62 @@
+import ast
+import hashlib
+import json
+import os
+import zlib
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Payloads with at least this many bytes of UTF-8 JSON are stored zlib-compressed in event.raw_json_compressed.
+# 0 disables compression.
+RAW_JSON_COMPRESS_THRESHOLD = int(os.getenv("RAW_JSON_COMPRESS_THRESHOLD", "0"))
+RAW_JSON_COMPRESS_LEVEL = int(os.getenv("RAW_JSON_COMPRESS_LEVEL", "6"))
+
+# Enrichments that BGS-Tally may fill differently when it retries a batch across a tick
+HASH_EXCLUDED_FIELDS = frozenset({"tickid", "ticktime"})
+
+
+def dump_raw_json(data):
+    """Canonical JSON text of an event payload."""
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def encode_raw_json(data, threshold=None):
+    """
+    Returns (raw_json, raw_json_compressed) for an event payload.
+    Exactly one of both is set, depending on the compression threshold.
+    """
+    if threshold is None:
+        threshold = RAW_JSON_COMPRESS_THRESHOLD
+    payload = dump_raw_json(data)
+    if threshold:
+        # The threshold is in bytes; non-ASCII names take more than one byte per character
+        encoded = payload.encode("utf-8")
+        if len(encoded) >= threshold:
+            return None, zlib.compress(encoded, RAW_JSON_COMPRESS_LEVEL)
+    return payload, None
+
+
+def content_hash(data):
+    """
+    Stable SHA-256 identity of a journal event: cmdr, timestamp, event and all other journal fields.
+    A retried batch produces the same hashes, so duplicates can be dropped by the unique index.
+    """
+    identity = {k: v for k, v in data.items() if k not in HASH_EXCLUDED_FIELDS}
+    return hashlib.sha256(dump_raw_json(identity).encode("utf-8")).hexdigest()
+
+
+def decode_raw_json(raw_json, raw_json_compressed=None):
+    """
+    Parses a stored payload back into a dict.
+    Rows written before the switch to JSON still hold a Python repr and fall back to ast.literal_eval.
+    """
+    if raw_json_compressed is not None:
+        return json.loads(zlib.decompress(raw_json_compressed))
+    if raw_json is None:
+        return None
+    try:
+        return json.loads(raw_json)
+    except ValueError:
+        return ast.literal_eval(raw_json)
+
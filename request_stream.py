@@ -0,0 +1,190 @@
+import codecs
+import json
+import os
+import zlib
+from itertools import islice
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Upper bound for a request body after decompression
+MAX_DECOMPRESSED_BODY_BYTES = int(os.getenv("MAX_DECOMPRESSED_BODY_BYTES", str(32 * 1024 * 1024)))
+SUPPORTED_CONTENT_ENCODINGS = ("gzip", "deflate")
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_READ_SIZE = 64 * 1024
+
+
+class BodyTooLargeError(ValueError):
+    """The decompressed request body exceeds MAX_DECOMPRESSED_BODY_BYTES."""
+
+
+class UnsupportedEncodingError(ValueError):
+    """The request uses a Content-Encoding other than gzip, deflate or identity."""
+
+
+class DecompressingStream:
+    """
+    File-like reader that inflates a gzip or deflate stream on the fly.
+    Output is produced in bounded steps, so a decompression bomb fails at the size cap
+    instead of being expanded into memory first.
+    """
+
+    def __init__(self, raw, encoding, limit=MAX_DECOMPRESSED_BODY_BYTES):
+        self._raw = raw
+        self._encoding = encoding
+        # gzip: gzip header; deflate: zlib header, raw deflate is tried if that fails
+        self._inflater = zlib.decompressobj(31 if encoding == "gzip" else 15)
+        self._started = False
+        self._pending = b""
+        self._buffer = b""
+        self._limit = limit
+        self._total = 0
+        self._eof = False
+
+    def _inflate_step(self):
+        if not self._pending:
+            self._pending = self._raw.read(_READ_SIZE)
+            if not self._pending:
+                if not self._inflater.eof:
+                    raise ValueError("Truncated compressed request body")
+                self._eof = True
+                return b""
+        try:
+            out = self._inflater.decompress(self._pending, _READ_SIZE)
+        except zlib.error:
+            if self._encoding != "deflate" or self._started:
+                raise ValueError("Invalid compressed request body")
+            self._inflater = zlib.decompressobj(-15)
+            out = self._inflater.decompress(self._pending, _READ_SIZE)
+        self._started = True
+        self._pending = self._inflater.unconsumed_tail
+        if self._inflater.eof:
+            self._pending = b""
+        self._total += len(out)
+        if self._total > self._limit:
+            raise BodyTooLargeError(f"Decompressed request body exceeds {self._limit} bytes")
+        return out
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            parts = [self._buffer]
+            while not self._eof:
+                parts.append(self._inflate_step())
+            self._buffer = b""
+            return b"".join(parts)
+        while not self._eof and len(self._buffer) < size:
+            self._buffer += self._inflate_step()
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def request_body_stream(request):
+    """
+    Returns a binary stream of the request body, decompressed according to Content-Encoding.
+    """
+    encoding = (request.headers.get("Content-Encoding") or "identity").strip().lower()
+    if encoding == "identity":
+        return request.stream
+    if encoding not in SUPPORTED_CONTENT_ENCODINGS:
+        raise UnsupportedEncodingError(f"Unsupported Content-Encoding: {encoding}")
+    return DecompressingStream(request.stream, encoding)
+
+
+def load_json_body(request):
+    """request.get_json() replacement that understands compressed bodies."""
+    body = request_body_stream(request).read()
+    if not body:
+        raise ValueError("Empty request body")
+    return json.loads(body)
+
+
+def check_json_array(body):
+    """
+    Cheap check of a decoded body that is stored unparsed: raises ValueError like
+    iter_json_array() unless the first non-whitespace byte opens a JSON array.
+    """
+    if not body.lstrip(_WHITESPACE.encode()).startswith(b"["):
+        raise ValueError("Expected a JSON array")
+    return body
+
+
+def iter_json_array(stream, read_size=_READ_SIZE):
+    """
+    Yields the elements of a top-level JSON array read incrementally from a binary stream.
+    Only the element being parsed is held in memory, not the whole body.
+    Raises ValueError on malformed input.
+    """
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    eof = False
+    state = "start"  # start -> first -> (element -> separator)* -> done
+
+    def fill():
+        nonlocal buf, pos, eof
+        data = stream.read(read_size)
+        if not data:
+            eof = True
+            buf = buf[pos:] + utf8.decode(b"", final=True)
+        else:
+            buf = buf[pos:] + utf8.decode(data)
+        pos = 0
+
+    while True:
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        if pos >= len(buf):
+            if eof:
+                if state != "done":
+                    raise ValueError("Unexpected end of JSON array")
+                return
+            fill()
+            continue
+
+        char = buf[pos]
+        if state == "start":
+            if char != "[":
+                raise ValueError("Expected a JSON array")
+            pos += 1
+            state = "first"
+        elif state in ("first", "element"):
+            if state == "first" and char == "]":
+                pos += 1
+                state = "done"
+                continue
+            try:
+                value, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise ValueError("Malformed JSON array element")
+                fill()
+                continue
+            if end == len(buf) and not eof:
+                # A number or literal may continue in the next read
+                fill()
+                continue
+            pos = end
+            state = "separator"
+            yield value
+        elif state == "separator":
+            if char == ",":
+                state = "element"
+            elif char == "]":
+                state = "done"
+            else:
+                raise ValueError(f"Unexpected character {char!r} in JSON array")
+            pos += 1
+        else:
+            raise ValueError("Unexpected data after JSON array")
+
+
+def iter_chunks(iterable, size):
+    """Groups an iterable into lists of at most size items."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
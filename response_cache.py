@@ -0,0 +1,181 @@
+"""
+Response cache and ETags of the read endpoints.
+
+Both are keyed on the data generation, a counter in the single row of the
+data_generation table. Every write bumps it in its own transaction: ingest,
+activities, objectives and the Inara sync in the server, dedup_events.py,
+migrations and the --rebuild runs of the offline tools. Each request reads the
+counter once, so all server processes (e.g. gunicorn workers) see a write as
+soon as it is committed, whichever process made it. The cached bodies
+themselves stay per process.
+"""
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+from flask import g, request, jsonify, Response
+from sqlalchemy import text
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Upper bound for the cached response bodies in bytes (0 disables the cache)
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized JSON responses, capped by total body size.
+    Every entry is tagged with the data generation it was computed in; once a
+    request sees a newer generation in the database, sync() drops all entries,
+    so an entry is never served after the data behind it has changed.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.generation = None
+        self._entries = OrderedDict()  # key -> (generation, body)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def sync(self, generation):
+        """Called with the stored generation of every request; a new one drops all entries."""
+        with self._lock:
+            if generation != self.generation:
+                self.generation = generation
+                self._entries.clear()
+                self._bytes = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != self.generation:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, generation, body):
+        """Stores a body computed in the given generation, unless a write happened meanwhile."""
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+            self._entries[key] = (generation, body)
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.max_bytes > 0,
+                "generation": self.generation,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_BYTES)
+
+def bump_data_generation(connection):
+    """
+    Starts a new data generation, invalidating the cached responses of every server
+    process. Runs in the caller's transaction (session or connection), before its commit.
+    """
+    connection.execute(text("""
+        INSERT INTO data_generation (id, generation) VALUES (1, 1)
+        ON CONFLICT (id) DO UPDATE SET generation = generation + 1
+    """))
+
+
+def current_data_generation():
+    """The stored data generation, read once per request."""
+    if "data_generation" not in g:
+        from models import db
+        g.data_generation = db.session.execute(
+            text("SELECT generation FROM data_generation WHERE id = 1")
+        ).scalar() or 0
+        response_cache.sync(g.data_generation)
+    return g.data_generation
+
+
+def cached_response(f):
+    """
+    Serves a GET endpoint from the response cache. The key is the path, the
+    query arguments and the UTC day, because relative periods such as cw or cd
+    move with the date. Only 200 responses are cached.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if response_cache.max_bytes <= 0:
+            return f(*args, **kwargs)
+
+        generation = current_data_generation()
+        key = (request.path, tuple(sorted(request.args.items(multi=True))), datetime.utcnow().strftime("%Y-%m-%d"))
+        body = response_cache.get(key)
+        if body is not None:
+            return Response(body, mimetype="application/json", headers={"X-Cache": "HIT"})
+
+        response = f(*args, **kwargs)
+        # Views return either a response or (response, status)
+        if isinstance(response, Response) and response.status_code == 200 and response.is_json:
+            response_cache.put(key, generation, response.get_data())
+            response.headers["X-Cache"] = "MISS"
+        return response
+    return decorated
+
+
+def data_etag():
+    """Strong ETag of the current data generation, valid for the current UTC day."""
+    return f"{current_data_generation()}-{datetime.utcnow():%Y%m%d}"
+
+
+def etag_response(bypass=None):
+    """
+    Conditional GET for endpoints whose response only changes with the data
+    generation and the date. A matching If-None-Match is answered with 304
+    before the view, and thus its SQL, runs. bypass(request.args) may exclude
+    requests that also depend on the time of day.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if bypass and bypass(request.args):
+                return f(*args, **kwargs)
+
+            etag = data_etag()
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+                response.set_etag(etag)
+                return response
+
+            response = f(*args, **kwargs)
+            if isinstance(response, Response) and response.status_code == 200:
+                response.set_etag(etag)
+            return response
+        return decorated
+    return decorator
+
+
+def register_response_cache_routes(app, require_api_key):
+
+    @app.route("/api/cache/stats", methods=["GET"])
+    @require_api_key
+    def response_cache_stats():
+        return jsonify(response_cache.stats())
@@ -0,0 +1,141 @@
+"""
+Rollup tables for the summary endpoints.
+
+cmdr_daily_rollup holds one row per cmdr and UTC day, cmdr_tick_rollup one row
+per tick, cmdr, faction and system, each with the totals of the metrics
+registered in metrics.py.
+cmdr_activity keeps the first and last event timestamp of every cmdr.
+ingest_events() adds the events of each batch in the same transaction; the
+rebuild recomputes the tables from the raw event tables with the very same
+statements.
+
+Usage:
+    python rollups.py --rebuild [--db instance/bgs_data.db]
+"""
+import argparse
+import time
+from sqlalchemy import create_engine, text
+from metrics import METRICS, DAILY_METRICS, TICK_METRICS
+from response_cache import bump_data_generation
+
+DB_PATH = "instance/bgs_data.db"
+
+
+class Rollup:
+    """
+    An aggregate table kept in step with the event tables.
+    keys maps each key column to its default expression, sources is a list of
+    (FROM clause joined to event e, extra condition, {column: expression});
+    columns a source does not mention are 0, keys fall back to their default.
+    Columns are summed unless aggregates maps them to MIN or MAX.
+    """
+
+    def __init__(self, table, keys, columns, sources, condition="e.cmdr IS NOT NULL", aggregates=None):
+        self.table = table
+        self.keys = keys
+        self.columns = columns
+        self.sources = sources
+        self.condition = condition
+        self.aggregates = aggregates or {}
+        self.sql = text(self._build_sql())
+
+    def _update(self, column):
+        aggregate = self.aggregates.get(column, "SUM")
+        if aggregate == "SUM":
+            return f"{column} = {column} + excluded.{column}"
+        # SQLite's scalar MIN()/MAX() of the stored and the incoming value
+        return f"{column} = {aggregate}({column}, excluded.{column})"
+
+    def _build_sql(self):
+        selects = []
+        for source, condition, values in self.sources:
+            keys = ", ".join(f"{values.get(key, default)} AS {key}" for key, default in self.keys.items())
+            columns = ", ".join(f"{values.get(column, '0')} AS {column}" for column in self.columns)
+            where = f"{self.condition} AND e.id BETWEEN :first_id AND :last_id"
+            if condition:
+                where += f" AND {condition}"
+            selects.append(f"SELECT {keys}, {columns} FROM {source} WHERE {where}")
+
+        key_list = ", ".join(self.keys)
+        column_list = ", ".join(self.columns)
+        sums = ", ".join(f"{self.aggregates.get(column, 'SUM')}({column})" for column in self.columns)
+        updates = ", ".join(self._update(column) for column in self.columns)
+        # "WHERE true" keeps SQLite from reading ON CONFLICT as a join constraint
+        return (
+            f"INSERT INTO {self.table} ({key_list}, {column_list}) "
+            f"SELECT {key_list}, {sums} FROM ({' UNION ALL '.join(selects)}) WHERE true GROUP BY {key_list} "
+            f"ON CONFLICT ({key_list}) DO UPDATE SET {updates}"
+        )
+
+
+def metric_rollup(table, keys, metrics, condition="e.cmdr IS NOT NULL"):
+    """A rollup of registered metrics: one SELECT per raw source, plus a count column per counted metric."""
+    columns, sources = [], {}
+    for name in metrics:
+        metric = METRICS[name]
+        columns += [name, metric.count] if metric.count else [name]
+        for source, extra, value, faction in metric.sources:
+            values = sources.setdefault((source, extra), {})
+            if faction:
+                values["faction"] = f"COALESCE({faction}, '')"
+            values[name] = value if value == "1" else f"COALESCE({value}, 0)"
+            if metric.count:
+                values[metric.count] = f"{value} IS NOT NULL"
+    return Rollup(table, keys, columns, [(s, e, v) for (s, e), v in sources.items()], condition)
+
+
+DAILY_ROLLUP = metric_rollup(
+    "cmdr_daily_rollup", {"cmdr": "e.cmdr", "day": "substr(e.timestamp, 1, 10)"}, DAILY_METRICS
+)
+
+TICK_ROLLUP = metric_rollup(
+    "cmdr_tick_rollup",
+    {"tickid": "e.tickid", "cmdr": "e.cmdr", "faction": "''", "system": "COALESCE(e.starsystem, '')"},
+    TICK_METRICS,
+    condition="e.cmdr IS NOT NULL AND e.tickid IS NOT NULL",
+)
+
+ACTIVITY_ROLLUP = Rollup(
+    "cmdr_activity",
+    keys={"cmdr": "e.cmdr"},
+    columns=["first_seen", "last_seen", "event_count"],
+    sources=[("event e", None, {"first_seen": "e.timestamp", "last_seen": "e.timestamp", "event_count": "1"})],
+    aggregates={"first_seen": "MIN", "last_seen": "MAX"},
+)
+
+ROLLUPS = [DAILY_ROLLUP, TICK_ROLLUP, ACTIVITY_ROLLUP]
+
+
+def update_rollups(session, first_id, last_id):
+    """
+    Adds the events with ids first_id..last_id and their child rows to the rollups.
+    Runs in the caller's transaction. The range must only contain events that were
+    inserted in that transaction, which holds because SQLite serialises writers.
+    """
+    for rollup in ROLLUPS:
+        session.execute(rollup.sql, {"first_id": first_id, "last_id": last_id})
+
+
+def rebuild_rollups(connection, rollups=None):
+    """Recomputes the given rollups (default: all) from the raw event tables."""
+    for rollup in rollups or ROLLUPS:
+        connection.execute(text(f"DELETE FROM {rollup.table}"))
+        connection.execute(rollup.sql, {"first_id": 0, "last_id": 2 ** 63 - 1})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--rebuild", action="store_true", required=True)
+    args = parser.parse_args()
+
+    from migrations import run_migrations
+    engine = create_engine(f"sqlite:///{args.db}")
+    run_migrations(engine)
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        rebuild_rollups(connection)
+        bump_data_generation(connection)
+        counts = {r.table: connection.execute(text(f"SELECT COUNT(*) FROM {r.table}")).scalar() for r in ROLLUPS}
+    summary = ", ".join(f"{table}: {rows} rows" for table, rows in counts.items())
+    print(f"✅ Rollups rebuilt ({summary}) in {time.perf_counter() - started:.1f}s")
@@ -1,5 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask import Flask
+from migrations import run_migrations
 
 app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///bgs_data.db'
@@ -17,3 +18,5 @@ class User(db.Model):
 with app.app_context():
     db.create_all()
     print("✅ Tabelle 'users' wurde erstellt.")
+    version = run_migrations(db.engine)
+    print(f"✅ BGS-Schema auf Version {version} migriert.")
@@ -0,0 +1,192 @@
+"""
+Latest known state of every system, taken from FSDJump, Location and
+CarrierJump events.
+
+system_state holds one row per system address with the controlling faction,
+population, allegiance, government, security and economy of the latest
+observation, system_faction the factions of that observation with their
+influence and active, pending and recovering states. ingest_events() updates
+both in the same transaction as the event insert; an observation only
+replaces a stored one if it is newer, and then replaces its whole faction
+list. GET /api/systems/<address> reads them by primary key. The rebuild
+recomputes both tables from the stored payloads.
+
+Usage:
+    python systems.py --rebuild [--db instance/bgs_data.db]
+"""
+import argparse
+import json
+import time
+from flask import jsonify
+from sqlalchemy import bindparam, create_engine, delete, insert, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models import SystemState, SystemFaction
+from raw_payload import decode_raw_json
+from response_cache import bump_data_generation, cached_response, etag_response
+
+DB_PATH = "instance/bgs_data.db"
+
+# Journal events that describe the system the cmdr is in
+SYSTEM_EVENTS = ("FSDJump", "Location", "CarrierJump")
+
+
+def _localised(data, key):
+    return data.get(f"{key}_Localised") or data.get(key)
+
+
+def _state_names(states):
+    return json.dumps([s.get("State") for s in states or [] if s.get("State")])
+
+
+def system_rows(event_dict):
+    """(system_state row, system_faction rows) of one event, or None if it describes no system."""
+    address = event_dict.get("SystemAddress")
+    if event_dict.get("event") not in SYSTEM_EVENTS or address is None:
+        return None
+    controlling = event_dict.get("SystemFaction") or {}
+    state = {
+        "system_address": address,
+        "system": event_dict.get("StarSystem"),
+        "population": event_dict.get("Population"),
+        "controlling_faction": controlling.get("Name"),
+        "controlling_faction_state": controlling.get("FactionState"),
+        "allegiance": event_dict.get("SystemAllegiance"),
+        "government": _localised(event_dict, "SystemGovernment"),
+        "security": _localised(event_dict, "SystemSecurity"),
+        "economy": _localised(event_dict, "SystemEconomy"),
+        "last_seen": event_dict["timestamp"],
+        "tickid": event_dict.get("tickid"),
+        "ticktime": event_dict.get("ticktime"),
+        "event_type": event_dict.get("event"),
+    }
+    factions = [{
+        "system_address": address,
+        "faction": faction["Name"],
+        "influence": faction.get("Influence"),
+        "state": faction.get("FactionState"),
+        "allegiance": faction.get("Allegiance"),
+        "government": faction.get("Government"),
+        "happiness": _localised(faction, "Happiness"),
+        "active_states": _state_names(faction.get("ActiveStates")),
+        "pending_states": _state_names(faction.get("PendingStates")),
+        "recovering_states": _state_names(faction.get("RecoveringStates")),
+    } for faction in event_dict.get("Factions") or [] if faction.get("Name")]
+    return state, factions
+
+
+def update_system_state(session, events):
+    """
+    Stores the latest observation of every system among the given event dicts, unless a
+    newer one is stored already. Runs in the caller's transaction (session or connection).
+    """
+    latest = {}
+    for event_dict in events:
+        rows = system_rows(event_dict)
+        if rows is None:
+            continue
+        address = rows[0]["system_address"]
+        # Journal timestamps sort as text; on a tie the first observation wins
+        if address not in latest or rows[0]["last_seen"] > latest[address][0]["last_seen"]:
+            latest[address] = rows
+    if not latest:
+        return
+
+    # Core statements against the tables, so a batch stays one statement even with NULL values
+    states, system_factions = SystemState.__table__, SystemFaction.__table__
+    stmt = sqlite_insert(states)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[states.c.system_address],
+        set_={c.name: stmt.excluded[c.name] for c in states.columns if c.name != "system_address"},
+        where=stmt.excluded.last_seen > states.c.last_seen,
+    ).returning(states.c.system_address)
+    # Only inserted and actually updated rows come back; their faction lists are replaced
+    updated = session.execute(stmt, [state for state, _ in latest.values()]).scalars().all()
+    if not updated:
+        return
+    session.execute(
+        delete(system_factions).where(system_factions.c.system_address.in_(bindparam("addresses", expanding=True))),
+        {"addresses": updated}
+    )
+    factions = [row for address in updated for row in latest[address][1]]
+    if factions:
+        session.execute(insert(system_factions), factions)
+
+
+def rebuild_system_state(connection, chunk_size=5000):
+    """Recomputes system_state and system_faction from the stored payloads, in id order."""
+    connection.execute(text("DELETE FROM system_state"))
+    connection.execute(text("DELETE FROM system_faction"))
+    events = ", ".join(f"'{name}'" for name in SYSTEM_EVENTS)
+    last_id = 0
+    while True:
+        rows = connection.execute(text(f"""
+            SELECT id, tickid, ticktime, raw_json, raw_json_compressed FROM event
+            WHERE id > :last_id AND event IN ({events})
+            ORDER BY id LIMIT :limit
+        """), {"last_id": last_id, "limit": chunk_size}).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        batch = []
+        for row in rows:
+            try:
+                data = decode_raw_json(row.raw_json, row.raw_json_compressed)
+            except Exception:
+                continue
+            if data:
+                data.setdefault("tickid", row.tickid)
+                data.setdefault("ticktime", row.ticktime)
+                batch.append(data)
+        update_system_state(connection, batch)
+
+
+def system_state(session, address):
+    """The stored state of a system with its factions by influence, or None if it was never seen."""
+    state = session.execute(text(
+        "SELECT * FROM system_state WHERE system_address = :address"
+    ), {"address": address}).mappings().fetchone()
+    if state is None:
+        return None
+    factions = []
+    for row in session.execute(text("""
+        SELECT * FROM system_faction WHERE system_address = :address ORDER BY influence DESC, faction
+    """), {"address": address}).mappings():
+        faction = {key: value for key, value in row.items() if key not in ("system_address", "faction")}
+        for key in ("active_states", "pending_states", "recovering_states"):
+            faction[key] = json.loads(faction[key] or "[]")
+        factions.append(dict(name=row["faction"], **faction))
+    return dict(state, factions=factions)
+
+
+def register_system_routes(app, db, require_api_key):
+
+    @app.route("/api/systems/<int:address>", methods=["GET"])
+    @require_api_key
+    @etag_response()
+    @cached_response
+    def get_system_state(address):
+        """Latest known state of a system by its SystemAddress."""
+        try:
+            state = system_state(db.session, address)
+            if state is None:
+                return jsonify({"error": "Unknown system"}), 404
+            return jsonify(state)
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--rebuild", action="store_true", required=True)
+    args = parser.parse_args()
+
+    from migrations import run_migrations
+    engine = create_engine(f"sqlite:///{args.db}")
+    run_migrations(engine)
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        rebuild_system_state(connection)
+        bump_data_generation(connection)
+        count = connection.execute(text("SELECT COUNT(*) FROM system_state")).scalar()
+    print(f"✅ System state rebuilt ({count} systems) in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,165 @@
+import csv
+import io
+import os
+import zlib
+from flask import request, jsonify, Response, stream_with_context
+from sqlalchemy import text
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Largest page a client may request with ?limit=
+TABLE_PAGE_MAX = int(os.getenv("TABLE_PAGE_MAX", "10000"))
+# Rows fetched from the cursor at a time while streaming
+TABLE_STREAM_BATCH = 500
+
+# Query arguments with a meaning of their own; every other argument is an equality filter
+RESERVED_ARGS = {"after_id", "limit", "columns", "format"}
+# Stored compressed payloads are returned as raw_json text, never as bytes
+HIDDEN_COLUMNS = {"event": {"raw_json_compressed"}}
+CONTENT_TYPES = {"json": "application/json", "ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+class TableQueryError(ValueError):
+    """Invalid table query argument, answered with 400."""
+
+
+def table_columns(db, tablename):
+    """Column names of a table, or None if there is no such table."""
+    exists = db.session.execute(text(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=:name"
+    ), {"name": tablename}).fetchone()
+    if not exists:
+        return None
+    return [row[1] for row in db.session.execute(text(f'PRAGMA table_info("{tablename}")'))]
+
+
+def build_table_query(tablename, columns, args):
+    """
+    Returns (sql, params, output columns) for a table request.
+    Rows are ordered by rowid, which is the id of tables with an integer primary key,
+    so after_id is a stable keyset cursor.
+    """
+    hidden = HIDDEN_COLUMNS.get(tablename, set())
+    visible = [c for c in columns if c not in hidden]
+    selected = visible
+    if args.get("columns"):
+        selected = [c.strip() for c in args["columns"].split(",") if c.strip()]
+        unknown = [c for c in selected if c not in visible]
+        if unknown:
+            raise TableQueryError(f"Unknown column(s): {', '.join(unknown)}")
+
+    # The compressed payload is read along with raw_json and merged into it
+    fetched = selected + [c for c in hidden if "raw_json" in selected]
+    where = []
+    params = {}
+    for i, (name, value) in enumerate(args.items(multi=True)):
+        if name in RESERVED_ARGS:
+            continue
+        if name not in visible:
+            raise TableQueryError(f"Unknown filter column: {name}")
+        where.append(f'"{name}" = :f{i}')
+        params[f"f{i}"] = value
+
+    if args.get("after_id"):
+        try:
+            params["after_id"] = int(args["after_id"])
+        except ValueError:
+            raise TableQueryError("after_id must be an integer")
+        where.append("rowid > :after_id")
+
+    limit = args.get("limit")
+    if limit is not None:
+        try:
+            params["limit"] = int(limit)
+        except ValueError:
+            raise TableQueryError("limit must be an integer")
+        if not 1 <= params["limit"] <= TABLE_PAGE_MAX:
+            raise TableQueryError(f"limit must be between 1 and {TABLE_PAGE_MAX}")
+
+    column_sql = ", ".join(f'"{c}"' for c in fetched)
+    sql = f'SELECT rowid AS __rowid__, {column_sql} FROM "{tablename}"'
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY rowid"
+    if limit is not None:
+        sql += " LIMIT :limit"
+    return sql, params, selected
+
+
+def row_to_dict(row, selected):
+    data = dict(row._mapping)
+    compressed = data.pop("raw_json_compressed", None)
+    if compressed is not None:
+        data["raw_json"] = zlib.decompress(compressed).decode("utf-8")
+    return {c: data[c] for c in selected}
+
+
+def encode_rows(rows, selected, fmt, dumps):
+    """Yields the body of a table response chunk by chunk; dumps is the app's JSON encoder."""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(selected)
+        for row in rows:
+            writer.writerow([row[c] for c in selected])
+            if buffer.tell() > 65536:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    elif fmt == "ndjson":
+        for row in rows:
+            yield dumps(row, separators=(",", ":")) + "\n"
+    else:
+        yield "["
+        for i, row in enumerate(rows):
+            yield ("," if i else "") + dumps(row, separators=(",", ":"))
+        yield "]\n"
+
+
+def register_table_routes(app, db, require_api_key):
+
+    @app.route("/api/table/<tablename>", methods=["GET"])
+    @require_api_key
+    def query_table(tablename):
+        """
+        Rows of a table as a JSON array (default), NDJSON or CSV (?format=).
+        ?columns=a,b projects, ?<column>=<value> filters by equality, ?after_id=&limit=
+        pages by rowid with the next cursor in X-Next-After-Id. Without limit the
+        rows are streamed from the cursor, so even the event table needs constant memory.
+        """
+        try:
+            # Security check: only existing tables and their own columns end up in the SQL
+            columns = table_columns(db, tablename)
+            if columns is None:
+                return jsonify({"error": f"Table '{tablename}' not found."}), 404
+
+            fmt = request.args.get("format", "json")
+            if fmt not in CONTENT_TYPES:
+                return jsonify({"error": f"Unsupported format '{fmt}', use json, ndjson or csv"}), 400
+            sql, params, selected = build_table_query(tablename, columns, request.args)
+
+            headers = {}
+            if fmt == "csv":
+                headers["Content-Disposition"] = f'attachment; filename="{tablename}.csv"'
+
+            if "limit" in params:
+                # A page is bounded, so it is read first to know the next cursor
+                rows = db.session.execute(text(sql), params).fetchall()
+                if len(rows) == params["limit"]:
+                    headers["X-Next-After-Id"] = str(rows[-1].__rowid__)
+                body = encode_rows([row_to_dict(r, selected) for r in rows], selected, fmt, app.json.dumps)
+                return Response(body, mimetype=CONTENT_TYPES[fmt], headers=headers)
+        except TableQueryError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+        def stream():
+            with db.engine.connect() as connection:
+                result = connection.execution_options(stream_results=True).execute(text(sql), params)
+                rows = (row_to_dict(r, selected) for r in result.yield_per(TABLE_STREAM_BATCH))
+                yield from encode_rows(rows, selected, fmt, app.json.dumps)
+
+        return Response(stream_with_context(stream()), mimetype=CONTENT_TYPES[fmt], headers=headers)
@@ -0,0 +1,121 @@
+"""
+Tick registry: one row per tickid with its ticktime, the first and last event
+timestamp, the number of events and the Zoy galaxy tick time at the moment the
+tick was first seen.
+
+ingest_events() updates it in the same transaction as the event insert, so the
+current and previous tick and the ticks of a ?tick_from=&tick_to= range are
+looked up in this small table instead of sorting the event table. The rebuild
+recomputes the event ranges from the event table and keeps the recorded galaxy
+tick times.
+
+Usage:
+    python ticks.py --rebuild [--db instance/bgs_data.db]
+"""
+import argparse
+import time
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from fdev_tick_monitor import last_tick
+from models import Tick
+from response_cache import bump_data_generation
+
+DB_PATH = "instance/bgs_data.db"
+
+
+def update_ticks(session, events):
+    """
+    Adds the given event dicts to their ticks. Runs in the caller's transaction
+    (session or connection).
+    """
+    ticks = {}
+    for event_dict in events:
+        tickid, timestamp = event_dict["tickid"], event_dict["timestamp"]
+        tick = ticks.get(tickid)
+        if tick is None:
+            ticks[tickid] = {
+                "tickid": tickid, "ticktime": event_dict.get("ticktime"),
+                "first_seen": timestamp, "last_seen": timestamp, "event_count": 1,
+                "galaxy_tick": last_tick["value"],
+            }
+            continue
+        tick["first_seen"] = min(tick["first_seen"], timestamp)
+        tick["last_seen"] = max(tick["last_seen"], timestamp)
+        tick["event_count"] += 1
+    if not ticks:
+        return
+
+    # Core insert against the table, so a batch stays one statement even with NULL values
+    table = Tick.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(index_elements=[table.c.tickid], set_={
+        "ticktime": func.coalesce(table.c.ticktime, stmt.excluded.ticktime),
+        "first_seen": func.min(table.c.first_seen, stmt.excluded.first_seen),
+        "last_seen": func.max(table.c.last_seen, stmt.excluded.last_seen),
+        "event_count": table.c.event_count + stmt.excluded.event_count,
+        "galaxy_tick": func.coalesce(table.c.galaxy_tick, stmt.excluded.galaxy_tick),
+    })
+    session.execute(stmt, list(ticks.values()))
+
+
+def rebuild_ticks(connection):
+    """Recomputes the event range of every tick from the event table."""
+    connection.execute(text("""
+        INSERT INTO tick (tickid, ticktime, first_seen, last_seen, event_count)
+        SELECT tickid, MIN(ticktime), MIN(timestamp), MAX(timestamp), COUNT(*)
+        FROM event WHERE tickid IS NOT NULL GROUP BY tickid
+        ON CONFLICT (tickid) DO UPDATE SET
+            ticktime = excluded.ticktime, first_seen = excluded.first_seen,
+            last_seen = excluded.last_seen, event_count = excluded.event_count
+    """))
+    connection.execute(text("DELETE FROM tick WHERE tickid NOT IN (SELECT tickid FROM event)"))
+
+
+def latest_ticks(session, limit=2):
+    """
+    tickids of the most recent ticks, newest first: the tick with the latest event,
+    then the ticks that started before it, by their first event.
+    """
+    current = session.execute(text(
+        "SELECT tickid, first_seen FROM tick ORDER BY last_seen DESC LIMIT 1"
+    )).fetchone()
+    if current is None:
+        return []
+    earlier = session.execute(text("""
+        SELECT tickid FROM tick WHERE first_seen < :first_seen AND tickid != :tickid
+        ORDER BY first_seen DESC LIMIT :limit
+    """), {"first_seen": current.first_seen, "tickid": current.tickid, "limit": limit - 1}).scalars().all()
+    return [current.tickid] + earlier
+
+
+def tick_range(session, first, last):
+    """
+    (tickid, first_seen, last_seen) rows of the ticks from first to last, both included,
+    ordered by their first event. Returns None if either tick is not registered and []
+    if last started before first.
+    """
+    bounds = dict(session.execute(text(
+        "SELECT tickid, first_seen FROM tick WHERE tickid IN (:first, :last)"
+    ), {"first": first, "last": last}).fetchall())
+    if first not in bounds or last not in bounds:
+        return None
+    return session.execute(text("""
+        SELECT tickid, first_seen, last_seen FROM tick WHERE first_seen BETWEEN :start AND :end ORDER BY first_seen
+    """), {"start": bounds[first], "end": bounds[last]}).fetchall()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--rebuild", action="store_true", required=True)
+    args = parser.parse_args()
+
+    from migrations import run_migrations
+    engine = create_engine(f"sqlite:///{args.db}")
+    run_migrations(engine)
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        rebuild_ticks(connection)
+        bump_data_generation(connection)
+        count = connection.execute(text("SELECT COUNT(*) FROM tick")).scalar()
+    print(f"✅ Tick registry rebuilt ({count} ticks) in {time.perf_counter() - started:.1f}s")
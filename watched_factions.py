@@ -0,0 +1,113 @@
+"""
+Watched factions: the factions the squadron supports.
+
+WATCHED_FACTIONS (comma separated, default East India Company) lists them. A
+faction is watched if its name contains one of the entries, ignoring case, the
+same match as the former LIKE '%East India Company%' filters. Ingest stores the
+position of the matching entry (1 = first) in the watched_faction column of
+mission_completed_influence, synthetic_cz, synthetic_ground_cz and
+conflict_state, so "our faction" filters are indexed equality lookups and
+several factions cost no more than one.
+
+The watched_faction table records the list the stored ids were resolved with.
+When the setting changes, sync_watched_factions() re-resolves the stored rows
+and rebuilds the rollups that depend on them at the next server start.
+
+Usage:
+    python watched_factions.py --rebuild [--db instance/bgs_data.db]
+"""
+import argparse
+import logging
+import os
+import time
+from functools import lru_cache
+from sqlalchemy import create_engine, text
+from rollups import rebuild_rollups, DAILY_ROLLUP, TICK_ROLLUP
+from response_cache import bump_data_generation
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = "instance/bgs_data.db"
+
+WATCHED_FACTIONS = [
+    name.strip() for name in os.getenv("WATCHED_FACTIONS", "East India Company").split(",") if name.strip()
+]
+_WATCHED_LOWER = [name.lower() for name in WATCHED_FACTIONS]
+
+# Tables with a watched_faction column and the faction name column(s) it is resolved from
+WATCHED_COLUMNS = {
+    "mission_completed_influence": ("faction_name",),
+    "synthetic_cz": ("faction",),
+    "synthetic_ground_cz": ("faction",),
+    "conflict_state": ("faction1", "faction2"),
+}
+
+
+@lru_cache(maxsize=4096)
+def watched_faction_id(name):
+    """Position of the first watched entry contained in name, or None."""
+    if not name:
+        return None
+    name = name.lower()
+    return next((i for i, watched in enumerate(_WATCHED_LOWER, 1) if watched in name), None)
+
+
+def first_watched_id(*names):
+    """watched_faction_id() of the first watched name, e.g. of the two sides of a conflict."""
+    return next((i for i in map(watched_faction_id, names) if i is not None), None)
+
+
+def rebuild_watched_factions(connection):
+    """
+    Re-resolves the watched_faction column of every table from the faction names and
+    rebuilds the rollups whose "our faction" metrics depend on it.
+    """
+    for table, columns in WATCHED_COLUMNS.items():
+        names = ", ".join(columns)
+        updates = []
+        for row in connection.execute(text(f"SELECT DISTINCT {names} FROM {table}")):
+            watched = first_watched_id(*row)
+            if watched is not None:
+                updates.append(dict(zip(columns, row), watched=watched))
+        connection.execute(text(f"UPDATE {table} SET watched_faction = NULL WHERE watched_faction IS NOT NULL"))
+        if updates:
+            match = " AND ".join(f"{column} = :{column}" for column in columns)
+            connection.execute(text(f"UPDATE {table} SET watched_faction = :watched WHERE {match}"), updates)
+
+    rebuild_rollups(connection, [DAILY_ROLLUP, TICK_ROLLUP])
+    connection.execute(text("DELETE FROM watched_faction"))
+    connection.execute(
+        text("INSERT INTO watched_faction (id, name) VALUES (:id, :name)"),
+        [{"id": i, "name": name} for i, name in enumerate(WATCHED_FACTIONS, 1)]
+    )
+
+
+def sync_watched_factions(engine):
+    """Rebuilds the watched_faction columns if WATCHED_FACTIONS differs from the stored list. Returns True if it did."""
+    with engine.begin() as connection:
+        stored = connection.execute(text("SELECT name FROM watched_faction ORDER BY id")).scalars().all()
+        if stored == WATCHED_FACTIONS:
+            return False
+        logger.info(f"[WatchedFactions] {stored} -> {WATCHED_FACTIONS}, re-resolving stored rows...")
+        rebuild_watched_factions(connection)
+        bump_data_generation(connection)
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--rebuild", action="store_true", required=True)
+    args = parser.parse_args()
+
+    from migrations import run_migrations
+    engine = create_engine(f"sqlite:///{args.db}")
+    run_migrations(engine)
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        rebuild_watched_factions(connection)
+        bump_data_generation(connection)
+    print(f"✅ Watched factions ({', '.join(WATCHED_FACTIONS)}) resolved in {time.perf_counter() - started:.1f}s")